@@ -1,13 +1,35 @@
-from django.contrib import admin
-from avuweb.main.models import UserProfile, StaticPage, Subscription, CouponCode, SubscriptionEvent
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib import admin, messages
+from django.contrib.admin.views.main import ChangeList
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Q
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.html import format_html
+
+from avuweb.main.exports import MEMBER_EXPORT_HEADER, member_export_rows, stream_csv, stream_export
+from avuweb.main.forms import CouponBatchForm
+from avuweb.main.models import (
+    UserProfile, StaticPage, Subscription, CouponCode, SubscriptionEvent, MembershipTokenRevocation,
+    Campaign, CampaignRecipient, OutboundEmail,
+)
+from avuweb.main.tasks import dispatch_campaign, kick_outbox_dispatcher, start_campaign
 
 
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'user_type', 'full_name', 'created_at')
-    list_filter = ('user_type', 'created_at')
+    list_select_related = ('user',)
+    list_filter = ('user_type', 'is_subscription_active', 'user__subscription__status', 'created_at')
     search_fields = ('user__email', 'full_name', 'identity_number', 'rut')
     readonly_fields = ('created_at', 'updated_at')
+    actions = ['export_members_csv', 'export_members_jsonl']
 
     fieldsets = (
         ('Usuario', {
@@ -33,6 +55,14 @@ class UserProfileAdmin(admin.ModelAdmin):
         }),
     )
 
+    @admin.action(description='Exportar socios seleccionados (CSV)')
+    def export_members_csv(self, request, queryset):
+        return stream_export('socios.csv', MEMBER_EXPORT_HEADER, member_export_rows(queryset), 'csv')
+
+    @admin.action(description='Exportar socios seleccionados (JSONL)')
+    def export_members_jsonl(self, request, queryset):
+        return stream_export('socios.jsonl', MEMBER_EXPORT_HEADER, member_export_rows(queryset), 'jsonl')
+
 
 @admin.register(StaticPage)
 class StaticPageAdmin(admin.ModelAdmin):
@@ -59,6 +89,7 @@ class StaticPageAdmin(admin.ModelAdmin):
 @admin.register(Subscription)
 class SubscriptionAdmin(admin.ModelAdmin):
     list_display = ('user', 'status', 'amount', 'payment_frequency', 'last_payment_date', 'next_payment_date')
+    list_select_related = ('user',)
     list_filter = ('status', 'payment_frequency', 'created_at', 'last_synced_at')
     search_fields = ('user__email', 'mercado_pago_subscription_id')
     readonly_fields = ('mercado_pago_subscription_id', 'mercado_pago_updated_at', 'created_at', 'last_synced_at')
@@ -88,10 +119,13 @@ class SubscriptionAdmin(admin.ModelAdmin):
 
 @admin.register(CouponCode)
 class CouponCodeAdmin(admin.ModelAdmin):
-    list_display = ('code', 'is_used', 'user', 'expires_at', 'created_by', 'created_at')
+    list_display = ('code', 'is_used', 'user', 'expires_at', 'batch_id', 'created_by', 'created_at')
+    # user y created_by son nullables: select_related() sin argumentos no los sigue
+    list_select_related = ('user', 'created_by')
     list_filter = ('is_used', 'expires_at', 'created_at')
-    search_fields = ('code', 'user__email')
-    readonly_fields = ('code', 'created_at', 'used_at')
+    search_fields = ('code', 'user__email', '=batch_id')
+    readonly_fields = ('code', 'batch_id', 'created_at', 'used_at')
+    actions = ['export_csv']
 
     fieldsets = (
         ('Código', {
@@ -104,22 +138,212 @@ class CouponCodeAdmin(admin.ModelAdmin):
             'fields': ('expires_at',)
         }),
         ('Auditoría', {
-            'fields': ('created_by', 'created_at')
+            'fields': ('batch_id', 'created_by', 'created_at')
         }),
     )
 
+    CSV_HEADER = ('code', 'expires_at', 'months_of_validity', 'is_used', 'batch_id')
+
     def save_model(self, request, obj, form, change):
         if not change:
             obj.created_by = request.user
         super().save_model(request, obj, form, change)
 
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path('generate-batch/', self.admin_site.admin_view(self.generate_batch_view),
+                 name='%s_%s_generate_batch' % info),
+            path('batch/<str:batch_id>/csv/', self.admin_site.admin_view(self.batch_csv_view),
+                 name='%s_%s_batch_csv' % info),
+        ] + super().get_urls()
+
+    def generate_batch_view(self, request):
+        if not self.has_add_permission(request):
+            return redirect('admin:main_couponcode_changelist')
+        form = CouponBatchForm(request.POST or None)
+        if request.method == 'POST' and form.is_valid():
+            batch_id = CouponCode.generate_batch(
+                form.cleaned_data['count'],
+                expires_at=form.cleaned_data['expires_at'],
+                created_by=request.user,
+                months_of_validity=form.cleaned_data['months_of_validity'],
+            )
+            csv_url = reverse('admin:main_couponcode_batch_csv', args=[batch_id])
+            self.message_user(request, format_html(
+                'Se generaron {} cupones (lote {}). <a href="{}">Descargar CSV</a>',
+                form.cleaned_data['count'], batch_id, csv_url,
+            ), messages.SUCCESS)
+            return redirect(reverse('admin:main_couponcode_changelist') + f'?q={batch_id}')
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'form': form,
+            'title': 'Generar lote de cupones',
+        }
+        return TemplateResponse(request, 'admin/main/couponcode/generate_batch.html', context)
+
+    def batch_csv_view(self, request, batch_id):
+        if not self.has_view_permission(request):
+            return redirect('admin:index')
+        return self._stream_csv(CouponCode.objects.filter(batch_id=batch_id), f'cupones-{batch_id}.csv')
+
+    @admin.action(description='Descargar CSV de los cupones seleccionados')
+    def export_csv(self, request, queryset):
+        return self._stream_csv(queryset, 'cupones.csv')
+
+    def _stream_csv(self, queryset, filename):
+        rows = queryset.order_by('pk').values_list(*self.CSV_HEADER).iterator(chunk_size=2000)
+        return stream_csv(filename, self.CSV_HEADER, rows)
+
+
+CURSOR_VAR = 'cursor'
+CURSOR_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+# Sin PostgreSQL se cuenta de verdad, pero solo hasta este tope
+ESTIMATED_COUNT_CAP = 10000
+EVENT_TYPES_CACHE_KEY = 'admin:subscription_event_types'
+
+
+def _encode_cursor(event) -> str:
+    return f'{(event.created_at - CURSOR_EPOCH) // timedelta(microseconds=1)}-{event.pk}'
+
+
+def _decode_cursor(value):
+    try:
+        microseconds, pk = (int(part) for part in value.split('-'))
+    except (AttributeError, ValueError):
+        return None
+    return CURSOR_EPOCH + timedelta(microseconds=microseconds), pk
+
+
+def _estimated_count(queryset):
+    """(cantidad, es_exacta) sin COUNT(*) completo.
+
+    En PostgreSQL usa la estimación del planner (EXPLAIN), que sale de las
+    estadísticas de la tabla y respeta los filtros; en otras bases cuenta
+    hasta ESTIMATED_COUNT_CAP filas.
+    """
+    queryset = queryset.order_by()
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows']), False
+    count = queryset[:ESTIMATED_COUNT_CAP + 1].count()
+    return min(count, ESTIMATED_COUNT_CAP), count <= ESTIMATED_COUNT_CAP
+
+
+class SubscriptionEventChangeList(ChangeList):
+    """Changelist de eventos paginado por keyset sobre (created_at, id).
+
+    En vez de OFFSET y COUNT(*), cada página pide list_per_page + 1 filas
+    a partir del cursor (el último evento de la página anterior) y la
+    cantidad total es una estimación. No trae el payload.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.cursor = getattr(request, 'event_cursor', None)
+        super().__init__(request, *args, **kwargs)
+
+    def get_ordering(self, request, queryset):
+        return ['-created_at', '-id']
+
+    def get_results(self, request):
+        queryset = self.queryset
+        if self.cursor is not None:
+            created_at, pk = self.cursor
+            queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+        rows = list(queryset[:self.list_per_page + 1])
+
+        self.result_list = rows[:self.list_per_page]
+        self.next_cursor = _encode_cursor(rows[self.list_per_page - 1]) if len(rows) > self.list_per_page else None
+        self.result_count, self.count_is_exact = _estimated_count(self.queryset)
+        self.show_full_result_count = False
+        self.full_result_count = None
+        self.show_admin_actions = True
+        self.can_show_all = False
+        self.multi_page = self.cursor is not None or self.next_cursor is not None
+        self.paginator = None
+
+    def next_page_url(self):
+        return self.get_query_string({CURSOR_VAR: self.next_cursor}) if self.next_cursor else None
+
+    def first_page_url(self):
+        return self.get_query_string() if self.cursor is not None else None
+
+
+class EventTypeFilter(admin.SimpleListFilter):
+    """Filtro por event_type con las opciones cacheadas (evita un DISTINCT por request)."""
+    title = 'event type'
+    parameter_name = 'event_type'
+
+    def lookups(self, request, model_admin):
+        event_types = cache.get(EVENT_TYPES_CACHE_KEY)
+        if event_types is None:
+            event_types = list(
+                SubscriptionEvent.objects.order_by('event_type').values_list('event_type', flat=True).distinct()
+            )
+            cache.set(EVENT_TYPES_CACHE_KEY, event_types, timeout=60 * 60)
+        return [(event_type, event_type) for event_type in event_types]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(event_type=self.value())
+        return queryset
+
 
 @admin.register(SubscriptionEvent)
 class SubscriptionEventAdmin(admin.ModelAdmin):
     list_display = ('subscription', 'event_type', 'processed', 'created_at')
-    list_filter = ('event_type', 'processed', 'created_at')
+    # Subscription.__str__ usa user.email
+    list_select_related = ('subscription__user',)
+    # Solo filtros servidos por los índices de event_type y processed
+    list_filter = (EventTypeFilter, 'processed')
     search_fields = ('subscription__user__email', 'mercado_pago_event_id')
-    readonly_fields = ('subscription', 'event_type', 'mercado_pago_event_id', 'payload', 'created_at')
+    readonly_fields = ('subscription', 'event_type', 'mercado_pago_event_id', 'payload_preview', 'superseded_by',
+                       'created_at')
+    exclude = ('payload',)
+    # El orden lo fija la paginación por keyset
+    sortable_by = ()
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        # El payload se pide aparte (payload_view) y solo si se abre en el detalle
+        return super().get_queryset(request).defer('payload')
+
+    def get_changelist(self, request, **kwargs):
+        return SubscriptionEventChangeList
+
+    def changelist_view(self, request, extra_context=None):
+        # El cursor no es un filtro: sacarlo antes de que ChangeList valide los parámetros
+        request.GET = request.GET.copy()
+        request.event_cursor = _decode_cursor(request.GET.pop(CURSOR_VAR, [None])[-1])
+        return super().changelist_view(request, extra_context)
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path('<path:object_id>/payload/', self.admin_site.admin_view(self.payload_view),
+                 name='%s_%s_payload' % info),
+        ] + super().get_urls()
+
+    def payload_view(self, request, object_id):
+        if not self.has_view_permission(request):
+            return redirect('admin:index')
+        payload = get_object_or_404(SubscriptionEvent.objects.only('payload'), pk=object_id).payload
+        return HttpResponse(json.dumps(payload, indent=2, ensure_ascii=False, sort_keys=True),
+                            content_type='application/json; charset=utf-8')
+
+    @admin.display(description='Payload')
+    def payload_preview(self, obj):
+        url = reverse('admin:main_subscriptionevent_payload', args=[obj.pk])
+        return format_html(
+            '<details class="event-payload" data-url="{}"><summary>Ver payload</summary><pre>Cargando…</pre></details>',
+            url,
+        )
 
     def has_add_permission(self, request):
         return False
@@ -127,3 +351,124 @@ class SubscriptionEventAdmin(admin.ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         return False
 
+
+@admin.register(MembershipTokenRevocation)
+class MembershipTokenRevocationAdmin(admin.ModelAdmin):
+    list_display = ('user', 'revoked_at', 'expires_at', 'reason')
+    list_select_related = ('user',)
+    list_filter = ('reason', 'revoked_at')
+    search_fields = ('user__email',)
+    raw_id_fields = ('user',)
+
+
+@admin.register(Campaign)
+class CampaignAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'recipient_count', 'sent_count', 'failed_count', 'queued_at', 'finished_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('name', 'subject')
+    readonly_fields = ('status', 'created_by', 'created_at', 'queued_at', 'finished_at')
+    actions = ['send_campaigns', 'cancel_campaigns', 'retry_failed']
+
+    fieldsets = (
+        ('Campaña', {
+            'fields': ('name', 'status')
+        }),
+        ('Mensaje', {
+            'fields': ('subject', 'body'),
+            'description': 'Marcadores: %nombre%, %nombre_completo%, %email%, %vencimiento%',
+        }),
+        ('Destinatarios', {
+            'fields': ('user_type', 'membership', 'subscription_status')
+        }),
+        ('Auditoría', {
+            'fields': ('created_by', 'created_at', 'queued_at', 'finished_at'),
+            'classes': ('collapse',)
+        }),
+    )
+
+    def get_queryset(self, request):
+        # Contadores en el mismo SELECT del listado (sin una consulta por fila)
+        return super().get_queryset(request).annotate(
+            recipient_total=Count('recipients'),
+            sent_total=Count('recipients', filter=Q(recipients__status='sent')),
+            failed_total=Count('recipients', filter=Q(recipients__status='failed')),
+        )
+
+    def get_readonly_fields(self, request, obj=None):
+        # Una vez encolada, mensaje y destinatarios quedan fijos
+        if obj is not None and obj.status != 'draft':
+            return self.readonly_fields + ('subject', 'body', 'user_type', 'membership', 'subscription_status')
+        return self.readonly_fields
+
+    @admin.display(description='Destinatarios', ordering='recipient_total')
+    def recipient_count(self, obj):
+        return obj.recipient_total
+
+    @admin.display(description='Enviados', ordering='sent_total')
+    def sent_count(self, obj):
+        return obj.sent_total
+
+    @admin.display(description='Fallidos', ordering='failed_total')
+    def failed_count(self, obj):
+        return obj.failed_total
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            obj.created_by = request.user
+        super().save_model(request, obj, form, change)
+
+    @admin.action(description='Enviar campañas seleccionadas')
+    def send_campaigns(self, request, queryset):
+        for campaign in queryset.filter(status='draft'):
+            total = start_campaign(campaign)
+            self.message_user(request, f'{campaign.name}: {total} destinatarios en cola', messages.SUCCESS)
+
+    @admin.action(description='Cancelar campañas seleccionadas')
+    def cancel_campaigns(self, request, queryset):
+        cancelled = queryset.filter(status__in=['draft', 'queued', 'sending']).update(status='cancelled')
+        self.message_user(request, f'{cancelled} campañas canceladas', messages.SUCCESS)
+
+    @admin.action(description='Reintentar envíos fallidos')
+    def retry_failed(self, request, queryset):
+        for campaign in queryset.filter(status__in=['sending', 'sent']):
+            retried = campaign.recipients.filter(status='failed').update(status='pending', error_message='')
+            if retried:
+                Campaign.objects.filter(pk=campaign.pk).update(status='sending', finished_at=None)
+                dispatch_campaign.delay(campaign.pk)
+            self.message_user(request, f'{campaign.name}: {retried} envíos reintentados', messages.SUCCESS)
+
+
+@admin.register(CampaignRecipient)
+class CampaignRecipientAdmin(admin.ModelAdmin):
+    list_display = ('email', 'campaign', 'status', 'sent_at')
+    list_filter = ('status', 'campaign')
+    list_select_related = ('campaign',)
+    search_fields = ('email',)
+    readonly_fields = ('campaign', 'user', 'email', 'context', 'status', 'claimed_at', 'sent_at', 'error_message')
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('to', 'subject', 'status', 'attempts', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('to', 'subject', 'dedup_key')
+    readonly_fields = (
+        'dedup_key', 'to', 'subject', 'body', 'status', 'attempts', 'next_attempt_at', 'claimed_at', 'last_error',
+        'created_at', 'sent_at',
+    )
+    actions = ['retry_emails']
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description='Reintentar mails fallidos')
+    def retry_emails(self, request, queryset):
+        retried = queryset.filter(status='failed').update(
+            status='pending', attempts=0, next_attempt_at=timezone.now(), last_error=''
+        )
+        if retried:
+            kick_outbox_dispatcher()
+        self.message_user(request, f'{retried} mail(s) vuelven a la cola.', messages.SUCCESS)
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class MainConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "avuweb.main"
+
+    def ready(self):
+        from avuweb.main import signals  # noqa: F401
+        from avuweb.main.caching import warn_if_cache_is_per_process
+
+        warn_if_cache_is_per_process()
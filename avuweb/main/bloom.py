@@ -0,0 +1,38 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+    """Bloom filter simple para publicar el conjunto de socios activos.
+
+    Los índices salen de blake2b(valor, digest_size=16): h1 y h2 son los dos
+    enteros little-endian de 8 bytes y el i-ésimo bit es (h1 + i * h2) % m.
+    El bit n vive en bits[n // 8], máscara 1 << (n % 8). Con eso cualquier
+    establecimiento puede reimplementar la consulta.
+    """
+
+    def __init__(self, num_bits: int, num_hashes: int, bits: bytes = None):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = bytearray(bits) if bits is not None else bytearray((num_bits + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity: int, false_positive_rate: float) -> 'BloomFilter':
+        """Filtro dimensionado para capacity elementos con esa tasa de falsos positivos."""
+        capacity = max(1, capacity)
+        num_bits = max(8, math.ceil(-capacity * math.log(false_positive_rate) / math.log(2) ** 2))
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        return cls(num_bits, num_hashes)
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little')
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, value: str):
+        for position in self._positions(value):
+            self.bits[position // 8] |= 1 << (position % 8)
+
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[position // 8] & (1 << (position % 8)) for position in self._positions(value))
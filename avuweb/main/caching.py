@@ -0,0 +1,106 @@
+import logging
+import time
+from itertools import groupby
+
+from django.conf import settings
+from django.core.cache import cache
+
+from avuweb.main.models import StaticPage
+
+
+logger = logging.getLogger(__name__)
+
+# Backends que no comparten la caché entre procesos
+PER_PROCESS_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+STATIC_PAGES_VERSION_KEY = 'static_pages:version'
+# Las entradas versionadas expiran solas cuando quedan obsoletas
+STATIC_PAGES_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def warn_if_cache_is_per_process() -> bool:
+    """Avisa al arrancar si, fuera de DEBUG, la caché default no se comparte entre procesos.
+
+    Las invalidaciones versionadas (menú, páginas, estado de socios), los
+    locks de mp_cache y la ventana de batch de webhooks dependen de que web y
+    workers vean la misma caché; con una caché por proceso fallan en silencio.
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    if settings.DEBUG or backend not in PER_PROCESS_CACHE_BACKENDS:
+        return False
+    logger.warning(
+        f"Cache backend {backend} is per-process: invalidations and locks are not shared "
+        f"between web and worker processes. Set CACHE_URL to a Redis URL."
+    )
+    return True
+
+
+def _static_pages_menu_key(version: int) -> str:
+    return f'static_pages:menu:v{version}'
+
+
+def _static_page_key(version: int, slug: str) -> str:
+    return f'static_pages:page:v{version}:{slug}'
+
+
+def static_page_html_key(version: int, slug: str) -> str:
+    """Clave de la página completa ya renderizada (solo tráfico anónimo)."""
+    return f'static_pages:html:v{version}:{slug}'
+
+
+def get_static_pages_version() -> int:
+    """Versión actual de las páginas estáticas (compartida entre procesos)."""
+    version = cache.get(STATIC_PAGES_VERSION_KEY)
+    if version is None:
+        # Semilla basada en el tiempo: si la clave se pierde (flush/evicción)
+        # nunca volvemos a una versión vieja que pueda seguir en caché.
+        cache.add(STATIC_PAGES_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(STATIC_PAGES_VERSION_KEY)
+    return version
+
+
+def bump_static_pages_version():
+    """Invalida todo lo cacheado a partir de las páginas estáticas."""
+    try:
+        cache.incr(STATIC_PAGES_VERSION_KEY)
+    except ValueError:
+        cache.add(STATIC_PAGES_VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def get_static_pages_menu() -> dict:
+    """Menú de páginas estáticas agrupado por categoría.
+
+    Devuelve {categoría: [{'slug': ..., 'title': ...}, ...]} desde la caché;
+    solo consulta la base cuando cambia la versión.
+    """
+    key = _static_pages_menu_key(get_static_pages_version())
+    menu = cache.get(key)
+    if menu is None:
+        pages = StaticPage.objects.order_by('category', 'title').only('category', 'slug', 'title')
+        menu = {
+            category: [{'slug': page.slug, 'title': page.title} for page in pages_in_category]
+            for category, pages_in_category in groupby(pages, key=lambda p: p.get_category_display())
+        }
+        cache.set(key, menu, timeout=STATIC_PAGES_CACHE_TIMEOUT)
+    return menu
+
+
+def get_static_page(slug: str, version: int):
+    """Datos de una página estática para renderizar, o None si no existe.
+
+    Se cachea también la ausencia para que slugs inexistentes no consulten la base.
+    """
+    key = _static_page_key(version, slug)
+    page = cache.get(key)
+    if page is None:
+        row = (
+            StaticPage.objects.filter(slug=slug)
+            .values('slug', 'title', 'rendered_content', 'updated_at')
+            .first()
+        )
+        page = row or False
+        cache.set(key, page, timeout=STATIC_PAGES_CACHE_TIMEOUT)
+    return page or None
@@ -0,0 +1,231 @@
+import logging
+import re
+import smtplib
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from avuweb.main.models import Campaign, CampaignRecipient, UserProfile
+
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_RE = re.compile(r'%([a-z_]+)%')
+PLACEHOLDERS = ('nombre', 'nombre_completo', 'email', 'vencimiento')
+
+# Estados de destinatario que todavía no terminaron
+OPEN_STATUSES = ('pending', 'sending')
+
+
+class CompiledTemplate:
+    """Texto con marcadores %nombre% partido una sola vez en literales y claves.
+
+    render(context) solo concatena, así que se puede llamar por cada
+    destinatario sin volver a parsear. Los %marcadores% desconocidos quedan
+    tal cual.
+    """
+
+    def __init__(self, text: str):
+        self.literals, self.keys = [], []
+        position = 0
+        for match in PLACEHOLDER_RE.finditer(text):
+            if match.group(1) not in PLACEHOLDERS:
+                continue
+            self.literals.append(text[position:match.start()])
+            self.keys.append(match.group(1))
+            position = match.end()
+        self.literals.append(text[position:])
+
+    def render(self, context: dict) -> str:
+        parts = [self.literals[0]]
+        for key, literal in zip(self.keys, self.literals[1:]):
+            parts.append(str(context.get(key, '')))
+            parts.append(literal)
+        return ''.join(parts)
+
+
+def campaign_audience(campaign: Campaign):
+    """Filas (user_id, email, nombre completo, username, próximo cobro) de los destinatarios.
+
+    Un solo SELECT sobre UserProfile con los filtros en columnas indexadas
+    (user_type, is_subscription_active, Subscription.status).
+    """
+    profiles = UserProfile.objects.filter(user__is_active=True).exclude(user__email='')
+    if campaign.user_type:
+        profiles = profiles.filter(user_type=campaign.user_type)
+    if campaign.membership != 'all':
+        profiles = profiles.filter(is_subscription_active=campaign.membership == 'active')
+    if campaign.subscription_status:
+        profiles = profiles.filter(user__subscription__status=campaign.subscription_status)
+    return profiles.order_by('user_id').values_list(
+        'user_id', 'user__email', 'full_name', 'user__username', 'user__subscription__next_payment_date'
+    )
+
+
+def recipient_context(email: str, full_name: str, username: str, next_payment_date) -> dict:
+    full_name = full_name.strip()
+    return {
+        'nombre': full_name.split()[0] if full_name else username,
+        'nombre_completo': full_name or username,
+        'email': email,
+        'vencimiento': next_payment_date.strftime('%d/%m/%Y') if next_payment_date else '',
+    }
+
+
+def queue_campaign(campaign: Campaign) -> int:
+    """Congela los destinatarios de una campaña en borrador y la deja en cola.
+
+    Lanza ValueError si la campaña ya no es un borrador. Devuelve la
+    cantidad de destinatarios; el envío lo despacha quien llama (ver
+    tasks.start_campaign).
+    """
+    with transaction.atomic():
+        locked = Campaign.objects.select_for_update().get(pk=campaign.pk)
+        if locked.status != 'draft':
+            raise ValueError(f"La campaña ya está {locked.get_status_display().lower()}")
+
+        batch, total = [], 0
+        for user_id, email, full_name, username, next_payment_date in campaign_audience(locked).iterator(chunk_size=2000):
+            batch.append(CampaignRecipient(
+                campaign=locked, user_id=user_id, email=email,
+                context=recipient_context(email, full_name, username, next_payment_date),
+            ))
+            if len(batch) >= 1000:
+                CampaignRecipient.objects.bulk_create(batch, ignore_conflicts=True)
+                total += len(batch)
+                batch = []
+        CampaignRecipient.objects.bulk_create(batch, ignore_conflicts=True)
+        total += len(batch)
+
+        locked.status = 'queued'
+        locked.queued_at = timezone.now()
+        locked.save(update_fields=['status', 'queued_at'])
+    campaign.status, campaign.queued_at = locked.status, locked.queued_at
+    return total
+
+
+def claim_timeout() -> float:
+    """Segundos tras los que un claim de chunk se da por perdido.
+
+    Nunca menos que el doble de lo que tarda un chunk completo al ritmo de
+    CAMPAIGN_SEND_RATE: si no, se liberarían filas que el chunk todavía
+    tiene y otro chunk las mandaría de nuevo.
+    """
+    timeout = getattr(settings, 'CAMPAIGN_CLAIM_TIMEOUT', 600)
+    rate = getattr(settings, 'CAMPAIGN_SEND_RATE', 10)
+    if rate:
+        timeout = max(timeout, 2 * getattr(settings, 'CAMPAIGN_CHUNK_SIZE', 200) / rate)
+    return timeout
+
+
+def release_stale_claims(campaign_id: int) -> int:
+    """Devuelve a pending los destinatarios tomados por un chunk que no terminó (worker caído)."""
+    return CampaignRecipient.objects.filter(
+        campaign_id=campaign_id, status='sending', claimed_at__lt=timezone.now() - timedelta(seconds=claim_timeout())
+    ).update(status='pending', claimed_at=None)
+
+
+def plan_chunks(campaign_id: int) -> list:
+    """[(primer_id, último_id), ...] de los destinatarios pendientes, de a CAMPAIGN_CHUNK_SIZE."""
+    chunk_size = getattr(settings, 'CAMPAIGN_CHUNK_SIZE', 200)
+    ids = list(
+        CampaignRecipient.objects.filter(campaign_id=campaign_id, status='pending')
+        .order_by('id').values_list('id', flat=True)
+    )
+    return [
+        (ids[start], ids[min(start + chunk_size, len(ids)) - 1])
+        for start in range(0, len(ids), chunk_size)
+    ]
+
+
+def chunk_delay(index: int) -> float:
+    """Segundos hasta el chunk index para no superar CAMPAIGN_SEND_RATE mails por segundo en total."""
+    rate = getattr(settings, 'CAMPAIGN_SEND_RATE', 10)
+    if not rate:
+        return 0
+    return index * getattr(settings, 'CAMPAIGN_CHUNK_SIZE', 200) / rate
+
+
+def send_chunk(campaign_id: int, first_id: int, last_id: int) -> dict:
+    """Envía los destinatarios pendientes con ID en [first_id, last_id] por una sola conexión SMTP.
+
+    Toma las filas con un UPDATE condicional (pending -> sending), así un
+    chunk repetido o solapado no manda dos veces el mismo mail. Cada
+    resultado se guarda apenas se envía: si el worker muere, lo que quedó en
+    sending vuelve a pending con release_stale_claims.
+    """
+    campaign = Campaign.objects.get(pk=campaign_id)
+    result = {'sent': 0, 'failed': 0}
+    if campaign.status == 'cancelled':
+        return result
+
+    recipients = CampaignRecipient.objects.filter(campaign_id=campaign_id, id__range=(first_id, last_id))
+    claimed_at = timezone.now()
+    recipients.filter(status='pending').update(status='sending', claimed_at=claimed_at)
+    rows = list(
+        recipients.filter(status='sending', claimed_at=claimed_at).order_by('id').values_list('id', 'email', 'context')
+    )
+    if not rows:
+        return result
+
+    subject, body = CompiledTemplate(campaign.subject), CompiledTemplate(campaign.body)
+    rate = getattr(settings, 'CAMPAIGN_SEND_RATE', 10)
+    interval = 1 / rate if rate else 0
+
+    connection = get_connection()
+    try:
+        connection.open()
+    except OSError:
+        # Sin servidor no se envió nada: liberar las filas para el reintento
+        recipients.filter(status='sending', claimed_at=claimed_at).update(status='pending', claimed_at=None)
+        raise
+    try:
+        for recipient_id, email, context in rows:
+            started = time.monotonic()
+            message = EmailMessage(subject.render(context), body.render(context), to=[email], connection=connection)
+            try:
+                message.send()
+            except OSError as e:
+                # smtplib.SMTPException es un OSError
+                CampaignRecipient.objects.filter(pk=recipient_id).update(status='failed', error_message=str(e)[:1000])
+                result['failed'] += 1
+                logger.warning(f"Campaign {campaign_id}: failed to send to recipient {recipient_id}: {e}")
+                if isinstance(e, smtplib.SMTPServerDisconnected) or not isinstance(e, smtplib.SMTPException):
+                    connection.close()
+                    connection.open()
+            else:
+                CampaignRecipient.objects.filter(pk=recipient_id).update(status='sent', sent_at=timezone.now())
+                result['sent'] += 1
+            wait = interval - (time.monotonic() - started)
+            if wait > 0:
+                time.sleep(wait)
+    finally:
+        connection.close()
+
+    finish_campaign_if_done(campaign_id)
+    return result
+
+
+def finish_campaign_if_done(campaign_id: int) -> bool:
+    if CampaignRecipient.objects.filter(campaign_id=campaign_id, status__in=OPEN_STATUSES).exists():
+        return False
+    return bool(
+        Campaign.objects.filter(pk=campaign_id, status__in=['queued', 'sending'])
+        .update(status='sent', finished_at=timezone.now())
+    )
+
+
+def campaign_progress(campaign_id: int) -> dict:
+    """{estado: cantidad} de los destinatarios de la campaña."""
+    counts = {status: 0 for status, _ in CampaignRecipient.STATUS_CHOICES}
+    rows = (
+        CampaignRecipient.objects.filter(campaign_id=campaign_id).order_by()
+        .values('status').annotate(count=Count('id'))
+    )
+    counts.update({row['status']: row['count'] for row in rows})
+    return counts
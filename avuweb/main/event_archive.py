@@ -0,0 +1,168 @@
+import gzip
+import json
+import logging
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from avuweb.main.models import Subscription, SubscriptionEvent
+
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FIELDS = (
+    'id', 'subscription_id', 'event_type', 'mercado_pago_event_id', 'payload', 'processed',
+    'processed_at', 'error_message', 'superseded_by_id', 'created_at',
+)
+DATETIME_FIELDS = ('processed_at', 'created_at')
+
+
+def archive_dir() -> Path:
+    return Path(getattr(settings, 'SUBSCRIPTION_EVENT_ARCHIVE_DIR', 'archive/subscription_events'))
+
+
+def _serialize(row: dict) -> str:
+    record = dict(row)
+    for field in DATETIME_FIELDS:
+        if record[field] is not None:
+            record[field] = record[field].isoformat()
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+
+
+def archive_subscription_events(older_than_days: int = None, batch_size: int = None, dry_run: bool = False) -> dict:
+    """Mueve los eventos procesados más viejos que older_than_days a un JSONL.gz.
+
+    Recorre por id en lotes de batch_size: cada lote se escribe y se sincroniza
+    en disco antes de borrarlo en su propia transacción corta, así la tabla
+    nunca queda bloqueada por todo el archivado y un corte a mitad de camino
+    como mucho duplica un lote en el archivo (restore lo tolera).
+
+    Devuelve {'archived': n, 'file': ruta o None}.
+    """
+    if older_than_days is None:
+        older_than_days = getattr(settings, 'SUBSCRIPTION_EVENT_RETENTION_DAYS', 90)
+    batch_size = batch_size or getattr(settings, 'SUBSCRIPTION_EVENT_ARCHIVE_BATCH_SIZE', 1000)
+    cutoff = timezone.now() - timedelta(days=older_than_days)
+    eligible = SubscriptionEvent.objects.filter(processed=True, created_at__lt=cutoff).order_by('id')
+
+    if dry_run:
+        return {'archived': eligible.count(), 'file': None}
+
+    path = archive_dir() / f'subscription-events-{timezone.now():%Y%m%d-%H%M%S}.jsonl.gz'
+    archived, last_id = 0, 0
+    raw = archive = None
+    try:
+        while True:
+            rows = list(eligible.filter(id__gt=last_id).values(*ARCHIVE_FIELDS)[:batch_size])
+            if not rows:
+                break
+            if archive is None:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                raw = open(path, 'wb')
+                archive = gzip.GzipFile(fileobj=raw, mode='wb')
+            archive.write(''.join(_serialize(row) + '\n' for row in rows).encode('utf-8'))
+            archive.flush()
+            raw.flush()
+            os.fsync(raw.fileno())
+
+            ids = [row['id'] for row in rows]
+            with transaction.atomic():
+                # only('id'): el borrado no necesita traer el payload
+                SubscriptionEvent.objects.filter(id__in=ids).only('id').delete()
+            archived += len(ids)
+            last_id = ids[-1]
+    finally:
+        if archive is not None:
+            archive.close()
+            raw.close()
+
+    if archived:
+        logger.info(f"Archived {archived} subscription events to {path}")
+    return {'archived': archived, 'file': str(path) if archived else None}
+
+
+def iter_archived_events(event_id: str = None, subscription_id: int = None, since=None, until=None):
+    """Recorre los eventos archivados (dicts) que cumplen los filtros, del archivo más viejo al más nuevo."""
+    for path in sorted(archive_dir().glob('subscription-events-*.jsonl.gz')):
+        for record in _read_archive(path):
+            if event_id is not None and record['mercado_pago_event_id'] != event_id:
+                continue
+            if subscription_id is not None and record['subscription_id'] != subscription_id:
+                continue
+            created_at = parse_datetime(record['created_at'])
+            if since is not None and created_at < since:
+                continue
+            if until is not None and created_at >= until:
+                continue
+            yield record
+
+
+def _read_archive(path: Path):
+    """Registros de un archivo; si quedó truncado (archivado cortado) devuelve los que alcanzó a leer.
+
+    Cada lote se sincroniza completo antes de borrarse de la tabla, así que
+    lo legible de un archivo truncado incluye todos los lotes borrados.
+    """
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as archive:
+            for line in archive:
+                if not line.endswith('\n'):
+                    # Última línea a medio escribir
+                    logger.warning(f"Archive {path} ends with a partial line, skipping it")
+                    return
+                yield json.loads(line)
+    except (EOFError, gzip.BadGzipFile) as e:
+        logger.warning(f"Archive {path} is truncated, keeping the records read so far: {e}")
+
+
+def restore_archived_events(records) -> int:
+    """Vuelve a insertar eventos archivados en la tabla, con su id y created_at originales.
+
+    Omite los que ya están (mismo id o mercado_pago_event_id) y los de
+    suscripciones que ya no existen. Devuelve cuántos se insertaron.
+    """
+    records = list(records)
+    existing_subscriptions = set(
+        Subscription.objects.filter(id__in={r['subscription_id'] for r in records}).values_list('id', flat=True)
+    )
+    records = [r for r in records if r['subscription_id'] in existing_subscriptions]
+    present = set(SubscriptionEvent.objects.filter(id__in=[r['id'] for r in records]).values_list('id', flat=True))
+    present_event_ids = set(
+        SubscriptionEvent.objects.filter(
+            mercado_pago_event_id__in=[r['mercado_pago_event_id'] for r in records]
+        ).values_list('mercado_pago_event_id', flat=True)
+    )
+
+    events, seen = [], set()
+    for record in records:
+        if record['id'] in present or record['mercado_pago_event_id'] in present_event_ids or record['id'] in seen:
+            continue
+        seen.add(record['id'])
+        event = SubscriptionEvent(**{field: record[field] for field in ARCHIVE_FIELDS})
+        for field in DATETIME_FIELDS:
+            if record[field] is not None:
+                setattr(event, field, parse_datetime(record[field]))
+        events.append(event)
+
+    restorable_ids = seen | set(
+        SubscriptionEvent.objects.filter(
+            id__in={e.superseded_by_id for e in events if e.superseded_by_id}
+        ).values_list('id', flat=True)
+    )
+    for event in events:
+        if event.superseded_by_id not in restorable_ids:
+            event.superseded_by_id = None
+
+    created_at = {event.id: event.created_at for event in events}
+    with transaction.atomic():
+        SubscriptionEvent.objects.bulk_create(events, batch_size=500)
+        # auto_now_add pisa created_at en el INSERT: restaurar el original
+        for event in events:
+            event.created_at = created_at[event.id]
+        SubscriptionEvent.objects.bulk_update(events, ['created_at'], batch_size=500)
+    return len(events)
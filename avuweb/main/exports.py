@@ -0,0 +1,91 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+from avuweb.main.models import UserProfile
+
+
+# Columnas del export de socios: (encabezado, lookup desde UserProfile).
+# Todo sale de un único SELECT con LEFT JOIN a User y Subscription.
+MEMBER_EXPORT_COLUMNS = (
+    ('email', 'user__email'),
+    ('full_name', 'full_name'),
+    ('user_type', 'user_type'),
+    ('identity_number', 'identity_number'),
+    ('rut', 'rut'),
+    ('phone_number', 'phone_number'),
+    ('address', 'address'),
+    ('is_subscription_active', 'is_subscription_active'),
+    ('profile_status', 'subscription_status'),
+    ('subscription_status', 'user__subscription__status'),
+    ('payment_frequency', 'user__subscription__payment_frequency'),
+    ('amount', 'user__subscription__amount'),
+    ('last_payment_date', 'user__subscription__last_payment_date'),
+    ('next_payment_date', 'user__subscription__next_payment_date'),
+    ('member_since', 'created_at'),
+)
+MEMBER_EXPORT_HEADER = tuple(header for header, _ in MEMBER_EXPORT_COLUMNS)
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """Pseudo-buffer para csv.writer: devuelve cada línea en vez de guardarla."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(header, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def jsonl_lines(header, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+EXPORT_FORMATS = {
+    'csv': (csv_lines, 'text/csv; charset=utf-8'),
+    'jsonl': (jsonl_lines, 'application/x-ndjson; charset=utf-8'),
+}
+
+
+def stream_export(filename: str, header, rows, export_format: str = 'csv') -> StreamingHttpResponse:
+    """Respuesta CSV o JSONL que se escribe a medida que se itera rows.
+
+    rows debería ser un iterador (p. ej. values_list(...).iterator()) para
+    no cargar el queryset completo en memoria.
+    """
+    lines, content_type = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(lines(header, rows), content_type=content_type)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def stream_csv(filename: str, header, rows) -> StreamingHttpResponse:
+    return stream_export(filename, header, rows, 'csv')
+
+
+def member_export_rows(queryset=None, user_type=None, is_active=None, subscription_status=None):
+    """Filas del export de socios (ver MEMBER_EXPORT_COLUMNS), leídas de a EXPORT_CHUNK_SIZE.
+
+    subscription_status='none' elige a los que nunca tuvieron suscripción.
+    """
+    if queryset is None:
+        queryset = UserProfile.objects.all()
+    if user_type:
+        queryset = queryset.filter(user_type=user_type)
+    if is_active is not None:
+        queryset = queryset.filter(is_subscription_active=is_active)
+    if subscription_status == 'none':
+        queryset = queryset.filter(user__subscription__isnull=True)
+    elif subscription_status:
+        queryset = queryset.filter(user__subscription__status=subscription_status)
+    lookups = [lookup for _, lookup in MEMBER_EXPORT_COLUMNS]
+    return queryset.order_by('pk').values_list(*lookups).iterator(chunk_size=EXPORT_CHUNK_SIZE)
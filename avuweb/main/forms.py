@@ -53,7 +53,7 @@ class SignupStep2Form(forms.Form):
             raise forms.ValidationError("Las contraseñas no coinciden.")
         
         email = cleaned_data.get('email')
-        if email and User.objects.filter(email=email).exists():
+        if email and User.objects.filter(email__iexact=email).exists():
             raise forms.ValidationError("Este email ya está registrado.")
         
         return cleaned_data
@@ -101,3 +101,14 @@ class SignupStep4Form(forms.Form):
         }),
         label="Dirección"
     )
+
+
+class CouponBatchForm(forms.Form):
+    """Admin: generación de un lote de cupones"""
+    count = forms.IntegerField(min_value=1, max_value=100000, label="Cantidad de cupones")
+    expires_at = forms.DateTimeField(
+        label="Vence",
+        help_text="Fecha de vencimiento común a todo el lote",
+        widget=forms.DateTimeInput(attrs={'type': 'datetime-local'}),
+    )
+    months_of_validity = forms.IntegerField(min_value=1, initial=3, label="Meses de validez")
@@ -0,0 +1,75 @@
+"""Medición y reporte compartidos por los comandos benchmark_*."""
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+
+class Rollback(Exception):
+    """Descarta la transacción de un benchmark o chequeo."""
+
+
+def run_rolled_back(run, *args, **kwargs):
+    """Ejecuta run dentro de una transacción que se descarta al final y devuelve su resultado."""
+    try:
+        with transaction.atomic():
+            result = run(*args, **kwargs)
+            raise Rollback
+    except Rollback:
+        pass
+    return result
+
+
+def measure(call, *args, **kwargs):
+    """(resultado, segundos, consultas SQL capturadas) de una llamada."""
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        result = call(*args, **kwargs)
+        duration = time.perf_counter() - started
+    return result, duration, queries.captured_queries
+
+
+def time_calls(call, count: int, concurrency: int = 1):
+    """Llama call(i) para i en range(count): (duración de cada llamada, segundos totales).
+
+    Con concurrency > 1 las llamadas se reparten entre threads.
+    """
+    def timed(i):
+        started = time.perf_counter()
+        call(i)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            durations = list(executor.map(timed, range(count)))
+    else:
+        durations = [timed(i) for i in range(count)]
+    return durations, time.perf_counter() - started
+
+
+def percentile_ms(durations, percentile: int) -> float:
+    if len(durations) == 1:
+        return durations[0] * 1000
+    return statistics.quantiles(durations, n=100, method='inclusive')[percentile - 1] * 1000
+
+
+def write_table(command, title: str, columns, rows):
+    """Escribe title y una tabla en el stdout del comando.
+
+    columns es [(encabezado, ancho, formato)]; la primera columna se alinea a
+    la izquierda y el resto a la derecha. Cada fila trae un valor por columna.
+    """
+    command.stdout.write(command.style.SUCCESS(f'\n=== {title} ==='))
+    header = ''.join(
+        f'{name:<{width}}' if index == 0 else f'{name:>{width}}'
+        for index, (name, width, _) in enumerate(columns)
+    )
+    command.stdout.write(header)
+    for row in rows:
+        command.stdout.write(''.join(
+            f'{format(value, fmt):<{width}}' if index == 0 else f'{format(value, fmt):>{width}}'
+            for index, ((_, width, fmt), value) in enumerate(zip(columns, row))
+        ))
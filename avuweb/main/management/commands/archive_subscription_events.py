@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from avuweb.main.event_archive import archive_subscription_events
+
+
+class Command(BaseCommand):
+    help = 'Move processed SubscriptionEvents older than the retention period to compressed JSONL archives'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Archive events older than this (default: SUBSCRIPTION_EVENT_RETENTION_DAYS)')
+        parser.add_argument('--batch-size', type=int, help='Events per batch (default: SUBSCRIPTION_EVENT_ARCHIVE_BATCH_SIZE)')
+        parser.add_argument('--dry-run', action='store_true', help='Only count the events that would be archived')
+
+    def handle(self, *args, **options):
+        result = archive_subscription_events(
+            older_than_days=options['days'], batch_size=options['batch_size'], dry_run=options['dry_run']
+        )
+        if options['dry_run']:
+            self.stdout.write(f"{result['archived']} eventos se archivarían (dry run, sin cambios)")
+        elif result['archived']:
+            self.stdout.write(self.style.SUCCESS(f"✓ {result['archived']} eventos archivados en {result['file']}"))
+        else:
+            self.stdout.write('No hay eventos para archivar')
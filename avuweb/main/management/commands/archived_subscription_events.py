@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from avuweb.main.event_archive import iter_archived_events, restore_archived_events
+
+
+class Command(BaseCommand):
+    help = 'Search archived SubscriptionEvents and optionally restore them into the table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event-id', help='Mercado Pago event id')
+        parser.add_argument('--subscription-id', type=int, help='Subscription primary key')
+        parser.add_argument('--since', help='Created at or after (ISO 8601)')
+        parser.add_argument('--until', help='Created before (ISO 8601)')
+        parser.add_argument('--restore', action='store_true', help='Insert the matching events back into the table')
+
+    def handle(self, *args, **options):
+        since, until = self._parse(options['since']), self._parse(options['until'])
+        if not any([options['event_id'], options['subscription_id'], since, until]):
+            raise CommandError('Indicar al menos un filtro (--event-id, --subscription-id, --since o --until)')
+
+        records = iter_archived_events(
+            event_id=options['event_id'], subscription_id=options['subscription_id'], since=since, until=until
+        )
+        if options['restore']:
+            restored = restore_archived_events(records)
+            self.stdout.write(self.style.SUCCESS(f'✓ {restored} eventos restaurados'))
+            return
+
+        found = 0
+        for record in records:
+            self.stdout.write(json.dumps(record, ensure_ascii=False))
+            found += 1
+        self.stderr.write(f'{found} eventos encontrados')
+
+    def _parse(self, value):
+        if not value:
+            return None
+        parsed = parse_datetime(value)
+        if parsed is None:
+            raise CommandError(f'Fecha inválida: {value}')
+        return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
@@ -0,0 +1,64 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from avuweb.main.management.benchmarking import percentile_ms, time_calls, write_table
+from avuweb.main.views.home import BENEFITS_FRAGMENT_KEY
+
+
+class Command(BaseCommand):
+    help = 'Compare landing and benefits throughput with a cold fragment cache, warm, and revalidated with ETags'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per scenario')
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        landing_url = reverse('main:home')
+        benefits_url = reverse('main:benefits')
+        client = Client()
+        # El primer GET fija la cookie CSRF, que entra en el ETag de la landing
+        client.get(landing_url)
+        landing_etag = client.get(landing_url).headers['ETag']
+        benefits_etag = client.get(benefits_url).headers['ETag']
+
+        scenarios = [
+            # Sin caché de fragmento ni validadores: lo que costaba cada visita antes
+            ('landing fría', 200, lambda: self._cold(client, landing_url)),
+            ('landing tibia', 200, lambda: client.get(landing_url)),
+            ('landing 304', 304, lambda: client.get(landing_url, HTTP_IF_NONE_MATCH=landing_etag)),
+            ('beneficios fría', 200, lambda: self._cold(client, benefits_url, HTTP_HX_REQUEST='true')),
+            ('beneficios tibia', 200, lambda: client.get(benefits_url, HTTP_HX_REQUEST='true')),
+            ('beneficios 304', 304, lambda: client.get(benefits_url, HTTP_HX_REQUEST='true',
+                                                       HTTP_IF_NONE_MATCH=benefits_etag)),
+        ]
+
+        rows, baseline = [], {}
+        for label, expected_status, request in scenarios:
+            last = [None]
+
+            def call(i):
+                response = request()
+                if response.status_code != expected_status:
+                    raise RuntimeError(f'{label}: HTTP {response.status_code}, se esperaba {expected_status}')
+                last[0] = response
+
+            durations, _ = time_calls(call, count)
+            response = last[0]
+            rate = count / sum(durations)
+            page = label.split()[0]
+            baseline.setdefault(page, rate)
+            rows.append((label, rate, percentile_ms(durations, 50), percentile_ms(durations, 95),
+                         len(response.content), f'x{rate / baseline[page]:.1f}'))
+        write_table(
+            self, f'Landing ({count} requests por escenario)',
+            [('escenario', 18, ''), ('req/s', 9, '.0f'), ('p50 ms', 9, '.2f'), ('p95 ms', 9, '.2f'),
+             ('bytes', 8, ''), ('vs fría', 9, '')],
+            rows,
+        )
+
+    @staticmethod
+    def _cold(client, url, **headers):
+        cache.delete(BENEFITS_FRAGMENT_KEY)
+        return client.get(url, **headers)
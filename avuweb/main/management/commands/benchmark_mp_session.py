@@ -0,0 +1,70 @@
+import threading
+from http.server import ThreadingHTTPServer
+from unittest import mock
+
+import requests
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from avuweb.main.management.benchmarking import percentile_ms, time_calls, write_table
+from avuweb.main.management.commands.fake_mercadopago import FakeMercadoPago, _handler_class
+from avuweb.main.ratelimit import RateLimiter
+from avuweb.main.services import MercadoPagoService
+
+
+class Command(BaseCommand):
+    help = ('Compare one new connection per call (bare requests.get) with the pooled MercadoPagoService session '
+            'against an in-process fake Mercado Pago server')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=300, help='GET /v1/subscriptions calls per client')
+        parser.add_argument('--concurrency', type=int, default=1, help='Threads issuing calls')
+        parser.add_argument('--latency', type=float, default=0.0, help='Seconds the fake server waits per response')
+
+    def handle(self, *args, **options):
+        fake = FakeMercadoPago(latency=options['latency'], jitter=0, error_rate=0, throttle_rate=0, retry_after=0)
+
+        class Handler(_handler_class(fake)):
+            def setup(self):
+                # Una instancia por conexión TCP aceptada
+                fake.count('connections')
+                super().setup()
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f'http://127.0.0.1:{server.server_address[1]}'
+
+        # Sin límite de ritmo: se mide el transporte, no el token bucket
+        limiter = RateLimiter({'subscriptions': {'rate': 1e9, 'burst': 1e9}})
+        try:
+            with override_settings(MERCADO_PAGO_API_BASE_URL=base_url), \
+                    mock.patch('avuweb.main.services.get_rate_limiter', return_value=limiter):
+                service = MercadoPagoService()
+                clients = [
+                    ('requests.get', lambda i: requests.get(
+                        service._subscription_url(f'bench-{i}'), headers=service.headers, timeout=10
+                    ).json()),
+                    ('sesión con pool', lambda i: service._get_subscription(f'bench-{i}')),
+                ]
+                results = []
+                for label, call in clients:
+                    call(0)  # calentamiento: import perezosos y primera conexión
+                    connections_before = fake.counters.get('connections', 0)
+                    durations, elapsed = time_calls(call, options['requests'], options['concurrency'])
+                    results.append((label, durations, elapsed, fake.counters.get('connections', 0) - connections_before))
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        write_table(
+            self,
+            f"Cliente de MP ({options['requests']} GET, {options['concurrency']} hilos, "
+            f"latencia {options['latency'] * 1000:.0f} ms)",
+            [('cliente', 18, ''), ('req/s', 9, '.0f'), ('p50 ms', 9, '.2f'), ('p95 ms', 9, '.2f'),
+             ('conexiones nuevas', 19, '')],
+            [
+                (label, len(durations) / elapsed, percentile_ms(durations, 50), percentile_ms(durations, 95), connections)
+                for label, durations, elapsed, connections in results
+            ],
+        )
@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.urls import reverse
+
+from avuweb.main.management.benchmarking import measure, percentile_ms, run_rolled_back, write_table
+
+
+class Command(BaseCommand):
+    help = 'Time every request of the four-step signup flow (GET and POST per step); nothing is kept'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20, help='Full signups to run')
+        parser.add_argument('--user-type', choices=['socio', 'empresa'], default='socio')
+
+    def handle(self, *args, **options):
+        # Todo corre dentro de una transacción que se descarta al final
+        timings = run_rolled_back(self._run, options['iterations'], options['user_type'])
+
+        rows = []
+        totals = [0.0] * options['iterations']
+        for label, samples in timings.items():
+            durations = [duration for duration, _, _ in samples]
+            for i, duration in enumerate(durations):
+                totals[i] += duration
+            queries = max(count for _, count, _ in samples)
+            session_writes = max(writes for _, _, writes in samples)
+            rows.append((label, percentile_ms(durations, 50), percentile_ms(durations, 95), queries,
+                         'sí' if session_writes else 'no'))
+        write_table(
+            self, f"Alta en 4 pasos ({options['iterations']} usuarios)",
+            [('request', 12, ''), ('p50 ms', 9, '.1f'), ('p95 ms', 9, '.1f'), ('consultas', 11, ''),
+             ('escribe sesión', 16, '')],
+            rows,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Flujo completo: p50 {percentile_ms(totals, 50):.1f} ms, p95 {percentile_ms(totals, 95):.1f} ms'
+        ))
+
+    def _run(self, iterations, user_type):
+        url = reverse('main:signup')
+        timings = {}
+        for i in range(iterations):
+            email = f'benchmark-signup-{i}@example.invalid'
+            step3 = {'identity_number': f'1.234.{i:03d}-5', 'phone_number': '099123456'} if user_type == 'socio' else {'rut': f'21{i:010d}'}
+            steps = [
+                {'user_type': user_type},
+                {'full_name': f'Benchmark {i}', 'email': email, 'password': 'benchmark-pass', 'password_confirm': 'benchmark-pass'},
+                step3,
+                {'address': 'Av. 18 de Julio 1234'},
+            ]
+            client = Client()
+            for step, data in enumerate(steps, start=1):
+                self._request(timings, f'GET {step}', client.get, f'{url}?step={step}')
+                response = self._request(timings, f'POST {step}', client.post, f'{url}?step={step}', data)
+                if response.status_code != 302:
+                    raise RuntimeError(f'El paso {step} no avanzó (HTTP {response.status_code})')
+            if response.url != reverse('main:profile'):
+                raise RuntimeError(f'El alta terminó en {response.url}')
+        return timings
+
+    def _request(self, timings, label, method, *args):
+        response, duration, queries = measure(method, *args)
+        session_writes = sum(
+            1 for query in queries
+            if 'django_session' in query['sql'] and query['sql'].lstrip().upper().startswith(('INSERT', 'UPDATE'))
+        )
+        timings.setdefault(label, []).append((duration, len(queries), session_writes))
+        return response
@@ -0,0 +1,82 @@
+import hashlib
+import json
+import time
+import uuid
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.urls import reverse
+
+from avuweb.main.management.benchmarking import measure, percentile_ms, run_rolled_back, write_table
+from avuweb.main.models import Subscription
+
+
+# Consultas máximas por entrega. Corre dentro de una transacción, así que el
+# atomic del INSERT suma SAVEPOINT/RELEASE; el duplicado suma el ROLLBACK TO
+# SAVEPOINT y la relectura del event_id tras el IntegrityError.
+QUERY_BUDGETS = {
+    'nuevo (sub)': 4,
+    'nuevo (preapproval)': 4,
+    'duplicado': 6,
+}
+
+
+class Command(BaseCommand):
+    help = 'Time signed webhook deliveries (new, duplicate, by preapproval) and fail if any exceeds its query budget; nothing is kept'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200, help='Deliveries per case')
+
+    def handle(self, *args, **options):
+        # Sin broker: el encolado se reemplaza y todo se descarta al final
+        with mock.patch('avuweb.main.views.webhooks.enqueue_subscription_event'):
+            timings = run_rolled_back(self._run, options['iterations'])
+
+        rows, over_budget = [], []
+        for label, samples in timings.items():
+            durations = [duration for duration, _ in samples]
+            queries = max(count for _, count in samples)
+            rows.append((label, percentile_ms(durations, 50), percentile_ms(durations, 95), queries,
+                         QUERY_BUDGETS[label]))
+            if queries > QUERY_BUDGETS[label]:
+                over_budget.append(f'{label}: {queries} consultas (máximo {QUERY_BUDGETS[label]})')
+        write_table(
+            self, f"Webhook de MP ({options['iterations']} entregas por caso)",
+            [('caso', 22, ''), ('p50 ms', 9, '.2f'), ('p95 ms', 9, '.2f'), ('consultas', 11, ''), ('máximo', 8, '')],
+            rows,
+        )
+        if over_budget:
+            raise CommandError('Webhook por encima del presupuesto de consultas: ' + '; '.join(over_budget))
+
+    def _run(self, iterations):
+        user = User.objects.create_user('benchmark-webhook', 'benchmark-webhook@example.invalid', 'benchmark-pass')
+        Subscription.objects.create(
+            user=user, mercado_pago_subscription_id='benchmark-sub', preapproval_id='benchmark-pre', status='active'
+        )
+        url = reverse('main:mp_webhook')
+        client = Client()
+        timings = {}
+        for i in range(iterations):
+            cases = [
+                ('nuevo (sub)', f'benchmark-{i}', 'benchmark-sub', 'received'),
+                ('nuevo (preapproval)', f'benchmark-pre-{i}', 'benchmark-pre', 'received'),
+                ('duplicado', f'benchmark-{i}', 'benchmark-sub', 'already_processed'),
+            ]
+            for label, event_id, resource_id, expected in cases:
+                body = json.dumps({'id': event_id, 'type': 'subscription_preapproval', 'data': {'id': resource_id}})
+                response, duration, queries = measure(
+                    client.post, url, body, content_type='application/json', **self._signed_headers(body)
+                )
+                if response.status_code != 200 or response.json().get('status') != expected:
+                    raise RuntimeError(f'{label}: HTTP {response.status_code} {response.content!r}')
+                timings.setdefault(label, []).append((duration, len(queries)))
+        return timings
+
+    @staticmethod
+    def _signed_headers(body: str) -> dict:
+        request_id = uuid.uuid4().hex
+        timestamp = str(int(time.time()))
+        signature = hashlib.sha256(f'{request_id}.{timestamp}.{body}'.encode()).hexdigest()
+        return {'HTTP_X_REQUEST_ID': request_id, 'HTTP_X_SIGNATURE': f'ts={timestamp},v1={signature}'}
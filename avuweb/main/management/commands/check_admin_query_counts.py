@@ -0,0 +1,112 @@
+from datetime import timedelta
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from avuweb.main.management.benchmarking import run_rolled_back
+from avuweb.main.models import (
+    Campaign, CampaignRecipient, CouponCode, MembershipTokenRevocation, OutboundEmail, StaticPage, Subscription,
+    SubscriptionEvent, UserProfile,
+)
+
+
+def seed_admin_rows(start, stop, creator):
+    """Crea las filas start..stop-1 de cada modelo del admin de main (también lo usan los tests)."""
+    now = timezone.now()
+    users = User.objects.bulk_create([
+        User(username=f'query-count-{i}', email=f'query-count-{i}@example.invalid') for i in range(start, stop)
+    ])
+    UserProfile.objects.bulk_create([
+        UserProfile(user=user, user_type='socio', full_name=user.username) for user in users
+    ])
+    subscriptions = Subscription.objects.bulk_create([
+        Subscription(user=user, mercado_pago_subscription_id=f'query-count-{user.pk}') for user in users
+    ])
+    SubscriptionEvent.objects.bulk_create([
+        SubscriptionEvent(subscription=subscription, event_type='payment.updated',
+                          mercado_pago_event_id=f'query-count-{subscription.pk}', payload={'data': {}})
+        for subscription in subscriptions
+    ])
+    CouponCode.objects.bulk_create([
+        CouponCode(code=CouponCode.generate_code(), user=user, created_by=creator, is_used=True,
+                   expires_at=now + timedelta(days=30))
+        for user in users
+    ])
+    MembershipTokenRevocation.objects.bulk_create([
+        MembershipTokenRevocation(user=user, expires_at=now + timedelta(days=30)) for user in users
+    ])
+    StaticPage.objects.bulk_create([
+        StaticPage(title=f'Página {i}', slug=f'query-count-{i}', category=StaticPage.CATEGORY_CHOICES[0][0])
+        for i in range(start, stop)
+    ])
+    campaigns = Campaign.objects.bulk_create([
+        Campaign(name=f'Campaña {i}', subject='Hola %nombre%', body='Hola %nombre%', created_by=creator)
+        for i in range(start, stop)
+    ])
+    CampaignRecipient.objects.bulk_create([
+        CampaignRecipient(campaign=campaign, user=user, email=user.email)
+        for campaign, user in zip(campaigns, users)
+    ])
+    OutboundEmail.objects.bulk_create([
+        OutboundEmail(to=user.email, subject='Hola', body='Hola', dedup_key=f'query-count:{user.pk}')
+        for user in users
+    ])
+
+
+class Command(BaseCommand):
+    help = 'Render every main app changelist with few and many rows and fail if the query count grows with the rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=300, help='Rows per model for the large render')
+
+    def handle(self, *args, **options):
+        # Todo corre dentro de una transacción que se descarta al final
+        results = run_rolled_back(self._measure, options['rows'])
+
+        self.stdout.write(self.style.SUCCESS('\n=== Consultas por changelist ==='))
+        growing = []
+        for model_admin, small, large in results:
+            label = model_admin.model._meta.label
+            self.stdout.write(f'{label}: {small} con pocas filas, {large} con {options["rows"]}')
+            if large != small:
+                growing.append(label)
+        if growing:
+            raise CommandError(f'La cantidad de consultas crece con las filas en: {", ".join(growing)}')
+        self.stdout.write(self.style.SUCCESS('✓ Cantidad de consultas constante'))
+
+    def _measure(self, rows):
+        superuser = User.objects.create_superuser('admin-query-count', 'admin-query-count@example.invalid', None)
+        model_admins = [
+            model_admin for model, model_admin in admin.site._registry.items()
+            if model._meta.app_label == 'main'
+        ]
+        seed_admin_rows(0, 3, superuser)
+        for model_admin in model_admins:
+            self._render(model_admin, superuser, rows)  # calienta cachés (content types, permisos)
+        small = [self._count(model_admin, superuser, rows) for model_admin in model_admins]
+        seed_admin_rows(3, rows, superuser)
+        large = [self._count(model_admin, superuser, rows) for model_admin in model_admins]
+        return list(zip(model_admins, small, large))
+
+    def _render(self, model_admin, user, rows):
+        request = RequestFactory().get('/')
+        request.user = user
+        # Una sola página con todas las filas
+        list_per_page = model_admin.list_per_page
+        model_admin.list_per_page = rows
+        try:
+            response = model_admin.changelist_view(request)
+            response.render()
+        finally:
+            model_admin.list_per_page = list_per_page
+        return response
+
+    def _count(self, model_admin, user, rows):
+        with CaptureQueriesContext(connection) as queries:
+            self._render(model_admin, user, rows)
+        return len(queries)
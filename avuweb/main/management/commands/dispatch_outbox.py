@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+
+from avuweb.main import outbox
+from avuweb.main.models import OutboundEmail
+
+
+class Command(BaseCommand):
+    help = 'Send pending outbox emails in this process (local testing with smtp_sink, or draining by hand)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Emails per batch (default: OUTBOX_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        result = outbox.dispatch_outbox(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f"✓ {result['sent']} enviados, {result['retried']} a reintentar, {result['failed']} fallidos")
+        )
+        counts = OutboundEmail.objects.order_by().values('status').annotate(count=Count('id'))
+        for row in counts:
+            self.stdout.write(f"  {row['status']}: {row['count']}")
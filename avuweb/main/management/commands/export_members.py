@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from avuweb.main.exports import EXPORT_FORMATS, MEMBER_EXPORT_HEADER, member_export_rows
+from avuweb.main.models import Subscription, UserProfile
+
+
+class Command(BaseCommand):
+    help = 'Export members (profile, user and subscription) as CSV or JSONL, streaming rows from the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv', help='Output format')
+        parser.add_argument('--output', help='Output file (default: stdout)')
+        parser.add_argument('--user-type', choices=[value for value, _ in UserProfile.USER_TYPE_CHOICES])
+        active = parser.add_mutually_exclusive_group()
+        active.add_argument('--active', dest='is_active', action='store_true', default=None,
+                            help='Only members with access')
+        active.add_argument('--inactive', dest='is_active', action='store_false', help='Only members without access')
+        parser.add_argument('--subscription-status',
+                            choices=[value for value, _ in Subscription.STATUS_CHOICES] + ['none'],
+                            help="Subscription status ('none': never subscribed)")
+
+    def handle(self, *args, **options):
+        rows = member_export_rows(
+            user_type=options['user_type'],
+            is_active=options['is_active'],
+            subscription_status=options['subscription_status'],
+        )
+        lines, _ = EXPORT_FORMATS[options['format']]
+        output = open(options['output'], 'w', encoding='utf-8', newline='') if options['output'] else None
+        count = -1 if options['format'] == 'csv' else 0
+        try:
+            for line in lines(MEMBER_EXPORT_HEADER, rows):
+                if output is None:
+                    self.stdout.write(line, ending='')
+                else:
+                    output.write(line)
+                count += 1
+        finally:
+            if output is not None:
+                output.close()
+        self.stderr.write(self.style.SUCCESS(f'✓ {count} socios exportados'))
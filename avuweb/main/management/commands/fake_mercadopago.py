@@ -0,0 +1,364 @@
+import hashlib
+import json
+import random
+import re
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from django.utils import timezone
+
+from avuweb.main.models import Subscription, SubscriptionEvent, UserProfile
+from avuweb.main.tasks import sync_subscriptions_reconciliation
+
+
+SUBSCRIPTION_PATH_RE = re.compile(r'^/v1/subscriptions/(?P<id>[^/?]+)(?P<payments>/payments)?/?(\?.*)?$')
+PREFERENCE_PATH_RE = re.compile(r'^/checkout/preferences/?(\?.*)?$')
+
+# Estados que se van sorteando al emitir webhooks (lo que entienden los tasks)
+SUBSCRIPTION_WEBHOOK_STATUSES = ['authorized', 'paused', 'cancelled', 'pending']
+PAYMENT_WEBHOOK_STATUSES = ['approved', 'approved', 'approved', 'rejected', 'authorized']
+
+LOADTEST_EMAIL_DOMAIN = 'loadtest.invalid'
+
+
+class FakeMercadoPago:
+    """Estado del servidor falso: suscripciones en memoria, fallas inyectadas y contadores."""
+
+    def __init__(self, latency: float, jitter: float, error_rate: float, throttle_rate: float, retry_after: int):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.subscriptions = {}
+        self.lock = threading.Lock()
+        self.counters = {}
+
+    def count(self, name: str):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def injected_failure(self):
+        """(status, body, headers) de la falla a devolver, o None."""
+        roll = random.random()
+        if roll < self.throttle_rate:
+            self.count('429')
+            return 429, {'message': 'too many requests'}, {'Retry-After': str(self.retry_after)}
+        if roll < self.throttle_rate + self.error_rate:
+            self.count('5xx')
+            return 500, {'message': 'internal_error'}, {}
+        return None
+
+    def subscription(self, subscription_id: str) -> dict:
+        with self.lock:
+            if subscription_id not in self.subscriptions:
+                self.subscriptions[subscription_id] = {
+                    'id': subscription_id,
+                    'status': 'authorized',
+                    'date_created': timezone.now().isoformat(),
+                    'auto_recurring': {'frequency': 1, 'frequency_type': 'months', 'currency_id': 'UYU'},
+                }
+            return dict(self.subscriptions[subscription_id])
+
+    def set_status(self, subscription_id: str, status: str) -> dict:
+        self.subscription(subscription_id)
+        with self.lock:
+            self.subscriptions[subscription_id]['status'] = status
+            return dict(self.subscriptions[subscription_id])
+
+
+def _handler_class(fake: FakeMercadoPago):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        # Sin Nagle: si no, el delayed ACK agrega ~40ms por respuesta
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body, headers=None):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _read_json(self) -> dict:
+            length = int(self.headers.get('Content-Length') or 0)
+            raw = self.rfile.read(length) if length else b''
+            try:
+                return json.loads(raw or b'{}')
+            except json.JSONDecodeError:
+                return {}
+
+        def _handle(self, method: str):
+            payload = self._read_json() if method in ('POST', 'PUT') else {}
+            delay = fake.latency + random.uniform(0, fake.jitter)
+            if delay:
+                time.sleep(delay)
+            fake.count(f'{method} requests')
+
+            failure = fake.injected_failure()
+            if failure:
+                return self._send(*failure)
+
+            sub_match = SUBSCRIPTION_PATH_RE.match(self.path)
+            if method == 'POST' and PREFERENCE_PATH_RE.match(self.path):
+                preference_id = f'pref-{uuid.uuid4().hex[:12]}'
+                return self._send(201, {
+                    'id': preference_id,
+                    'init_point': f'http://{self.headers.get("Host")}/checkout/{preference_id}',
+                    **payload,
+                })
+            if sub_match and sub_match.group('payments') and method == 'GET':
+                subscription_id = sub_match.group('id')
+                return self._send(200, [
+                    {'id': f'{subscription_id}-pay-{n}', 'status': 'approved', 'transaction_amount': 500.0}
+                    for n in range(3)
+                ])
+            if sub_match and method == 'GET':
+                return self._send(200, fake.subscription(sub_match.group('id')))
+            if sub_match and method == 'PUT':
+                return self._send(200, fake.set_status(sub_match.group('id'), payload.get('status', 'authorized')))
+            fake.count('404')
+            return self._send(404, {'message': 'resource not found'})
+
+        def do_GET(self):
+            self._handle('GET')
+
+        def do_PUT(self):
+            self._handle('PUT')
+
+        def do_POST(self):
+            self._handle('POST')
+
+    return Handler
+
+
+class WebhookEmitter:
+    """Envía webhooks firmados como los de MP a un ritmo fijo y mide latencias."""
+
+    def __init__(self, fake: FakeMercadoPago, url: str, subscription_ids: list, rate: float, concurrency: int):
+        self.fake = fake
+        self.url = url
+        self.subscription_ids = subscription_ids
+        self.rate = rate
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.executor = ThreadPoolExecutor(max_workers=concurrency)
+        self.lock = threading.Lock()
+        self.latencies = []
+        self.statuses = {}
+
+    def _payload(self) -> dict:
+        subscription_id = random.choice(self.subscription_ids)
+        if random.random() < 0.5:
+            status = random.choice(SUBSCRIPTION_WEBHOOK_STATUSES)
+            self.fake.set_status(subscription_id, status)
+            event_type = 'subscription_preapproval'
+        else:
+            status = random.choice(PAYMENT_WEBHOOK_STATUSES)
+            event_type = 'payment'
+        return {
+            'id': f'fake-{uuid.uuid4().hex}',
+            'type': event_type,
+            'action': f'{event_type}.updated',
+            'status': status,
+            'data': {'id': subscription_id},
+        }
+
+    def _send(self):
+        body = json.dumps(self._payload())
+        request_id = uuid.uuid4().hex
+        timestamp = str(int(time.time()))
+        # Mismo esquema que valida _validate_webhook_signature
+        signature = hashlib.sha256(f'{request_id}.{timestamp}.{body}'.encode()).hexdigest()
+        headers = {
+            'Content-Type': 'application/json',
+            'X-Request-Id': request_id,
+            'X-Signature': f'ts={timestamp},v1={signature}',
+        }
+        started = time.perf_counter()
+        try:
+            status = self.session.post(self.url, data=body, headers=headers, timeout=10).status_code
+        except requests.exceptions.RequestException as e:
+            status = type(e).__name__
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            self.latencies.append(elapsed)
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+
+    def run(self, count: int, stop: threading.Event):
+        """Encola count webhooks (0 = hasta stop) espaciados según el ritmo."""
+        interval = 1 / self.rate
+        next_at = time.monotonic()
+        sent = 0
+        while not stop.is_set() and (not count or sent < count):
+            self.executor.submit(self._send)
+            sent += 1
+            next_at += interval
+            stop.wait(max(0.0, next_at - time.monotonic()))
+        self.executor.shutdown(wait=True)
+
+    def summary(self) -> dict:
+        with self.lock:
+            latencies = sorted(self.latencies)
+            statuses = dict(self.statuses)
+        if not latencies:
+            return {'sent': 0, 'statuses': statuses}
+        return {
+            'sent': len(latencies),
+            'statuses': statuses,
+            'p50_ms': latencies[len(latencies) // 2] * 1000,
+            'p95_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+            'max_ms': latencies[-1] * 1000,
+        }
+
+
+class Command(BaseCommand):
+    help = (
+        'Run a local Mercado Pago stand-in (subscriptions, payments, preferences) with latency '
+        'and failure injection, optionally emitting signed webhooks. Point the app at it with '
+        'MERCADO_PAGO_API_BASE_URL=http://HOST:PORT.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--latency-ms', type=float, default=50, help='Base latency per request')
+        parser.add_argument('--jitter-ms', type=float, default=0, help='Random extra latency (uniform 0..N)')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests answered with 500')
+        parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of requests answered with 429')
+        parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 429s')
+        parser.add_argument('--webhook-rate', type=float, default=0, help='Webhooks per second (0 = none)')
+        parser.add_argument('--webhook-count', type=int, default=0, help='Stop after N webhooks (0 = until Ctrl-C)')
+        parser.add_argument('--webhook-concurrency', type=int, default=20)
+        parser.add_argument('--webhook-url', default=settings.MERCADO_PAGO_WEBHOOK_URL)
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Create N load-test users with subscriptions before starting')
+        parser.add_argument('--reconcile', action='store_true',
+                            help='Queue sync_subscriptions_reconciliation once the server is up '
+                                 '(its duration is logged by summarize_reconciliation)')
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            created = self._seed(options['seed'])
+            self.stdout.write(self.style.SUCCESS(f'✓ {created} suscripciones de prueba creadas'))
+
+        fake = FakeMercadoPago(
+            latency=options['latency_ms'] / 1000,
+            jitter=options['jitter_ms'] / 1000,
+            error_rate=options['error_rate'],
+            throttle_rate=options['throttle_rate'],
+            retry_after=options['retry_after'],
+        )
+        server = ThreadingHTTPServer((options['host'], options['port']), _handler_class(fake))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address[:2]
+        self.stdout.write(self.style.SUCCESS(f'✓ Mercado Pago falso escuchando en http://{host}:{port}'))
+
+        if options['reconcile']:
+            sync_subscriptions_reconciliation.delay()
+            self.stdout.write('Reconciliación encolada')
+
+        started_at = timezone.now()
+        stop = threading.Event()
+        emitter = None
+        try:
+            if options['webhook_rate']:
+                subscription_ids = list(
+                    Subscription.objects.values_list('mercado_pago_subscription_id', flat=True)
+                )
+                if not subscription_ids:
+                    self.stdout.write(self.style.WARNING('No hay suscripciones: usar --seed para crear algunas'))
+                    return
+                emitter = WebhookEmitter(
+                    fake, options['webhook_url'], subscription_ids,
+                    options['webhook_rate'], options['webhook_concurrency'],
+                )
+                self.stdout.write(f"Enviando webhooks a {options['webhook_url']} ({options['webhook_rate']}/s)")
+                emit_started = time.perf_counter()
+                emitter.run(options['webhook_count'], stop)
+                elapsed = time.perf_counter() - emit_started
+                summary = emitter.summary()
+                self.stdout.write(self.style.SUCCESS('\n=== Webhooks ==='))
+                self.stdout.write(f"Enviados: {summary['sent']} en {elapsed:.1f}s "
+                                  f"({summary['sent'] / elapsed if elapsed else 0:.1f}/s)")
+                self.stdout.write(f"Respuestas: {summary['statuses']}")
+                if summary['sent']:
+                    self.stdout.write(f"Latencia: p50={summary['p50_ms']:.0f}ms p95={summary['p95_ms']:.0f}ms "
+                                      f"max={summary['max_ms']:.0f}ms")
+                if options['webhook_count']:
+                    return
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            stop.set()
+        finally:
+            server.shutdown()
+            self.stdout.write(self.style.SUCCESS('\n=== Servidor ==='))
+            self.stdout.write(f'Requests: {fake.counters}')
+            if emitter is not None:
+                self._report_task_lag(started_at)
+
+    def _seed(self, count: int) -> int:
+        """Crea usuarios socio con suscripción activa para usar como destino de webhooks."""
+        offset = User.objects.filter(email__endswith=f'@{LOADTEST_EMAIL_DOMAIN}').count()
+        password = make_password(None)
+        users = User.objects.bulk_create([
+            User(username=f'loadtest-{n}@{LOADTEST_EMAIL_DOMAIN}', email=f'loadtest-{n}@{LOADTEST_EMAIL_DOMAIN}',
+                 password=password)
+            for n in range(offset, offset + count)
+        ])
+        # bulk_create no devuelve PKs en todos los backends: releer por email
+        users = User.objects.filter(email__in=[user.email for user in users])
+        UserProfile.objects.bulk_create([
+            UserProfile(user=user, user_type='socio', full_name=f'Load Test {user.pk}',
+                        is_subscription_active=True, subscription_status='active')
+            for user in users
+        ])
+        subscriptions = Subscription.objects.bulk_create([
+            Subscription(user=user, mercado_pago_subscription_id=f'fake-sub-{user.pk}', status='active',
+                         amount=500)
+            for user in users
+        ])
+        # Vencidas para la reconciliación (update() no pasa por auto_now)
+        Subscription.objects.filter(user__in=users).update(
+            last_synced_at=timezone.now() - timedelta(days=1)
+        )
+        return len(subscriptions)
+
+    def _report_task_lag(self, since):
+        """Demora entre que el webhook guardó el evento y el task lo procesó."""
+        lags = sorted(
+            lag.total_seconds() for lag in SubscriptionEvent.objects.filter(
+                created_at__gte=since, processed=True, processed_at__isnull=False,
+            ).annotate(lag=F('processed_at') - F('created_at')).values_list('lag', flat=True)
+        )
+        pending = SubscriptionEvent.objects.filter(created_at__gte=since, processed=False).count()
+        self.stdout.write(self.style.SUCCESS('\n=== Tasks ==='))
+        if not lags:
+            self.stdout.write(f'Sin eventos procesados todavía (pendientes: {pending})')
+            return
+        self.stdout.write(
+            f'Procesados: {len(lags)} pendientes: {pending} lag: media={statistics.mean(lags):.2f}s '
+            f'p95={lags[min(len(lags) - 1, int(len(lags) * 0.95))]:.2f}s max={lags[-1]:.2f}s'
+        )
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from avuweb.main.mp_cache import mp_cache_stats, reset_mp_cache_stats
+from avuweb.main.ratelimit import rate_limit_stats, reset_rate_limit_stats
+
+
+class Command(BaseCommand):
+    help = 'Show hit/miss counters of the Mercado Pago read cache and rate limiter waits'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Reset the counters after printing them')
+
+    def handle(self, *args, **options):
+        for endpoint, stats in mp_cache_stats().items():
+            total = sum(stats.values())
+            served = stats['hit'] + stats['coalesced']
+            ratio = f'{served / total:.1%}' if total else '-'
+            self.stdout.write(
+                f"{endpoint}: hit={stats['hit']} coalesced={stats['coalesced']} "
+                f"miss={stats['miss']} hit_ratio={ratio}"
+            )
+        for family, stats in rate_limit_stats().items():
+            average = f"{stats['wait_ms'] / stats['waited_calls']:.0f}ms" if stats['waited_calls'] else '-'
+            self.stdout.write(
+                f"rate limit {family}: calls={stats['calls']} waited={stats['waited_calls']} "
+                f"wait_total={stats['wait_ms'] / 1000:.1f}s avg_wait={average}"
+            )
+        if options['reset']:
+            reset_mp_cache_stats()
+            reset_rate_limit_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset'))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from avuweb.main.profile_status import recompute_profile_status
+
+
+class Command(BaseCommand):
+    help = 'Recompute profile subscription status from subscriptions, coupons and user type (set-based)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user-ids', type=int, nargs='+', help='Only recompute these users')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without updating')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        report = recompute_profile_status(user_ids=options['user_ids'], dry_run=options['dry_run'])
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS('\n=== Drift ==='))
+        for status, count in report['drift'].items():
+            self.stdout.write(f'{status}: {count}')
+        self.stdout.write(f"Activados: {report['activated']}  Desactivados: {report['deactivated']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"\n✓ {report['checked']} perfiles revisados en {elapsed:.2f}s"
+            + (' (dry run, sin cambios)' if options['dry_run'] else '')
+        ))
@@ -0,0 +1,51 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from avuweb.main import campaigns
+from avuweb.main.models import Campaign
+from avuweb.main.tasks import dispatch_campaign, start_campaign
+
+
+class Command(BaseCommand):
+    help = 'Queue a draft campaign and dispatch it to Celery, or send it in this process with --sync'
+
+    def add_arguments(self, parser):
+        parser.add_argument('campaign_id', type=int)
+        parser.add_argument('--sync', action='store_true',
+                            help='Send the chunks here instead of through Celery (local testing)')
+
+    def handle(self, *args, **options):
+        try:
+            campaign = Campaign.objects.get(pk=options['campaign_id'])
+        except Campaign.DoesNotExist:
+            raise CommandError(f"No existe la campaña {options['campaign_id']}")
+
+        if not options['sync']:
+            if campaign.status == 'draft':
+                total = start_campaign(campaign)
+                self.stdout.write(self.style.SUCCESS(f'✓ {total} destinatarios en cola'))
+            else:
+                dispatch_campaign.delay(campaign.pk)
+                self.stdout.write(self.style.SUCCESS(f'✓ Campaña {campaign.status}: pendientes redespachados'))
+            return
+
+        if campaign.status == 'draft':
+            campaigns.queue_campaign(campaign)
+        Campaign.objects.filter(pk=campaign.pk, status='queued').update(status='sending')
+        campaigns.release_stale_claims(campaign.pk)
+
+        started = time.perf_counter()
+        totals = {'sent': 0, 'failed': 0}
+        chunks = campaigns.plan_chunks(campaign.pk)
+        for index, (first_id, last_id) in enumerate(chunks, start=1):
+            result = campaigns.send_chunk(campaign.pk, first_id, last_id)
+            totals['sent'] += result['sent']
+            totals['failed'] += result['failed']
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"Chunk {index}/{len(chunks)}: {totals['sent']} enviados, {totals['failed']} fallidos "
+                f"({totals['sent'] / elapsed:.1f}/s)"
+            )
+        campaigns.finish_campaign_if_done(campaign.pk)
+        self.stdout.write(self.style.SUCCESS(f"\n✓ {campaigns.campaign_progress(campaign.pk)}"))
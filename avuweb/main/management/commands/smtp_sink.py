@@ -0,0 +1,103 @@
+import socketserver
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    """SMTP mínimo: acepta todo y descarta los mensajes (solo los cuenta)."""
+
+    def reply(self, line: str):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        sink = self.server.sink
+        self.reply('220 smtp-sink ESMTP')
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip().upper()
+            if command.startswith(('EHLO', 'HELO')):
+                self.reply('250 smtp-sink')
+            elif command.startswith(('MAIL FROM', 'RCPT TO', 'RSET', 'NOOP')):
+                self.reply('250 OK')
+            elif command == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                size = 0
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data in (b'.\r\n', b'.\n'):
+                        break
+                    size += len(data)
+                sink.record(size)
+                self.reply('250 OK queued')
+            elif command == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class SMTPSink:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.messages = 0
+        self.bytes = 0
+        self.connections = 0
+
+    def record(self, size: int):
+        with self.lock:
+            self.messages += 1
+            self.bytes += size
+
+
+class SinkServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, sink):
+        self.sink = sink
+        super().__init__(address, SMTPSinkHandler)
+
+    def verify_request(self, request, client_address):
+        with self.sink.lock:
+            self.sink.connections += 1
+        return True
+
+
+class Command(BaseCommand):
+    help = 'Run a local SMTP server that accepts and discards every message, reporting throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=1025)
+        parser.add_argument('--report-every', type=float, default=5, help='Seconds between throughput reports')
+
+    def handle(self, *args, **options):
+        sink = SMTPSink()
+        server = SinkServer((options['host'], options['port']), sink)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.stdout.write(self.style.SUCCESS(
+            f"SMTP sink en {options['host']}:{options['port']} "
+            f"(EMAIL_HOST={options['host']} EMAIL_PORT={options['port']})"
+        ))
+
+        last_count, last_time = 0, time.monotonic()
+        try:
+            while True:
+                time.sleep(options['report_every'])
+                now = time.monotonic()
+                count = sink.messages
+                if count != last_count:
+                    self.stdout.write(
+                        f'{count} mensajes ({(count - last_count) / (now - last_time):.1f}/s), '
+                        f'{sink.connections} conexiones'
+                    )
+                last_count, last_time = count, now
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.shutdown()
+            self.stdout.write(f'Total: {sink.messages} mensajes, {sink.bytes} bytes, {sink.connections} conexiones')
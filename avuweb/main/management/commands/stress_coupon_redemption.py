@@ -0,0 +1,99 @@
+import queue
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, DatabaseError
+from django.utils import timezone
+
+from avuweb.main.models import CouponCode, UserProfile
+
+
+STRESS_EMAIL_DOMAIN = 'stress.invalid'
+
+
+class Command(BaseCommand):
+    help = 'Race concurrent redemptions of the same coupons and check there is exactly one winner per code'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--coupons', type=int, default=200, help='Coupons to race for')
+        parser.add_argument('--contenders', type=int, default=8, help='Users trying to redeem each coupon')
+        parser.add_argument('--threads', type=int, default=16, help='Worker threads')
+        parser.add_argument('--keep', action='store_true', help='Do not delete the generated coupons and users')
+
+    def handle(self, *args, **options):
+        coupons, contenders = options['coupons'], options['contenders']
+
+        batch_id = CouponCode.generate_batch(coupons, expires_at=timezone.now() + timedelta(days=1))
+        codes = list(CouponCode.objects.filter(batch_id=batch_id).values_list('code', flat=True))
+        users = User.objects.bulk_create([
+            User(username=f'stress-{batch_id}-{i}', email=f'stress-{batch_id}-{i}@{STRESS_EMAIL_DOMAIN}')
+            for i in range(contenders)
+        ])
+        UserProfile.objects.bulk_create([UserProfile(user=user, user_type='socio') for user in users])
+
+        # Los intentos sobre un mismo cupón quedan seguidos en la cola para que los threads choquen
+        attempts = queue.Queue()
+        for code in codes:
+            for user in users:
+                attempts.put((code, user))
+
+        winners = Counter()
+        outcomes = Counter()
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                while True:
+                    try:
+                        code, user = attempts.get_nowait()
+                    except queue.Empty:
+                        return
+                    try:
+                        CouponCode.validate_and_use(code, user)
+                        outcome = 'redeemed'
+                    except ValueError:
+                        outcome = 'rejected'
+                    except DatabaseError:
+                        outcome = 'db_error'
+                    with lock:
+                        outcomes[outcome] += 1
+                        if outcome == 'redeemed':
+                            winners[code] += 1
+            finally:
+                connection.close()
+
+        self.stdout.write(
+            f'Canjeando {coupons} cupones x {contenders} usuarios con {options["threads"]} threads...'
+        )
+        started = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        duplicated = [code for code, count in winners.items() if count > 1]
+        stored = CouponCode.objects.filter(batch_id=batch_id, is_used=True).count()
+        active = UserProfile.objects.filter(user__in=users, is_subscription_active=True).count()
+        total = sum(outcomes.values())
+
+        self.stdout.write(self.style.SUCCESS('\n=== Resultado ==='))
+        self.stdout.write(f'Intentos: {total} en {elapsed:.2f}s ({total / elapsed:.0f}/s)')
+        self.stdout.write(f"Canjes: {outcomes['redeemed']} ({outcomes['redeemed'] / elapsed:.0f}/s)")
+        self.stdout.write(f"Rechazados: {outcomes['rejected']}  Errores de base: {outcomes['db_error']}")
+        self.stdout.write(f'Cupones usados en la base: {stored}  Perfiles habilitados: {active}')
+
+        if not options['keep']:
+            CouponCode.objects.filter(batch_id=batch_id).delete()
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+        if duplicated:
+            raise CommandError(f'{len(duplicated)} cupones se canjearon más de una vez: {duplicated[:5]}')
+        if outcomes['redeemed'] != stored:
+            raise CommandError(f"Canjes reportados ({outcomes['redeemed']}) != cupones usados ({stored})")
+        self.stdout.write(self.style.SUCCESS('✓ Un solo ganador por cupón'))
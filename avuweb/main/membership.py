@@ -0,0 +1,270 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from avuweb.main.bloom import BloomFilter
+from avuweb.main.models import MembershipTokenRevocation, MemberStatusChange, MemberStatusSequence, UserProfile
+from avuweb.main.models.user_profile import normalize_identity_number
+
+
+VALIDATOR_PERMISSION = 'main.validate_members'
+
+MEMBERSHIP_TOKEN_SALT = 'avuweb.membership'
+REVOCATION_LIST_KEY = 'membership:revocations'
+
+
+def _member_status_key(identity_number_normalized: str) -> str:
+    return f'membership:status:{identity_number_normalized}'
+
+
+def _validator_key(user_id: int) -> str:
+    return f'membership:validator:{user_id}'
+
+
+def get_member_status(identity_number: str):
+    """Estado de un socio por cédula para validar-beneficios, o None si no existe.
+
+    Devuelve {'is_active': ..., 'user_type': ...} leyendo solo el índice de
+    UserProfile (sin join a Subscription). Se cachea también la ausencia;
+    las señales y los tasks invalidan la entrada cuando cambia el perfil.
+    """
+    normalized = normalize_identity_number(identity_number)
+    if not normalized:
+        return None
+    key = _member_status_key(normalized)
+    status = cache.get(key)
+    if status is None:
+        row = (
+            UserProfile.objects.filter(identity_number_normalized=normalized)
+            .order_by('-is_subscription_active')
+            .values('is_subscription_active', 'user_type')
+            .first()
+        )
+        status = {'is_active': row['is_subscription_active'], 'user_type': row['user_type']} if row else False
+        cache.set(key, status, timeout=getattr(settings, 'MEMBER_VALIDATION_CACHE_TIMEOUT', 300))
+    return status or None
+
+
+def invalidate_member_status(*identity_numbers_normalized):
+    """Borra el estado cacheado de estas cédulas (normalizadas) tras el commit."""
+    keys = [_member_status_key(identity) for identity in set(identity_numbers_normalized) if identity]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def is_member_validator(user) -> bool:
+    """True si el usuario tiene el rol validar-beneficios.
+
+    Se cachea unos minutos para no consultar permisos y grupos en cada request.
+    """
+    if not user.is_authenticated:
+        return False
+    key = _validator_key(user.pk)
+    allowed = cache.get(key)
+    if allowed is None:
+        allowed = user.has_perm(VALIDATOR_PERMISSION)
+        cache.set(key, allowed, timeout=getattr(settings, 'MEMBER_VALIDATOR_CACHE_TIMEOUT', 300))
+    return allowed
+
+
+def check_validation_throttle(user_id: int):
+    """Ventana fija por validador; devuelve None o los segundos hasta poder reintentar."""
+    limit = getattr(settings, 'MEMBER_VALIDATION_RATE_LIMIT', 120)
+    window = getattr(settings, 'MEMBER_VALIDATION_RATE_WINDOW', 60)
+    now = int(time.time())
+    window_start = now - now % window
+    key = f'membership:throttle:{user_id}:{window_start}'
+    if cache.add(key, 1, timeout=window):
+        return None
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # La ventana expiró entre add e incr
+        cache.add(key, 1, timeout=window)
+        return None
+    if count > limit:
+        return window_start + window - now
+    return None
+
+
+def _token_key() -> str:
+    return getattr(settings, 'MEMBERSHIP_TOKEN_KEY', '')
+
+
+def membership_token_expiry(next_payment_date=None):
+    """Vencimiento del token: próximo cobro más unos días de gracia.
+
+    Sin fecha de cobro (cupón, empresa) vale MEMBERSHIP_TOKEN_DEFAULT_DAYS.
+    """
+    if next_payment_date is None:
+        return timezone.now() + timedelta(days=getattr(settings, 'MEMBERSHIP_TOKEN_DEFAULT_DAYS', 30))
+    return next_payment_date + timedelta(days=getattr(settings, 'MEMBERSHIP_TOKEN_GRACE_DAYS', 3))
+
+
+def issue_membership_token(profile: UserProfile, expires_at) -> bool:
+    """Firma un token de membresía para el perfil (sin guardar).
+
+    El token es signing.dumps de {'u': user_id, 't': tipo, 'i': emitido,
+    'x': vence} (epoch en segundos) firmado con MEMBERSHIP_TOKEN_KEY; los
+    establecimientos lo verifican con esa clave y la lista de revocaciones,
+    sin consultar la base. Devuelve False si no hay clave configurada.
+    """
+    key = _token_key()
+    if not key:
+        return False
+    now = int(time.time())
+    payload = {
+        'u': profile.user_id,
+        't': profile.user_type[0],
+        'i': now,
+        'x': int(expires_at.timestamp()),
+    }
+    profile.membership_token = signing.dumps(payload, key=key, salt=MEMBERSHIP_TOKEN_SALT, compress=True)
+    profile.membership_token_expires_at = expires_at
+    return True
+
+
+def needs_membership_token(profile: UserProfile) -> bool:
+    """True si el perfil está activo y no tiene un token vigente."""
+    if not profile.can_view_content():
+        return False
+    return not (profile.membership_token and profile.membership_token_expires_at > timezone.now())
+
+
+def ensure_membership_token(profile: UserProfile, next_payment_date=None):
+    """Emite y guarda un token si el perfil lo necesita."""
+    if needs_membership_token(profile) and issue_membership_token(
+        profile, membership_token_expiry(next_payment_date)
+    ):
+        profile.save(update_fields=UserProfile.TOKEN_FIELDS)
+
+
+def revoke_membership_tokens(profiles, reason: str = ''):
+    """Revoca (sin guardar los perfiles) los tokens vigentes de estos perfiles."""
+    now = timezone.now()
+    revocations = []
+    for profile in profiles:
+        if profile.membership_token and profile.membership_token_expires_at > now:
+            revocations.append(MembershipTokenRevocation(
+                user_id=profile.user_id, revoked_at=now,
+                expires_at=profile.membership_token_expires_at, reason=reason,
+            ))
+        profile.membership_token = ''
+        profile.membership_token_expires_at = None
+    if revocations:
+        MembershipTokenRevocation.objects.bulk_create(revocations)
+        transaction.on_commit(lambda: cache.delete(REVOCATION_LIST_KEY))
+
+
+def get_revocation_list() -> dict:
+    """{user_id: revocado_hasta} de los tokens revocados que todavía no vencieron.
+
+    Es lo que descargan los establecimientos para verificar offline: un token
+    está revocado si su 'i' es menor o igual al valor de su usuario.
+    """
+    revocations = cache.get(REVOCATION_LIST_KEY)
+    if revocations is None:
+        revocations = {}
+        rows = MembershipTokenRevocation.objects.filter(expires_at__gt=timezone.now()).values_list(
+            'user_id', 'revoked_at'
+        )
+        for user_id, revoked_at in rows:
+            revocations[user_id] = max(revocations.get(user_id, 0), int(revoked_at.timestamp()))
+        cache.set(REVOCATION_LIST_KEY, revocations, timeout=getattr(settings, 'MEMBERSHIP_REVOCATION_CACHE_TIMEOUT', 300))
+    return revocations
+
+
+def verify_membership_token(token: str, revocations: dict = None):
+    """Payload del token si la firma es válida, no venció y no fue revocado; si no, None."""
+    key = _token_key()
+    if not key or not token:
+        return None
+    try:
+        payload = signing.loads(token, key=key, salt=MEMBERSHIP_TOKEN_SALT)
+    except signing.BadSignature:
+        return None
+    if payload.get('x', 0) <= time.time():
+        return None
+    if revocations is None:
+        revocations = get_revocation_list()
+    if payload['i'] <= revocations.get(payload['u'], -1):
+        return None
+    return payload
+
+
+def assign_status_change_sequences() -> int:
+    """Numera, a continuación de la última secuencia, los cambios commiteados que no tienen.
+
+    Los IDs se asignan al insertar pero se ven al commitear, así que una
+    transacción larga podría aparecer detrás de un cursor ya avanzado. La
+    secuencia solo se da a filas ya visibles y siempre por encima de la
+    última: lo que commitea tarde recibe un número nuevo y ningún cursor lo
+    saltea. El lock sobre el contador (MemberStatusSequence) serializa a los
+    que numeran; las filas pendientes se leen recién con el lock tomado.
+    """
+    if not MemberStatusChange.objects.filter(sequence__isnull=True).exists():
+        return 0
+    with transaction.atomic():
+        counter = _locked_sequence_counter()
+        pending = list(MemberStatusChange.objects.filter(sequence__isnull=True).order_by('id').only('id'))
+        for offset, change in enumerate(pending, start=1):
+            change.sequence = counter.last + offset
+        MemberStatusChange.objects.bulk_update(pending, ['sequence'], batch_size=500)
+        counter.last += len(pending)
+        counter.save(update_fields=['last'])
+    return len(pending)
+
+
+def _locked_sequence_counter() -> MemberStatusSequence:
+    try:
+        return MemberStatusSequence.objects.select_for_update().get(pk=1)
+    except MemberStatusSequence.DoesNotExist:
+        # La migración crea la fila; esto cubre una tabla vaciada (flush)
+        last = MemberStatusChange.objects.aggregate(last=Max('sequence'))['last'] or 0
+        MemberStatusSequence.objects.get_or_create(pk=1, defaults={'last': last})
+        return MemberStatusSequence.objects.select_for_update().get(pk=1)
+
+
+def get_status_changes(since: int, limit: int):
+    """Cambios de estado con secuencia > since, en orden: ([(seq, cédula, activo)], hay_más)."""
+    assign_status_change_sequences()
+    rows = list(
+        MemberStatusChange.objects.filter(sequence__gt=since).order_by('sequence')
+        .values_list('sequence', 'identity_number_normalized', 'is_active')[:limit + 1]
+    )
+    return rows[:limit], len(rows) > limit
+
+
+def latest_status_change_sequence() -> int:
+    assign_status_change_sequences()
+    return MemberStatusChange.objects.aggregate(last=Max('sequence'))['last'] or 0
+
+
+def get_active_members_bloom(sequence: int, false_positive_rate: float):
+    """Bloom filter de las cédulas activas, cacheado por número de secuencia.
+
+    El filtro refleja al menos todos los cambios hasta sequence: quien lo
+    descarga sigue con /cambios/?since=sequence (aplicar un cambio dos veces
+    no tiene efecto).
+    """
+    key = f'membership:bloom:{sequence}:{false_positive_rate}'
+    snapshot = cache.get(key)
+    if snapshot is None:
+        identities = list(
+            UserProfile.objects.filter(is_subscription_active=True)
+            .exclude(identity_number_normalized='')
+            .values_list('identity_number_normalized', flat=True)
+        )
+        bloom = BloomFilter.for_capacity(len(identities), false_positive_rate)
+        for identity in identities:
+            bloom.add(identity)
+        snapshot = (bloom.num_bits, bloom.num_hashes, len(identities), bytes(bloom.bits))
+        cache.set(key, snapshot, timeout=getattr(settings, 'MEMBER_BLOOM_CACHE_TIMEOUT', 60 * 60))
+    num_bits, num_hashes, count, bits = snapshot
+    return BloomFilter(num_bits, num_hashes, bits), count
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-17 03:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0005_staticpage_rendered_content'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='subscription',
+            name='preapproval_id',
+            field=models.CharField(blank=True, db_index=True, help_text='ID de preaprobación en MP', max_length=255, null=True),
+        ),
+    ]
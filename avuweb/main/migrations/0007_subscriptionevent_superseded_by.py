@@ -0,0 +1,19 @@
+# Generated by Django 4.2.27 on 2026-10-17 03:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_subscription_preapproval_id_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscriptionevent',
+            name='superseded_by',
+            field=models.ForeignKey(blank=True, help_text='Evento posterior que absorbió a este al coalescer', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='superseded_events', to='main.subscriptionevent'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.27 on 2026-10-17 03:37
+
+import re
+
+from django.db import migrations, models
+
+
+def normalize_identity_number(value: str) -> str:
+    """Copia congelada de user_profile.normalize_identity_number a la fecha de esta migración."""
+    return re.sub(r'[^0-9A-Za-z]', '', value or '').upper()
+
+
+def normalize_existing_identity_numbers(apps, schema_editor):
+    UserProfile = apps.get_model('main', 'UserProfile')
+    profiles = list(UserProfile.objects.exclude(identity_number='').only('id', 'identity_number'))
+    for profile in profiles:
+        profile.identity_number_normalized = normalize_identity_number(profile.identity_number)
+    UserProfile.objects.bulk_update(profiles, ['identity_number_normalized'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_subscriptionevent_superseded_by'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='userprofile',
+            options={'permissions': [('validate_members', 'Puede validar si un socio está al día (validar-beneficios)')], 'verbose_name': 'User Profile', 'verbose_name_plural': 'User Profiles'},
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='identity_number_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+        migrations.RunPython(normalize_existing_identity_numbers, migrations.RunPython.noop),
+    ]
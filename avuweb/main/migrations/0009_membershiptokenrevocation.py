@@ -0,0 +1,40 @@
+# Generated by Django 4.2.27 on 2026-10-17 03:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('main', '0008_userprofile_identity_number_normalized'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='membership_token',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='membership_token_expires_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='MembershipTokenRevocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('revoked_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('expires_at', models.DateTimeField(db_index=True, help_text='Vencimiento del token revocado; después se puede purgar')),
+                ('reason', models.CharField(blank=True, max_length=50)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='membership_token_revocations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-revoked_at'],
+            },
+        ),
+    ]
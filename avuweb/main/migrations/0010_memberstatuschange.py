@@ -0,0 +1,41 @@
+# Generated by Django 4.2.27 on 2026-10-17 03:52
+
+from django.db import migrations, models
+
+
+def log_current_active_members(apps, schema_editor):
+    # Así since=0 reconstruye el estado completo, no solo los cambios futuros
+    UserProfile = apps.get_model('main', 'UserProfile')
+    MemberStatusChange = apps.get_model('main', 'MemberStatusChange')
+    identities = (
+        UserProfile.objects.filter(is_subscription_active=True)
+        .exclude(identity_number_normalized='')
+        .values_list('identity_number_normalized', flat=True)
+    )
+    MemberStatusChange.objects.bulk_create(
+        [MemberStatusChange(identity_number_normalized=identity, is_active=True) for identity in identities],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0009_membershiptokenrevocation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberStatusChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('identity_number_normalized', models.CharField(max_length=20)),
+                ('is_active', models.BooleanField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.RunPython(log_current_active_members, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-17 04:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0010_memberstatuschange'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='couponcode',
+            name='batch_id',
+            field=models.CharField(blank=True, db_index=True, help_text='Lote de generate_batch al que pertenece (vacío si se creó suelto)', max_length=32),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.27 on 2026-10-17 04:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0011_couponcode_batch_id'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='subscriptionevent',
+            name='processed',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='subscriptionevent',
+            index=models.Index(fields=['created_at', 'id'], name='main_subscr_created_95b1d6_idx'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.27 on 2026-10-17 05:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('main', '0012_subscriptionevent_keyset_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Campaign',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Nombre interno de la campaña', max_length=200)),
+                ('subject', models.CharField(help_text='Asunto; admite marcadores como %nombre%', max_length=255)),
+                ('body', models.TextField(help_text='Texto del mail; admite %nombre%, %nombre_completo%, %email% y %vencimiento%')),
+                ('user_type', models.CharField(blank=True, choices=[('socio', 'Socio'), ('empresa', 'Empresa')], help_text='Vacío: socios y empresas', max_length=10)),
+                ('membership', models.CharField(choices=[('all', 'Todos'), ('active', 'Solo al día'), ('inactive', 'Solo sin acceso')], default='all', max_length=10)),
+                ('subscription_status', models.CharField(blank=True, choices=[('pending', 'Esperando primer pago'), ('active', 'Activa'), ('paused', 'Pausada (fallo de pago)'), ('cancelled', 'Cancelada'), ('failed', 'Fallo permanente')], help_text='Vacío: cualquier estado de suscripción', max_length=20)),
+                ('status', models.CharField(choices=[('draft', 'Borrador'), ('queued', 'En cola'), ('sending', 'Enviando'), ('sent', 'Enviada'), ('cancelled', 'Cancelada')], db_index=True, default='draft', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('queued_at', models.DateTimeField(blank=True, null=True)),
+                ('scheduled_until', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='campaigns_created', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CampaignRecipient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('email', models.EmailField(max_length=254)),
+                ('context', models.JSONField(default=dict)),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('sending', 'Enviando'), ('sent', 'Enviado'), ('failed', 'Falló')], default='pending', max_length=10)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('error_message', models.TextField(blank=True)),
+                ('campaign', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipients', to='main.campaign')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='campaign_deliveries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['campaign', 'status', 'id'], name='main_campai_campaig_f4fdf3_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='campaignrecipient',
+            constraint=models.UniqueConstraint(fields=('campaign', 'user'), name='unique_campaign_recipient'),
+        ),
+    ]
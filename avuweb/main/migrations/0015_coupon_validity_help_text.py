@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-17 06:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0014_outbound_email'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='couponcode',
+            name='months_of_validity',
+            field=models.IntegerField(default=3, help_text='Meses de validez desde el canje'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.27 on 2026-10-17 06:50
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def number_existing_changes(apps, schema_editor):
+    # Los cursores que ya tienen los establecimientos son IDs: la secuencia
+    # de los cambios existentes es su ID y los nuevos siguen después
+    MemberStatusChange = apps.get_model('main', 'MemberStatusChange')
+    MemberStatusChange.objects.update(sequence=F('id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0016_outbound_email_claims'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='memberstatuschange',
+            name='sequence',
+            field=models.BigIntegerField(blank=True, null=True, unique=True),
+        ),
+        migrations.RunPython(number_existing_changes, migrations.RunPython.noop),
+    ]
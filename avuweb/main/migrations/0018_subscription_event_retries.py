@@ -0,0 +1,23 @@
+# Generated by Django 4.2.27 on 2026-10-17 07:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0017_member_status_change_sequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscriptionevent',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Intentos fallidos de procesamiento'),
+        ),
+        migrations.AddField(
+            model_name='subscriptionevent',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, help_text='Próximo reintento si falló (vacío: no se reintenta)', null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.27 on 2026-10-17 07:20
+
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def create_counter(apps, schema_editor):
+    MemberStatusChange = apps.get_model('main', 'MemberStatusChange')
+    MemberStatusSequence = apps.get_model('main', 'MemberStatusSequence')
+    last = MemberStatusChange.objects.aggregate(last=Max('sequence'))['last'] or 0
+    MemberStatusSequence.objects.create(pk=1, last=last)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0018_subscription_event_retries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberStatusSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last', models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_counter, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,10 @@ from .user_profile import UserProfile
 from .static_page import StaticPage
 from .subscription import Subscription, SubscriptionEvent
 from .coupon_code import CouponCode
+from .membership_token import MembershipTokenRevocation
+from .member_status_change import MemberStatusChange, MemberStatusSequence
+from .campaign import Campaign, CampaignRecipient
+from .outbound_email import OutboundEmail
 
 __all__ = [
 	'UserProfile',
@@ -9,4 +13,10 @@ __all__ = [
 	'Subscription',
 	'SubscriptionEvent',
 	'CouponCode',
+	'MembershipTokenRevocation',
+	'MemberStatusChange',
+	'MemberStatusSequence',
+	'Campaign',
+	'CampaignRecipient',
+	'OutboundEmail',
 ]
@@ -0,0 +1,87 @@
+from django.db import models
+from django.contrib.auth.models import User
+
+from .subscription import Subscription
+from .user_profile import UserProfile
+
+
+class Campaign(models.Model):
+    """Comunicado por mail a todos o algunos socios.
+
+    subject y body admiten marcadores como %nombre% (ver
+    avuweb.main.campaigns.PLACEHOLDERS). Al encolarla se congela la lista de
+    destinatarios en CampaignRecipient, que lleva el estado de cada envío.
+    """
+
+    STATUS_CHOICES = [
+        ('draft', 'Borrador'),
+        ('queued', 'En cola'),
+        ('sending', 'Enviando'),
+        ('sent', 'Enviada'),
+        ('cancelled', 'Cancelada'),
+    ]
+
+    ACTIVE_CHOICES = [
+        ('all', 'Todos'),
+        ('active', 'Solo al día'),
+        ('inactive', 'Solo sin acceso'),
+    ]
+
+    name = models.CharField(max_length=200, help_text="Nombre interno de la campaña")
+    subject = models.CharField(max_length=255, help_text="Asunto; admite marcadores como %nombre%")
+    body = models.TextField(help_text="Texto del mail; admite %nombre%, %nombre_completo%, %email% y %vencimiento%")
+
+    # Destinatarios
+    user_type = models.CharField(max_length=10, choices=UserProfile.USER_TYPE_CHOICES, blank=True,
+                                 help_text="Vacío: socios y empresas")
+    membership = models.CharField(max_length=10, choices=ACTIVE_CHOICES, default='all')
+    subscription_status = models.CharField(max_length=20, choices=Subscription.STATUS_CHOICES, blank=True,
+                                           help_text="Vacío: cualquier estado de suscripción")
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft', db_index=True)
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='campaigns_created')
+    created_at = models.DateTimeField(auto_now_add=True)
+    queued_at = models.DateTimeField(null=True, blank=True)
+    # Hasta cuándo hay chunks programados (resume_campaigns no redespacha antes)
+    scheduled_until = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Campaign({self.name}, {self.status})"
+
+
+class CampaignRecipient(models.Model):
+    """Destinatario de una campaña y estado de su envío."""
+
+    STATUS_CHOICES = [
+        ('pending', 'Pendiente'),
+        ('sending', 'Enviando'),
+        ('sent', 'Enviado'),
+        ('failed', 'Falló'),
+    ]
+
+    campaign = models.ForeignKey(Campaign, on_delete=models.CASCADE, related_name='recipients')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='campaign_deliveries')
+    email = models.EmailField()
+    # Valores de los marcadores, tomados al encolar
+    context = models.JSONField(default=dict)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    error_message = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['campaign', 'user'], name='unique_campaign_recipient'),
+        ]
+        indexes = [
+            models.Index(fields=['campaign', 'status', 'id']),
+        ]
+
+    def __str__(self):
+        return f"CampaignRecipient({self.email}, {self.status})"
@@ -1,8 +1,11 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.utils import timezone
 import secrets
 
+from .outbound_email import OutboundEmail
+from .user_profile import UserProfile
+
 
 class CouponCode(models.Model):
     code = models.CharField(max_length=100, unique=True, db_index=True, help_text="Código único del cupón")
@@ -16,7 +19,10 @@ class CouponCode(models.Model):
 
     expires_at = models.DateTimeField(db_index=True, help_text="Fecha de expiración del cupón")
 
-    months_of_validity = models.IntegerField(default=3, help_text="Meses de validez desde la creación (informativo)")
+    months_of_validity = models.IntegerField(default=3, help_text="Meses de validez desde el canje")
+
+    batch_id = models.CharField(max_length=32, blank=True, db_index=True,
+                                help_text="Lote de generate_batch al que pertenece (vacío si se creó suelto)")
 
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -35,30 +41,80 @@ class CouponCode(models.Model):
         """Genera un código aleatorio de 32 caracteres"""
         return secrets.token_hex(16).upper()
 
+    @classmethod
+    def generate_batch(cls, count: int, expires_at, created_by=None, months_of_validity: int = 3) -> str:
+        """Crea count cupones con bulk_create y devuelve el batch_id del lote.
+
+        Un código que ya existe (colisión de token_hex, muy rara) se descarta
+        con ignore_conflicts y se reemplaza por otro en la vuelta siguiente,
+        sin reintentar el lote entero. Todo va en una transacción: si algo
+        falla a mitad de camino no queda un lote incompleto.
+        """
+        batch_id = secrets.token_hex(8)
+        created = 0
+        with transaction.atomic():
+            while created < count:
+                codes = set()
+                while len(codes) < count - created:
+                    codes.add(cls.generate_code())
+                cls.objects.bulk_create(
+                    [
+                        cls(code=code, created_by=created_by, expires_at=expires_at,
+                            months_of_validity=months_of_validity, batch_id=batch_id)
+                        for code in codes
+                    ],
+                    batch_size=1000,
+                    ignore_conflicts=True,
+                )
+                created = cls.objects.filter(batch_id=batch_id).count()
+        return batch_id
+
     def is_valid(self):
         now = timezone.now()
         return (not self.is_used) and (self.expires_at > now)
 
+    @classmethod
+    def _redeem(cls, user, **lookup):
+        """Marca el cupón como usado con un único UPDATE condicional y habilita el perfil.
+
+        El WHERE (is_used=False, expires_at>ahora) hace que de dos canjes
+        simultáneos solo uno afecte la fila, sin SELECT previo ni locks. Si
+        nadie la afectó, lanza ValueError con el motivo. Devuelve used_at.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            redeemed = cls.objects.filter(is_used=False, expires_at__gt=now, **lookup).update(
+                user=user, is_used=True, used_at=now
+            )
+            if not redeemed:
+                # Solo el camino de error lee el cupón, para explicar por qué falló
+                is_used = cls.objects.filter(**lookup).values_list('is_used', flat=True).first()
+                if is_used is None:
+                    raise ValueError("Cupón no existe")
+                raise ValueError("Cupón ya fue utilizado" if is_used else "Cupón expiró")
+            profile = UserProfile.objects.filter(user=user).first()
+            if profile is not None:
+                profile.enable_profile()
+            code = lookup.get('code') or cls.objects.filter(**lookup).values_list('code', flat=True).first()
+            OutboundEmail.queue(
+                user.email,
+                'Cupón aplicado',
+                f"Hola, aplicamos el cupón {code} a tu cuenta. Ya tenés acceso a los beneficios de socio.",
+                dedup_key=f'coupon-redeemed:{code}',
+            )
+        return now
+
     def use_coupon(self, user):
-        if not self.is_valid():
+        try:
+            used_at = self._redeem(user, pk=self.pk)
+        except ValueError:
             raise ValueError(f"Cupón {self.code} no es válido")
         self.user = user
         self.is_used = True
-        self.used_at = timezone.now()
-        self.save()
+        self.used_at = used_at
 
     @classmethod
     def validate_and_use(cls, code, user):
-        try:
-            coupon = cls.objects.get(code=code.upper())
-        except cls.DoesNotExist:
-            raise ValueError("Cupón no existe")
-
-        if not coupon.is_valid():
-            if coupon.is_used:
-                raise ValueError("Cupón ya fue utilizado")
-            else:
-                raise ValueError("Cupón expiró")
-
-        coupon.use_coupon(user)
-        return coupon
+        code = code.upper()
+        cls._redeem(user, code=code)
+        return cls.objects.get(code=code)
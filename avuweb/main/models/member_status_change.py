@@ -0,0 +1,47 @@
+from django.db import models
+
+
+class MemberStatusChange(models.Model):
+    """Log append-only de cambios de estado de socios por cédula.
+
+    sequence es el número que usan los establecimientos para sincronizar su
+    copia local (/validar-beneficios/cambios/?since=N). Se asigna después
+    del commit, en orden de visibilidad (membership.assign_status_change_sequences).
+    """
+
+    identity_number_normalized = models.CharField(max_length=20)
+    is_active = models.BooleanField()
+    sequence = models.BigIntegerField(null=True, blank=True, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"StatusChange(#{self.pk}, {self.identity_number_normalized}, active={self.is_active})"
+
+    @classmethod
+    def record(cls, profiles):
+        """Agrega al log el estado actual de estos perfiles (los que tienen cédula)."""
+        changes = [
+            cls(identity_number_normalized=profile.identity_number_normalized, is_active=profile.is_subscription_active)
+            for profile in profiles
+            if profile.identity_number_normalized
+        ]
+        if changes:
+            cls.objects.bulk_create(changes)
+        return changes
+
+
+class MemberStatusSequence(models.Model):
+    """Fila única con la última secuencia asignada a MemberStatusChange.
+
+    Quien numera la bloquea con select_for_update: así dos numeraciones
+    concurrentes quedan en serie aunque cada una vea filas pendientes
+    distintas, y nunca reparten el mismo número.
+    """
+
+    last = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"StatusSequence(last={self.last})"
@@ -0,0 +1,23 @@
+from django.db import models
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+
+class MembershipTokenRevocation(models.Model):
+    """Revoca los tokens de membresía de un usuario emitidos hasta revoked_at.
+
+    La lista se publica a los establecimientos para la verificación offline;
+    solo hacen falta las entradas cuyos tokens todavía no vencieron.
+    """
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='membership_token_revocations')
+    revoked_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(db_index=True,
+                                      help_text="Vencimiento del token revocado; después se puede purgar")
+    reason = models.CharField(max_length=50, blank=True)
+
+    class Meta:
+        ordering = ['-revoked_at']
+
+    def __str__(self):
+        return f"Revocation(user={self.user_id}, revoked_at={self.revoked_at:%Y-%m-%d %H:%M})"
@@ -0,0 +1,69 @@
+from django.db import models
+from django.dispatch import Signal
+from django.utils import timezone
+
+
+# Se emite tras encolar mails; signals.py despierta al dispatcher después del commit
+emails_queued = Signal()
+
+
+class OutboundEmail(models.Model):
+    """Outbox de mails transaccionales.
+
+    Se escribe en la misma transacción que el cambio de estado que lo
+    origina y lo envía después un worker (tasks.dispatch_outbox), así el
+    request nunca espera al servidor SMTP y un rollback no deja mails
+    enviados de cambios que no ocurrieron.
+    """
+
+    STATUS_CHOICES = [
+        ('pending', 'Pendiente'),
+        ('sending', 'Enviando'),
+        ('sent', 'Enviado'),
+        ('failed', 'Falló'),
+    ]
+
+    # Un mismo aviso no se encola dos veces (NULL: sin deduplicación)
+    dedup_key = models.CharField(max_length=255, unique=True, null=True, blank=True)
+    to = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self):
+        return f"OutboundEmail({self.to}, {self.status})"
+
+    @classmethod
+    def queue(cls, to: str, subject: str, body: str, dedup_key: str = None) -> None:
+        """Encola un mail en la transacción actual.
+
+        Si ya existe un mail con el mismo dedup_key no hace nada (sin romper
+        la transacción de quien llama).
+        """
+        cls.queue_many([(to, subject, body, dedup_key)])
+
+    @classmethod
+    def queue_many(cls, messages) -> None:
+        """Como queue, para varios (to, subject, body, dedup_key) en un solo INSERT."""
+        emails = [
+            cls(to=to, subject=subject, body=body, dedup_key=dedup_key)
+            for to, subject, body, dedup_key in messages if to
+        ]
+        if not emails:
+            return
+        cls.objects.bulk_create(emails, ignore_conflicts=True)
+        emails_queued.send(sender=cls)
@@ -1,6 +1,8 @@
 from django.db import models
 from ckeditor.fields import RichTextField
 
+from avuweb.main.sanitizer import sanitize_html
+
 
 class StaticPage(models.Model):
     """
@@ -32,6 +34,11 @@ class StaticPage(models.Model):
     content = RichTextField(
         help_text="Contenido de la página con editor visual WYSIWYG"
     )
+    rendered_content = models.TextField(
+        blank=True,
+        editable=False,
+        help_text="HTML normalizado y sanitizado, generado al guardar"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -42,3 +49,10 @@ class StaticPage(models.Model):
 
     def __str__(self):
         return self.title
+
+    def save(self, *args, **kwargs):
+        self.rendered_content = sanitize_html(self.content)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'content' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'rendered_content'}
+        super().save(*args, **kwargs)
@@ -12,6 +12,11 @@ class Subscription(models.Model):
         ('failed', 'Fallo permanente'),
     ]
 
+    # Con un pago rechazado la suscripción queda en paused pero el socio
+    # conserva el acceso hasta el MAX_FAILED_PAYMENTS-ésimo rechazo
+    ACCESS_STATUSES = ['active', 'paused']
+    MAX_FAILED_PAYMENTS = 4
+
     FREQUENCY_CHOICES = [
         ('monthly', 'Mensual'),
         ('yearly', 'Anual'),
@@ -20,7 +25,8 @@ class Subscription(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='subscription')
 
     mercado_pago_subscription_id = models.CharField(max_length=255, unique=True, db_index=True)
-    preapproval_id = models.CharField(max_length=255, null=True, blank=True, help_text="ID de preaprobación en MP")
+    preapproval_id = models.CharField(max_length=255, null=True, blank=True, db_index=True,
+                                      help_text="ID de preaprobación en MP")
 
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', db_index=True)
 
@@ -56,7 +62,7 @@ class Subscription(models.Model):
 
     def mark_payment_failed(self):
         self.failed_payment_count += 1
-        if self.failed_payment_count >= 4:
+        if self.failed_payment_count >= self.MAX_FAILED_PAYMENTS:
             self.status = 'failed'
         else:
             self.status = 'paused'
@@ -74,9 +80,15 @@ class SubscriptionEvent(models.Model):
 
     payload = models.JSONField()
 
-    processed = models.BooleanField(default=False, db_index=True)
+    processed = models.BooleanField(default=False)  # índice en Meta.indexes
     processed_at = models.DateTimeField(null=True, blank=True)
     error_message = models.TextField(blank=True, null=True, help_text="Mensaje de error si falló el procesamiento")
+    attempts = models.PositiveSmallIntegerField(default=0, help_text="Intentos fallidos de procesamiento")
+    next_attempt_at = models.DateTimeField(null=True, blank=True,
+                                           help_text="Próximo reintento si falló (vacío: no se reintenta)")
+    superseded_by = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True,
+                                      related_name='superseded_events',
+                                      help_text="Evento posterior que absorbió a este al coalescer")
 
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -86,6 +98,8 @@ class SubscriptionEvent(models.Model):
             models.Index(fields=['subscription', 'created_at']),
             models.Index(fields=['processed']),
             models.Index(fields=['event_type']),
+            # Paginación por keyset del admin (orden -created_at, -id)
+            models.Index(fields=['created_at', 'id']),
         ]
 
     def __str__(self):
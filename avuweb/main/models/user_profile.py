@@ -1,7 +1,16 @@
+import re
+
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from .member_status_change import MemberStatusChange
+
+
+def normalize_identity_number(value: str) -> str:
+    """Cédula sin puntos, guiones ni espacios: '1.234.567-8' -> '12345678'."""
+    return re.sub(r'[^0-9A-Za-z]', '', value or '').upper()
+
 
 class UserProfile(models.Model):
     USER_TYPE_CHOICES = [
@@ -22,6 +31,8 @@ class UserProfile(models.Model):
         blank=True,
         help_text="Cédula de identidad"
     )
+    # Clave de búsqueda para validar-beneficios (se completa al guardar)
+    identity_number_normalized = models.CharField(max_length=20, blank=True, db_index=True, editable=False)
     phone_number = models.CharField(max_length=20, blank=True)
     
     # Empresa specific fields
@@ -55,28 +66,61 @@ class UserProfile(models.Model):
 
     subscription_last_updated = models.DateTimeField(null=True, blank=True)
 
+    # Token firmado para validar la membresía offline (QR en el perfil)
+    membership_token = models.CharField(max_length=255, blank=True, editable=False)
+    membership_token_expires_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    # Campos que tocan enable_profile/disable_profile (update_fields / bulk_update)
+    STATUS_FIELDS = ['is_subscription_active', 'subscription_status', 'subscription_last_updated']
+    TOKEN_FIELDS = ['membership_token', 'membership_token_expires_at']
+
     class Meta:
         verbose_name = "User Profile"
         verbose_name_plural = "User Profiles"
+        permissions = [
+            ('validate_members', 'Puede validar si un socio está al día (validar-beneficios)'),
+        ]
 
     def __str__(self):
         return f"{self.user.email} ({self.get_user_type_display()})"
 
+    def save(self, *args, **kwargs):
+        # El valor anterior sirve para invalidar la caché de validación si cambia la cédula
+        self._previous_identity_number_normalized = self.identity_number_normalized
+        self.identity_number_normalized = normalize_identity_number(self.identity_number)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'identity_number' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'identity_number_normalized'}
+        super().save(*args, **kwargs)
+
     def is_socio(self):
         return self.user_type == 'socio'
 
     def is_empresa(self):
         return self.user_type == 'empresa'
 
-    def enable_profile(self):
-        """Habilita el perfil (usuario pagó o aplicó cupón)"""
+    def enable_profile(self, save=True):
+        """Habilita el perfil (usuario pagó o aplicó cupón).
+
+        Devuelve True si cambió is_subscription_active. Con save=False quien
+        llama guarda y registra el cambio con MemberStatusChange.record.
+        """
+        changed = not self.is_subscription_active
         self.is_subscription_active = True
         self.subscription_status = 'active'
         self.subscription_last_updated = timezone.now()
-        self.save(update_fields=['is_subscription_active', 'subscription_status', 'subscription_last_updated'])
+        if save:
+            self.save(update_fields=self.STATUS_FIELDS)
+            if changed:
+                MemberStatusChange.record([self])
+        return changed
+
+    def disable_profile(self, save=True):
+        """Deshabilita el perfil (suscripción venció o fue cancelada).
 
-    def disable_profile(self):
-        """Deshabilita el perfil (suscripción venció o fue cancelada)"""
+        Devuelve True si cambió is_subscription_active (ver enable_profile).
+        """
+        was_active = self.is_subscription_active
         # Empresas mantienen acceso; socios se deshabilitan
         if self.is_empresa():
             self.is_subscription_active = True
@@ -85,7 +129,12 @@ class UserProfile(models.Model):
             self.is_subscription_active = False
             self.subscription_status = 'inactive'
         self.subscription_last_updated = timezone.now()
-        self.save(update_fields=['is_subscription_active', 'subscription_status', 'subscription_last_updated'])
+        changed = self.is_subscription_active != was_active
+        if save:
+            self.save(update_fields=self.STATUS_FIELDS)
+            if changed:
+                MemberStatusChange.record([self])
+        return changed
 
     def can_view_content(self):
         """Determina si el usuario puede ver contenido premium"""
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+logger = logging.getLogger(__name__)
+
+# TTL en segundos por endpoint de MP (MERCADO_PAGO_CACHE_TTLS los pisa; 0 desactiva)
+DEFAULT_CACHE_TTLS = {
+    'get_subscription': 60,
+    'list_subscription_payments': 300,
+}
+
+# Máximo que se espera a que otro proceso resuelva el mismo miss
+FILL_LOCK_TIMEOUT = 15
+FILL_POLL_INTERVAL = 0.05
+
+STATS_OUTCOMES = ('hit', 'miss', 'coalesced')
+
+
+def _ttl(endpoint: str) -> int:
+    return {**DEFAULT_CACHE_TTLS, **getattr(settings, 'MERCADO_PAGO_CACHE_TTLS', {})}.get(endpoint, 0)
+
+
+def _version_key(resource_id: str) -> str:
+    return f'mp_cache:version:{resource_id}'
+
+
+def _entry_key(endpoint: str, resource_id: str, version: int, variant: str) -> str:
+    return f'mp_cache:{endpoint}:v{version}:{resource_id}:{variant}'
+
+
+def _stats_key(endpoint: str, outcome: str) -> str:
+    return f'mp_cache:stats:{endpoint}:{outcome}'
+
+
+def _version_timeout() -> int:
+    # La versión tiene que sobrevivir a todas las entradas que la usan
+    ttls = {**DEFAULT_CACHE_TTLS, **getattr(settings, 'MERCADO_PAGO_CACHE_TTLS', {})}
+    return max(ttls.values()) + 60
+
+
+def _resource_version(resource_id: str) -> int:
+    version = cache.get(_version_key(resource_id))
+    if version is None:
+        # Semilla basada en el tiempo, como en caching.py: si la clave expira
+        # no se reutiliza una versión con entradas viejas todavía en caché
+        cache.add(_version_key(resource_id), time.time_ns(), timeout=_version_timeout())
+        version = cache.get(_version_key(resource_id))
+    return version
+
+
+def _count(endpoint: str, outcome: str):
+    key = _stats_key(endpoint, outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def invalidate_mp_resource(*resource_ids):
+    """Invalida todo lo cacheado de estos recursos de MP (suscripción o preapproval)."""
+    for resource_id in filter(None, set(resource_ids)):
+        cache.set(_version_key(resource_id), time.time_ns(), timeout=_version_timeout())
+
+
+def cached_mp_call(endpoint: str, resource_id: str, fetch, variant: str = ''):
+    """Read-through de una consulta a MP con TTL por endpoint.
+
+    Los misses concurrentes de la misma clave (en cualquier proceso) se
+    resuelven con una sola llamada: el primero toma un lock en la caché y el
+    resto espera su resultado. Si el dueño del lock falla, los demás consultan
+    por su cuenta.
+    """
+    ttl = _ttl(endpoint)
+    if not ttl:
+        return fetch()
+
+    key = _entry_key(endpoint, resource_id, _resource_version(resource_id), variant)
+    value = cache.get(key)
+    if value is not None:
+        _count(endpoint, 'hit')
+        return value
+
+    lock_key = f'{key}:lock'
+    owns_lock = cache.add(lock_key, 1, timeout=FILL_LOCK_TIMEOUT)
+    if not owns_lock:
+        deadline = time.monotonic() + FILL_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(FILL_POLL_INTERVAL)
+            value = cache.get(key)
+            if value is not None:
+                _count(endpoint, 'coalesced')
+                return value
+            if cache.get(lock_key) is None:
+                break
+
+    _count(endpoint, 'miss')
+    try:
+        value = fetch()
+        cache.set(key, value, timeout=ttl)
+    finally:
+        if owns_lock:
+            cache.delete(lock_key)
+    return value
+
+
+async def acached_mp_call(endpoint: str, resource_id: str, fetch, variant: str = ''):
+    """Versión async de cached_mp_call; fetch es una función que devuelve un awaitable."""
+    ttl = _ttl(endpoint)
+    if not ttl:
+        return await fetch()
+
+    version = await asyncio.to_thread(_resource_version, resource_id)
+    key = _entry_key(endpoint, resource_id, version, variant)
+    value = await cache.aget(key)
+    if value is not None:
+        await asyncio.to_thread(_count, endpoint, 'hit')
+        return value
+
+    lock_key = f'{key}:lock'
+    owns_lock = await cache.aadd(lock_key, 1, timeout=FILL_LOCK_TIMEOUT)
+    if not owns_lock:
+        deadline = time.monotonic() + FILL_LOCK_TIMEOUT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(FILL_POLL_INTERVAL)
+            value = await cache.aget(key)
+            if value is not None:
+                await asyncio.to_thread(_count, endpoint, 'coalesced')
+                return value
+            if await cache.aget(lock_key) is None:
+                break
+
+    await asyncio.to_thread(_count, endpoint, 'miss')
+    try:
+        value = await fetch()
+        await cache.aset(key, value, timeout=ttl)
+    finally:
+        if owns_lock:
+            await cache.adelete(lock_key)
+    return value
+
+
+def mp_cache_stats() -> dict:
+    """Contadores de hits/misses por endpoint, compartidos por todos los procesos.
+
+    'coalesced' son misses que esperaron la consulta de otro proceso en vez de
+    llamar a MP.
+    """
+    keys = {_stats_key(endpoint, outcome): (endpoint, outcome)
+            for endpoint in DEFAULT_CACHE_TTLS for outcome in STATS_OUTCOMES}
+    values = cache.get_many(list(keys))
+    stats = {endpoint: dict.fromkeys(STATS_OUTCOMES, 0) for endpoint in DEFAULT_CACHE_TTLS}
+    for key, (endpoint, outcome) in keys.items():
+        stats[endpoint][outcome] = values.get(key, 0)
+    return stats
+
+
+def reset_mp_cache_stats():
+    cache.delete_many([_stats_key(endpoint, outcome) for endpoint in DEFAULT_CACHE_TTLS for outcome in STATS_OUTCOMES])
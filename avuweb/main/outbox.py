@@ -0,0 +1,116 @@
+import logging
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from avuweb.main.models import OutboundEmail
+
+
+logger = logging.getLogger(__name__)
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    return timedelta(seconds=getattr(settings, 'OUTBOX_RETRY_BASE_SECONDS', 60) * 2 ** (attempts - 1))
+
+
+def release_stale_claims() -> int:
+    """Devuelve a pending los mails tomados por un dispatcher que no terminó (worker caído)."""
+    timeout = getattr(settings, 'OUTBOX_CLAIM_TIMEOUT', 600)
+    return OutboundEmail.objects.filter(
+        status='sending', claimed_at__lt=timezone.now() - timedelta(seconds=timeout)
+    ).update(status='pending', claimed_at=None)
+
+
+def claim_batch(batch_size: int) -> list:
+    """Toma hasta batch_size mails vencidos (pending -> sending) en una transacción corta.
+
+    select_for_update(skip_locked) evita que dos dispatchers esperen por las
+    mismas filas y el UPDATE condicional que ninguno tome una fila ya tomada.
+    """
+    claimed_at = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=claimed_at)
+            .order_by('next_attempt_at', 'id').values_list('id', flat=True)[:batch_size]
+        )
+        OutboundEmail.objects.filter(id__in=ids, status='pending').update(status='sending', claimed_at=claimed_at)
+    return list(OutboundEmail.objects.filter(id__in=ids, status='sending', claimed_at=claimed_at).order_by('id'))
+
+
+def _release(emails: list):
+    OutboundEmail.objects.filter(id__in=[email.id for email in emails], status='sending').update(
+        status='pending', claimed_at=None
+    )
+
+
+def dispatch_outbox(batch_size: int = None) -> dict:
+    """Envía los mails pendientes de a batch_size por una sola conexión SMTP.
+
+    Cada lote se toma con claim_batch y el resultado de cada mail se guarda
+    apenas se envía, sin locks abiertos durante el SMTP. Si el servidor no
+    responde, lo que no se envió vuelve a pending; si el worker muere, lo
+    que quedó en sending vuelve con release_stale_claims. Un mail que falla
+    se reintenta con backoff exponencial hasta OUTBOX_MAX_ATTEMPTS.
+
+    Devuelve {'sent': n, 'retried': n, 'failed': n}.
+    """
+    batch_size = batch_size or getattr(settings, 'OUTBOX_BATCH_SIZE', 100)
+    max_attempts = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 5)
+    result = {'sent': 0, 'retried': 0, 'failed': 0}
+    release_stale_claims()
+    connection = None
+
+    try:
+        while True:
+            batch = claim_batch(batch_size)
+            if not batch:
+                break
+            try:
+                if connection is None:
+                    connection = get_connection()
+                    connection.open()
+            except OSError:
+                # Sin servidor no se envió nada: liberar el lote para el próximo intento
+                _release(batch)
+                raise
+
+            for index, email in enumerate(batch):
+                attempts = email.attempts + 1
+                try:
+                    EmailMessage(email.subject, email.body, to=[email.to], connection=connection).send()
+                except OSError as e:
+                    # smtplib.SMTPException es un OSError
+                    update = {'attempts': attempts, 'last_error': str(e)[:1000], 'claimed_at': None}
+                    if attempts >= max_attempts:
+                        update['status'] = 'failed'
+                        result['failed'] += 1
+                        logger.error(f"Outbound email {email.id} to {email.to} failed for good: {e}")
+                    else:
+                        update['status'] = 'pending'
+                        update['next_attempt_at'] = timezone.now() + _retry_delay(attempts)
+                        result['retried'] += 1
+                    OutboundEmail.objects.filter(pk=email.pk).update(**update)
+                    if isinstance(e, smtplib.SMTPServerDisconnected) or not isinstance(e, smtplib.SMTPException):
+                        connection.close()
+                        try:
+                            connection.open()
+                        except OSError:
+                            _release(batch[index + 1:])
+                            raise
+                else:
+                    OutboundEmail.objects.filter(pk=email.pk).update(
+                        status='sent', attempts=attempts, sent_at=timezone.now(), claimed_at=None
+                    )
+                    result['sent'] += 1
+    finally:
+        if connection is not None:
+            connection.close()
+
+    if any(result.values()):
+        logger.info(f"Outbox dispatched: {result}")
+    return result
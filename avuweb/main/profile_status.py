@@ -0,0 +1,143 @@
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from avuweb.main.membership import invalidate_member_status
+from avuweb.main.models import (
+    CouponCode,
+    MembershipTokenRevocation,
+    MemberStatusChange,
+    Subscription,
+    UserProfile,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Estados de perfil que calcula el motor: (is_subscription_active, subscription_status)
+ACTIVE = (True, 'active')
+INACTIVE = (False, 'inactive')
+NO_SUBSCRIPTION = (False, 'no_subscription')
+
+# Tamaño de los IN (...) sobre perfiles con drift (SQLite limita los parámetros)
+ID_BATCH_SIZE = 900
+
+
+def _batches(ids: list):
+    for start in range(0, len(ids), ID_BATCH_SIZE):
+        yield ids[start:start + ID_BATCH_SIZE]
+
+
+def _valid_coupon_q(now) -> Q:
+    """Cupón usado y dentro de sus meses de validez, contados desde el canje (used_at).
+
+    months_of_validity toma pocos valores distintos: un término por valor
+    evita aritmética de fechas sobre columnas, que no es portable. Los
+    cupones viejos sin used_at cuentan desde su creación.
+    """
+    q = Q(pk__in=[])
+    used = CouponCode.objects.filter(is_used=True).order_by()
+    for months in used.values_list('months_of_validity', flat=True).distinct():
+        since = now - timedelta(days=30 * months)
+        q |= Q(months_of_validity=months) & (
+            Q(used_at__gt=since) | Q(used_at__isnull=True, created_at__gt=since)
+        )
+    return q
+
+
+def _targets(now) -> dict:
+    """Condición (Q sobre UserProfile) para cada estado objetivo."""
+    # Misma regla que el procesamiento de eventos: paused conserva el acceso
+    # hasta MAX_FAILED_PAYMENTS rechazos
+    active_subscription = Exists(Subscription.objects.filter(
+        user_id=OuterRef('user_id'),
+        status__in=Subscription.ACCESS_STATUSES,
+        failed_payment_count__lt=Subscription.MAX_FAILED_PAYMENTS,
+    ))
+    any_subscription = Exists(Subscription.objects.filter(user_id=OuterRef('user_id')))
+    valid_coupon = Exists(
+        CouponCode.objects.filter(_valid_coupon_q(now), user_id=OuterRef('user_id'), is_used=True)
+    )
+    used_coupon = Exists(CouponCode.objects.filter(user_id=OuterRef('user_id'), is_used=True))
+
+    # Empresas mantienen acceso siempre (igual que disable_profile)
+    active = Q(user_type='empresa') | Q(active_subscription) | Q(valid_coupon)
+    had_membership = Q(any_subscription) | Q(used_coupon)
+    return {
+        ACTIVE: active,
+        INACTIVE: ~active & had_membership,
+        NO_SUBSCRIPTION: ~active & ~had_membership,
+    }
+
+
+def recompute_profile_status(user_ids=None, dry_run: bool = False) -> dict:
+    """Recalcula el estado de los perfiles a partir de Subscription, cupones y user_type.
+
+    Por cada estado objetivo hace un SELECT de los perfiles que difieren
+    (drift) y un UPDATE con la misma condición; nada se recorre fila por fila
+    salvo los perfiles con drift (log de cambios, caché y revocación de
+    tokens). Los tokens de los reactivados se firman al abrir el perfil
+    (ensure_membership_token). user_ids acota a esos usuarios; None recorre todos.
+
+    Devuelve {'checked': n, 'drift': {estado: n}, 'activated': n, 'deactivated': n}.
+    """
+    now = timezone.now()
+    profiles = UserProfile.objects.all()
+    if user_ids is not None:
+        profiles = profiles.filter(user_id__in=list(user_ids))
+
+    report = {'checked': profiles.count(), 'drift': {}, 'activated': 0, 'deactivated': 0}
+    activated, deactivated = 0, []
+    changed_identities, log_entries = [], []
+
+    with transaction.atomic():
+        for (is_active, status), condition in _targets(now).items():
+            drifted = profiles.filter(condition).exclude(is_subscription_active=is_active, subscription_status=status)
+            rows = list(drifted.values_list('user_id', 'identity_number_normalized', 'is_subscription_active'))
+            report['drift'][status] = len(rows)
+            if rows and not dry_run:
+                drifted.update(is_subscription_active=is_active, subscription_status=status,
+                               subscription_last_updated=now)
+            for user_id, identity, was_active in rows:
+                changed_identities.append(identity)
+                if was_active == is_active:
+                    continue
+                log_entries.append(MemberStatusChange(identity_number_normalized=identity, is_active=is_active))
+                if is_active:
+                    activated += 1
+                else:
+                    deactivated.append(user_id)
+
+        report['activated'] = activated
+        report['deactivated'] = len(deactivated)
+        if dry_run:
+            return report
+
+        MemberStatusChange.objects.bulk_create(
+            [entry for entry in log_entries if entry.identity_number_normalized], batch_size=1000
+        )
+        _revoke_tokens(deactivated, now)
+        invalidate_member_status(*changed_identities)
+
+    if any(report['drift'].values()):
+        logger.info(f"Profile status drift corrected: {report}")
+    return report
+
+
+def _revoke_tokens(user_ids: list, now):
+    """Versión en bloque de revoke_membership_tokens para los perfiles desactivados."""
+    for batch in _batches(user_ids):
+        with_token = UserProfile.objects.filter(user_id__in=batch, membership_token_expires_at__gt=now).exclude(
+            membership_token=''
+        )
+        MembershipTokenRevocation.objects.bulk_create([
+            MembershipTokenRevocation(user_id=user_id, revoked_at=now, expires_at=expires_at, reason='recompute')
+            for user_id, expires_at in with_token.values_list('user_id', 'membership_token_expires_at')
+        ])
+        UserProfile.objects.filter(user_id__in=batch).exclude(membership_token='').update(
+            membership_token='', membership_token_expires_at=None
+        )
+
@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import threading
+import time
+
+import redis
+from django.conf import settings
+from django.core.cache import cache
+
+
+logger = logging.getLogger(__name__)
+
+# Familia de límite de MP para cada método de MercadoPagoService
+ENDPOINT_FAMILIES = {
+    'create_preference': 'preferences',
+    'get_subscription': 'subscriptions',
+    'cancel_subscription': 'subscriptions',
+    'list_subscription_payments': 'payments',
+}
+
+# Requests por segundo y ráfaga máxima por familia (MERCADO_PAGO_RATE_LIMITS los pisa)
+DEFAULT_RATE_LIMITS = {
+    'subscriptions': {'rate': 10, 'burst': 20},
+    'payments': {'rate': 10, 'burst': 20},
+    'preferences': {'rate': 5, 'burst': 10},
+}
+
+# Cuánto tiempo se usa solo el bucket en memoria después de un error de Redis
+REDIS_RETRY_AFTER = 30
+
+# Contadores por familia en la caché, compartidos por todos los procesos
+STATS_FIELDS = ('calls', 'waited_calls', 'wait_ms')
+
+# Token bucket con reserva: se descuenta el token aunque el saldo quede
+# negativo y se devuelve cuánto esperar. Así los procesos se reparten el
+# ritmo permitido en vez de alternar ráfagas y back-off.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate) - 1
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil((burst - tokens) / rate) + 60)
+if tokens >= 0 then
+    return '0'
+end
+return tostring(-tokens / rate)
+"""
+
+
+class _LocalBucket:
+    """Mismo algoritmo que el script de Redis, en memoria del proceso."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.ts = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.ts) * self.rate) - 1
+            self.ts = now
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class RateLimiter:
+    """Token bucket por familia de endpoints compartido entre procesos.
+
+    Usa Redis si hay MERCADO_PAGO_RATE_LIMIT_REDIS_URL y cae al bucket en
+    memoria si Redis no está disponible. Se toma un token por intento HTTP,
+    reintentos incluidos, en los clientes sync y async.
+    """
+
+    def __init__(self, limits: dict, redis_url: str = '', prefix: str = 'mp_ratelimit'):
+        self.limits = limits
+        self.prefix = prefix
+        self._local = {family: _LocalBucket(**limit) for family, limit in limits.items()}
+        self._script = None
+        self._redis_down_until = 0.0
+        if redis_url:
+            client = redis.Redis.from_url(redis_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+            self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def reserve(self, family: str) -> float:
+        """Toma un token de la familia y devuelve los segundos a esperar."""
+        if self._script is not None and time.monotonic() >= self._redis_down_until:
+            limit = self.limits[family]
+            try:
+                return float(self._script(keys=[f'{self.prefix}:{family}'], args=[limit['rate'], limit['burst']]))
+            except Exception as e:
+                logger.warning(
+                    f"Rate limiter Redis unavailable, using the per-process bucket for {REDIS_RETRY_AFTER}s: {e}"
+                )
+                self._redis_down_until = time.monotonic() + REDIS_RETRY_AFTER
+        return self._local[family].reserve()
+
+    def acquire(self, family: str):
+        wait = self._reserve_and_record(family)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, family: str):
+        # Redis y los contadores en la caché bloquean: fuera del event loop
+        wait = await asyncio.to_thread(self._reserve_and_record, family)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def _reserve_and_record(self, family: str) -> float:
+        wait = self.reserve(family)
+        self._record(family, wait)
+        return wait
+
+    def _record(self, family: str, wait: float):
+        _count(family, 'calls')
+        if wait > 0:
+            _count(family, 'waited_calls')
+            _count(family, 'wait_ms', round(wait * 1000))
+        if wait > 1:
+            logger.info(f"MP rate limit: waiting {wait:.2f}s for {family}")
+
+
+def _stats_key(family: str, field: str) -> str:
+    return f'mp_ratelimit:stats:{family}:{field}'
+
+
+def _count(family: str, field: str, delta: int = 1):
+    key = _stats_key(family, field)
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        if not cache.add(key, delta, timeout=None):
+            cache.incr(key, delta)
+
+
+def rate_limit_stats() -> dict:
+    """Llamadas, llamadas que esperaron y ms esperados por familia, de todos los procesos."""
+    keys = {_stats_key(family, field): (family, field) for family in DEFAULT_RATE_LIMITS for field in STATS_FIELDS}
+    values = cache.get_many(list(keys))
+    stats = {family: dict.fromkeys(STATS_FIELDS, 0) for family in DEFAULT_RATE_LIMITS}
+    for key, (family, field) in keys.items():
+        stats[family][field] = values.get(key, 0)
+    return stats
+
+
+def reset_rate_limit_stats():
+    cache.delete_many([_stats_key(family, field) for family in DEFAULT_RATE_LIMITS for field in STATS_FIELDS])
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                limits = {**DEFAULT_RATE_LIMITS, **getattr(settings, 'MERCADO_PAGO_RATE_LIMITS', {})}
+                redis_url = getattr(settings, 'MERCADO_PAGO_RATE_LIMIT_REDIS_URL', '')
+                if not redis_url:
+                    logger.warning("No MERCADO_PAGO_RATE_LIMIT_REDIS_URL: each process enforces the MP limits on its own")
+                _limiter = RateLimiter(limits, redis_url)
+    return _limiter
@@ -0,0 +1,77 @@
+import re
+from html import escape, unescape
+from html.parser import HTMLParser
+
+
+# Lo que puede producir la barra de CKEditor configurada en settings
+ALLOWED_TAGS = {
+    'p', 'br', 'div', 'span', 'pre', 'address', 'blockquote',
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'strong', 'b', 'em', 'i', 'u', 's',
+    'a', 'ul', 'ol', 'li',
+}
+VOID_TAGS = {'br'}
+DROP_CONTENT_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'template'}
+
+ALLOWED_URL_SCHEMES = ('http:', 'https:', 'mailto:', 'tel:')
+INDENT_STYLE_RE = re.compile(r'^\s*margin-left\s*:\s*\d+px\s*;?\s*$')
+
+
+def _is_safe_url(value: str) -> bool:
+    url = value.strip().lower()
+    if url.startswith(('/', '#', '?')):
+        return True
+    return url.startswith(ALLOWED_URL_SCHEMES)
+
+
+def _is_allowed_attr(tag: str, name: str, value) -> bool:
+    if value is None:
+        return False
+    if tag == 'a' and name == 'href':
+        return _is_safe_url(value)
+    if tag == 'a' and name in ('title', 'target'):
+        return True
+    if name == 'style':
+        # Indentación de CKEditor (Indent/Outdent)
+        return bool(INDENT_STYLE_RE.match(value))
+    return False
+
+
+class _Sanitizer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROP_CONTENT_TAGS:
+            self._skip_depth += 1
+            return
+        if self._skip_depth or tag not in ALLOWED_TAGS:
+            return
+        attrs_html = ''.join(
+            f' {name}="{escape(value)}"' for name, value in attrs if _is_allowed_attr(tag, name, value)
+        )
+        if tag == 'a' and 'target=' in attrs_html:
+            attrs_html += ' rel="noopener noreferrer"'
+        self.parts.append(f'<{tag}{attrs_html}>')
+
+    def handle_endtag(self, tag):
+        if tag in DROP_CONTENT_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+            return
+        if self._skip_depth or tag not in ALLOWED_TAGS or tag in VOID_TAGS:
+            return
+        self.parts.append(f'</{tag}>')
+
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self.parts.append(escape(data, quote=False))
+
+
+def sanitize_html(content: str) -> str:
+    """Normaliza el HTML de CKEditor y deja solo tags/atributos permitidos."""
+    parser = _Sanitizer()
+    parser.feed(unescape(content or ''))
+    parser.close()
+    return ''.join(parser.parts)
@@ -1,34 +1,104 @@
+import asyncio
+import json
 import logging
+import os
+import threading
+import time
+
+import httpx
 import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from avuweb.main.mp_cache import acached_mp_call, cached_mp_call, invalidate_mp_resource
+from avuweb.main.ratelimit import ENDPOINT_FAMILIES, get_rate_limiter
 
 
 logger = logging.getLogger(__name__)
 
+# Timeouts de lectura por endpoint (segundos); se pueden pisar con MERCADO_PAGO_TIMEOUTS
+DEFAULT_TIMEOUTS = {
+    'create_preference': 15,
+    'get_subscription': 10,
+    'cancel_subscription': 10,
+    'list_subscription_payments': 10,
+}
 
-class MPException(Exception):
-    """Excepción personalizada para errores de Mercado Pago"""
+# Respuestas que se reintentan (GET/PUT) con backoff exponencial
+RETRY_STATUSES = (429, 500, 502, 503, 504)
 
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
 
-class MercadoPagoService:
-    """Wrapper HTTP para Mercado Pago Subscriptions/Preferences.
 
-    Nota: Usamos HTTP para control explícito; se puede migrar al SDK oficial.
+def get_http_session() -> requests.Session:
+    """Sesión HTTP compartida por proceso, con pool de conexiones y reintentos.
+
+    Se crea de forma perezosa y se recrea después de un fork (workers prefork
+    de Celery) para no compartir sockets entre procesos.
     """
+    global _session, _session_pid
+    if _session is None or _session_pid != os.getpid():
+        with _session_lock:
+            if _session is None or _session_pid != os.getpid():
+                _session = _build_http_session()
+                _session_pid = os.getpid()
+    return _session
+
+
+def _build_http_session() -> requests.Session:
+    # Solo errores de conexión, que no llegan a MP (como el transporte httpx
+    # del cliente async). Los 429/5xx los reintenta _request, que toma un
+    # token del rate limiter por intento.
+    retries = getattr(settings, 'MERCADO_PAGO_HTTP_RETRIES', 3)
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=0,
+        backoff_factor=getattr(settings, 'MERCADO_PAGO_HTTP_BACKOFF', 0.5),
+        raise_on_status=False,
+    )
+    pool_size = getattr(settings, 'MERCADO_PAGO_HTTP_POOL_SIZE', 10)
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+# Errores del cliente async que se mapean a MPException. En requests el
+# JSONDecodeError de resp.json() ya es un RequestException; en httpx no.
+ASYNC_MP_ERRORS = (httpx.HTTPError, json.JSONDecodeError)
+
+
+class MPException(Exception):
+    """Excepción personalizada para errores de Mercado Pago"""
+
+
+class BaseMercadoPagoService:
+    """Configuración, armado de payloads y mapeo de errores compartidos por
+    los clientes sync y async de Mercado Pago."""
 
     def __init__(self):
         base = "https://api.mercadopago.com"
         if getattr(settings, 'MERCADO_PAGO_SANDBOX', True):
             base = "https://api.sandbox.mercadopago.com"
-        self.base_url = base
+        # Permite apuntar a un servidor local (manage.py fake_mercadopago)
+        self.base_url = getattr(settings, 'MERCADO_PAGO_API_BASE_URL', '') or base
         self.access_token = settings.MERCADO_PAGO_ACCESS_TOKEN
         self.headers = {
             "Authorization": f"Bearer {self.access_token}",
             "Content-Type": "application/json",
         }
+        self.connect_timeout = getattr(settings, 'MERCADO_PAGO_CONNECT_TIMEOUT', 3.05)
+        self.timeouts = {**DEFAULT_TIMEOUTS, **getattr(settings, 'MERCADO_PAGO_TIMEOUTS', {})}
+        self.retries = getattr(settings, 'MERCADO_PAGO_HTTP_RETRIES', 3)
+        self.backoff = getattr(settings, 'MERCADO_PAGO_HTTP_BACKOFF', 0.5)
 
-    def create_preference(self, email: str, plan_id: str, plan_amount: float, plan_frequency: str) -> dict:
-        """Crea una preferencia de pago para iniciar suscripción recurrente."""
+    def _preference_request(self, email: str, plan_amount: float, plan_frequency: str):
         freq_map = {
             'monthly': {'frequency': 1, 'frequency_type': 'months'},
             'yearly': {'frequency': 1, 'frequency_type': 'years'},
@@ -50,47 +120,212 @@ class MercadoPagoService:
             },
             "notification_url": settings.MERCADO_PAGO_WEBHOOK_URL,
         }
+        return f"{self.base_url}/checkout/preferences", payload
 
-        url = f"{self.base_url}/checkout/preferences"
-        try:
-            resp = requests.post(url, json=payload, headers=self.headers, timeout=15)
+    def _subscription_url(self, subscription_id: str) -> str:
+        return f"{self.base_url}/v1/subscriptions/{subscription_id}"
+
+    def _subscription_payments_url(self, subscription_id: str) -> str:
+        return f"{self.base_url}/v1/subscriptions/{subscription_id}/payments"
+
+    def _should_retry(self, method: str, attempt: int, resp) -> bool:
+        # POST (crear preferencia) no es idempotente: no se reintenta
+        return method != 'POST' and resp.status_code in RETRY_STATUSES and attempt < self.retries
+
+    def _retry_delay(self, attempt: int, resp) -> float:
+        retry_after = resp.headers.get('Retry-After', '')
+        if retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff * (2 ** attempt)
+
+    def _mp_error(self, message: str, exc: Exception) -> MPException:
+        logger.error(f"{message}: {exc}")
+        return MPException(str(exc))
+
+
+class MercadoPagoService(BaseMercadoPagoService):
+    """Wrapper HTTP para Mercado Pago Subscriptions/Preferences.
+
+    Nota: Usamos HTTP para control explícito; se puede migrar al SDK oficial.
+    """
+
+    def _request(self, method: str, url: str, endpoint: str, **kwargs) -> requests.Response:
+        """Request sobre la sesión compartida con el timeout del endpoint.
+
+        Reintenta 429/5xx con backoff (nunca POST), tomando un token del rate
+        limiter por intento.
+        """
+        timeout = (self.connect_timeout, self.timeouts[endpoint])
+        for attempt in range(self.retries + 1):
+            get_rate_limiter().acquire(ENDPOINT_FAMILIES[endpoint])
+            resp = get_http_session().request(method, url, headers=self.headers, timeout=timeout, **kwargs)
+            if self._should_retry(method, attempt, resp):
+                time.sleep(self._retry_delay(attempt, resp))
+                continue
             resp.raise_for_status()
+            return resp
+
+    def create_preference(self, email: str, plan_id: str, plan_amount: float, plan_frequency: str) -> dict:
+        """Crea una preferencia de pago para iniciar suscripción recurrente."""
+        url, payload = self._preference_request(email, plan_amount, plan_frequency)
+        try:
+            resp = self._request('POST', url, 'create_preference', json=payload)
             data = resp.json()
             logger.info(f"MP Preference created: {data.get('id')}")
             return data
         except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to create MP preference: {e}")
-            raise MPException(str(e))
+            raise self._mp_error("Failed to create MP preference", e)
 
     def get_subscription(self, subscription_id: str) -> dict:
-        url = f"{self.base_url}/v1/subscriptions/{subscription_id}"
+        return cached_mp_call('get_subscription', subscription_id, lambda: self._get_subscription(subscription_id))
+
+    def _get_subscription(self, subscription_id: str) -> dict:
         try:
-            resp = requests.get(url, headers=self.headers, timeout=10)
-            resp.raise_for_status()
+            resp = self._request('GET', self._subscription_url(subscription_id), 'get_subscription')
             return resp.json()
         except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to get subscription {subscription_id}: {e}")
-            raise MPException(str(e))
+            raise self._mp_error(f"Failed to get subscription {subscription_id}", e)
 
     def cancel_subscription(self, subscription_id: str) -> dict:
-        url = f"{self.base_url}/v1/subscriptions/{subscription_id}"
         payload = {"status": "cancelled"}
         try:
-            resp = requests.put(url, json=payload, headers=self.headers, timeout=10)
-            resp.raise_for_status()
+            resp = self._request('PUT', self._subscription_url(subscription_id), 'cancel_subscription', json=payload)
             logger.info(f"Subscription {subscription_id} cancelled in MP")
             return resp.json()
         except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to cancel subscription {subscription_id}: {e}")
-            raise MPException(str(e))
+            raise self._mp_error(f"Failed to cancel subscription {subscription_id}", e)
+        finally:
+            invalidate_mp_resource(subscription_id)
 
     def list_subscription_payments(self, subscription_id: str, limit: int = 100) -> list:
-        url = f"{self.base_url}/v1/subscriptions/{subscription_id}/payments"
+        return cached_mp_call(
+            'list_subscription_payments', subscription_id,
+            lambda: self._list_subscription_payments(subscription_id, limit), variant=f'limit={limit}',
+        )
+
+    def _list_subscription_payments(self, subscription_id: str, limit: int) -> list:
         params = {'limit': limit}
         try:
-            resp = requests.get(url, params=params, headers=self.headers, timeout=10)
-            resp.raise_for_status()
+            resp = self._request(
+                'GET', self._subscription_payments_url(subscription_id), 'list_subscription_payments', params=params
+            )
             return resp.json()
         except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to list payments for {subscription_id}: {e}")
-            raise MPException(str(e))
+            raise self._mp_error(f"Failed to list payments for {subscription_id}", e)
+
+
+class AsyncMercadoPagoService(BaseMercadoPagoService):
+    """Cliente asyncio de Mercado Pago para vistas async y operaciones masivas.
+
+    Un semáforo acota los requests en vuelo, así se pueden lanzar cientos de
+    llamadas con asyncio.gather desde un solo thread:
+
+        async with AsyncMercadoPagoService() as mp:
+            results = await mp.get_subscriptions(ids)
+
+    El cliente HTTP y el semáforo se crean dentro del event loop en uso.
+    """
+
+    def __init__(self, max_concurrency: int = None):
+        super().__init__()
+        self.max_concurrency = max_concurrency or getattr(settings, 'MERCADO_PAGO_ASYNC_CONCURRENCY', 50)
+        self._client = None
+        self._semaphore = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                limits=httpx.Limits(max_connections=self.max_concurrency),
+                transport=httpx.AsyncHTTPTransport(retries=self.retries),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def _request(self, method: str, url: str, endpoint: str, **kwargs) -> httpx.Response:
+        """Mismos reintentos y tokens que el cliente sync: 429/5xx con backoff, nunca POST."""
+        client = self._get_client()
+        timeout = httpx.Timeout(self.timeouts[endpoint], connect=self.connect_timeout)
+        for attempt in range(self.retries + 1):
+            await get_rate_limiter().acquire_async(ENDPOINT_FAMILIES[endpoint])
+            async with self._semaphore:
+                resp = await client.request(method, url, timeout=timeout, **kwargs)
+            if self._should_retry(method, attempt, resp):
+                await asyncio.sleep(self._retry_delay(attempt, resp))
+                continue
+            resp.raise_for_status()
+            return resp
+
+    async def create_preference(self, email: str, plan_id: str, plan_amount: float, plan_frequency: str) -> dict:
+        url, payload = self._preference_request(email, plan_amount, plan_frequency)
+        try:
+            resp = await self._request('POST', url, 'create_preference', json=payload)
+            data = resp.json()
+            logger.info(f"MP Preference created: {data.get('id')}")
+            return data
+        except ASYNC_MP_ERRORS as e:
+            raise self._mp_error("Failed to create MP preference", e)
+
+    async def get_subscription(self, subscription_id: str) -> dict:
+        return await acached_mp_call(
+            'get_subscription', subscription_id, lambda: self._get_subscription(subscription_id)
+        )
+
+    async def _get_subscription(self, subscription_id: str) -> dict:
+        try:
+            resp = await self._request('GET', self._subscription_url(subscription_id), 'get_subscription')
+            return resp.json()
+        except ASYNC_MP_ERRORS as e:
+            raise self._mp_error(f"Failed to get subscription {subscription_id}", e)
+
+    async def cancel_subscription(self, subscription_id: str) -> dict:
+        payload = {"status": "cancelled"}
+        try:
+            resp = await self._request(
+                'PUT', self._subscription_url(subscription_id), 'cancel_subscription', json=payload
+            )
+            logger.info(f"Subscription {subscription_id} cancelled in MP")
+            return resp.json()
+        except ASYNC_MP_ERRORS as e:
+            raise self._mp_error(f"Failed to cancel subscription {subscription_id}", e)
+        finally:
+            await asyncio.to_thread(invalidate_mp_resource, subscription_id)
+
+    async def list_subscription_payments(self, subscription_id: str, limit: int = 100) -> list:
+        return await acached_mp_call(
+            'list_subscription_payments', subscription_id,
+            lambda: self._list_subscription_payments(subscription_id, limit), variant=f'limit={limit}',
+        )
+
+    async def _list_subscription_payments(self, subscription_id: str, limit: int) -> list:
+        params = {'limit': limit}
+        try:
+            resp = await self._request(
+                'GET', self._subscription_payments_url(subscription_id), 'list_subscription_payments', params=params
+            )
+            return resp.json()
+        except ASYNC_MP_ERRORS as e:
+            raise self._mp_error(f"Failed to list payments for {subscription_id}", e)
+
+    async def get_subscriptions(self, subscription_ids) -> dict:
+        """Consulta varias suscripciones en paralelo.
+
+        Devuelve {id: datos o MPException}; un fallo no corta el resto.
+        """
+        subscription_ids = list(subscription_ids)
+        results = await asyncio.gather(
+            *(self.get_subscription(subscription_id) for subscription_id in subscription_ids),
+            return_exceptions=True,
+        )
+        return dict(zip(subscription_ids, results))
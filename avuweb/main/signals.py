@@ -0,0 +1,49 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from avuweb.main.caching import bump_static_pages_version
+from avuweb.main.membership import invalidate_member_status
+from avuweb.main.models import MemberStatusChange, OutboundEmail, StaticPage, UserProfile
+from avuweb.main.models.outbound_email import emails_queued
+from avuweb.main.tasks import kick_outbox_dispatcher
+
+
+@receiver([post_save, post_delete], sender=StaticPage)
+def invalidate_static_pages_cache(sender, **kwargs):
+    """Invalida menú y páginas cacheadas cuando cambia una StaticPage."""
+    # Tras el commit, para que nadie recachee datos viejos con la versión nueva
+    transaction.on_commit(bump_static_pages_version)
+
+
+@receiver(emails_queued, sender=OutboundEmail)
+def wake_outbox_dispatcher(sender, **kwargs):
+    """Despierta al dispatcher del outbox cuando se confirman los mails encolados."""
+    transaction.on_commit(kick_outbox_dispatcher)
+
+
+@receiver([post_save, post_delete], sender=UserProfile)
+def invalidate_member_status_cache(sender, instance, **kwargs):
+    """Invalida el estado cacheado para validar-beneficios (cédula actual y anterior)."""
+    invalidate_member_status(
+        instance.identity_number_normalized,
+        getattr(instance, '_previous_identity_number_normalized', ''),
+    )
+
+
+@receiver(post_save, sender=UserProfile)
+def log_identity_number_change(sender, instance, **kwargs):
+    """Si cambia la cédula, la anterior sale del feed de cambios y entra la nueva."""
+    previous = getattr(instance, '_previous_identity_number_normalized', '')
+    if previous == instance.identity_number_normalized:
+        return
+    if previous:
+        MemberStatusChange.objects.create(identity_number_normalized=previous, is_active=False)
+    if instance.is_subscription_active:
+        MemberStatusChange.record([instance])
+
+
+@receiver(post_delete, sender=UserProfile)
+def log_deleted_member(sender, instance, **kwargs):
+    if instance.is_subscription_active and instance.identity_number_normalized:
+        MemberStatusChange.objects.create(identity_number_normalized=instance.identity_number_normalized, is_active=False)
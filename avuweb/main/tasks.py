@@ -1,88 +1,335 @@
+import asyncio
 import logging
-from datetime import timedelta
+from collections import defaultdict
+from datetime import datetime, timedelta
 
-from celery import shared_task
+from celery import chord, shared_task
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 
-from avuweb.main.models import Subscription, SubscriptionEvent, UserProfile
-from avuweb.main.services import MercadoPagoService, MPException
+from avuweb.main import campaigns, outbox
+from avuweb.main.event_archive import archive_subscription_events
+from avuweb.main.membership import (
+    invalidate_member_status,
+    issue_membership_token,
+    membership_token_expiry,
+    revoke_membership_tokens,
+)
+from avuweb.main.models import (
+    Campaign,
+    MemberStatusChange,
+    OutboundEmail,
+    Subscription,
+    SubscriptionEvent,
+    UserProfile,
+)
+from avuweb.main.profile_status import recompute_profile_status
+from avuweb.main.services import AsyncMercadoPagoService, MercadoPagoService, MPException
 
 
 logger = logging.getLogger(__name__)
 mp_service = MercadoPagoService()
 
+# Cuenta eventos encolados en la ventana de batch abierta (compartida entre procesos)
+EVENT_BATCH_PENDING_KEY = 'subscription_events:batch_pending'
+# Evita encolar un dispatch del outbox por cada mail cuando se escriben varios seguidos
+OUTBOX_KICK_KEY = 'outbox:kick'
 
-@shared_task(bind=True, max_retries=3, default_retry_delay=60)
-def process_subscription_event(self, event_id: int):
-    """Procesa evento de webhook de Mercado Pago (async)."""
+# Campos de Subscription que pueden cambiar al aplicar un evento
+SUBSCRIPTION_EVENT_FIELDS = [
+    'status', 'preapproval_id', 'next_payment_date', 'last_payment_date',
+    'failed_payment_count', 'mercado_pago_updated_at', 'last_synced_at',
+]
+# Campos de SubscriptionEvent que cambian cuando falla al aplicarse
+EVENT_RETRY_FIELDS = ['error_message', 'attempts', 'next_attempt_at']
+
+
+def enqueue_subscription_event(event_id: int):
+    """Encola el procesamiento de un evento de webhook.
+
+    Con MERCADO_PAGO_EVENT_BATCH_WINDOW > 0 los eventos se juntan durante la
+    ventana (o hasta MERCADO_PAGO_EVENT_BATCH_SIZE) y se aplican en un solo task.
+    """
+    window = getattr(settings, 'MERCADO_PAGO_EVENT_BATCH_WINDOW', 0)
+    if not window:
+        process_subscription_event.delay(event_id)
+        return
+
+    batch_size = getattr(settings, 'MERCADO_PAGO_EVENT_BATCH_SIZE', 200)
+    # El primer evento de la ventana programa el batch; el resto solo suma
+    if cache.add(EVENT_BATCH_PENDING_KEY, 1, timeout=window + 60):
+        process_subscription_events_batch.apply_async(countdown=window)
+        return
     try:
-        event = SubscriptionEvent.objects.get(id=event_id)
-        subscription = event.subscription
-        payload = event.payload
-        event_type = event.event_type
+        pending = cache.incr(EVENT_BATCH_PENDING_KEY)
+    except ValueError:
+        # La ventana se cerró entre add e incr: abrir una nueva
+        enqueue_subscription_event(event_id)
+        return
+    if pending % batch_size == 0:
+        process_subscription_events_batch.delay()
 
-        logger.info(f"Processing event {event_type} for subscription {subscription.id}")
 
-        if 'subscription' in event_type:
-            _handle_subscription_event(subscription, payload)
-        elif 'payment' in event_type:
-            _handle_payment_event(subscription, payload)
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def process_subscription_event(self, event_id: int):
+    """Procesa evento de webhook de Mercado Pago (async).
+
+    Coalesce el evento con los demás pendientes de la misma suscripción: si
+    otro task ya lo absorbió, no hay nada que hacer.
+    """
+    try:
+        with transaction.atomic():
+            event = SubscriptionEvent.objects.select_for_update().get(id=event_id)
+            if event.processed:
+                logger.info(f"Event {event_id} already processed (superseded_by={event.superseded_by_id})")
+                return
 
-        event.processed = True
-        event.processed_at = timezone.now()
-        event.save()
+            logger.info(f"Processing event {event.event_type} for subscription {event.subscription_id}")
+            events = list(
+                SubscriptionEvent.objects.select_for_update()
+                .filter(subscription_id=event.subscription_id, processed=False)
+                .filter(_due_events_q(timezone.now()) | Q(id=event_id))
+                .order_by('created_at', 'id')
+            )
+            result = _coalesce_and_apply(events)
     except SubscriptionEvent.DoesNotExist:
         logger.error(f"Event {event_id} not found")
+        return
     except MPException as e:
         logger.warning(f"MP error processing event {event_id}: {e}")
         raise self.retry(exc=e, countdown=60 * (2 ** self.request.retries))
     except Exception as e:
         logger.exception(f"Error processing event {event_id}: {e}")
-        try:
-            event = SubscriptionEvent.objects.get(id=event_id)
-            event.error_message = str(e)
-            event.save()
-        except Exception:
-            pass
+        event = SubscriptionEvent.objects.filter(id=event_id).first()
+        if event is not None:
+            _mark_event_failed(event, e, timezone.now())
+            event.save(update_fields=EVENT_RETRY_FIELDS)
+        raise self.retry(exc=e, countdown=60 * (2 ** self.request.retries))
+
+    failed = next((e for e in result['failed'] if e.id == event_id), None)
+    if failed is not None:
+        raise self.retry(exc=Exception(failed.error_message), countdown=60 * (2 ** self.request.retries))
+
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=60)
+def process_subscription_events_batch(self):
+    """Aplica en una transacción un lote de eventos de webhook pendientes.
+
+    Lee Subscription y UserProfile en bloque y escribe con bulk_update, en vez
+    de un task y una transacción por evento.
+    """
+    # Los eventos que lleguen desde ahora abren una ventana nueva
+    cache.delete(EVENT_BATCH_PENDING_KEY)
+    batch_size = getattr(settings, 'MERCADO_PAGO_EVENT_BATCH_SIZE', 200)
+
+    try:
+        with transaction.atomic():
+            events = list(
+                SubscriptionEvent.objects.select_for_update(skip_locked=True)
+                .filter(_due_events_q(timezone.now()), processed=False)
+                .order_by('created_at', 'id')[:batch_size]
+            )
+            if not events:
+                return 0
+            result = _coalesce_and_apply(events)
+    except Exception as e:
+        logger.exception(f"Error processing event batch: {e}")
         raise self.retry(exc=e, countdown=60 * (2 ** self.request.retries))
 
+    logger.info(
+        f"Event batch applied: {len(result['processed'])} events "
+        f"({result['superseded']} superseded), {result['subscriptions']} subscriptions, "
+        f"{result['profiles']} profile changes, {len(result['failed'])} failed"
+    )
+    if len(events) == batch_size:
+        # Quedan más pendientes: seguir drenando en otro task
+        process_subscription_events_batch.delay()
+    return len(result['processed'])
+
+
+def _due_events_q(now) -> Q:
+    """Eventos sin error o fallidos cuyo reintento ya venció."""
+    return Q(error_message__isnull=True) | Q(next_attempt_at__lte=now)
+
+
+def _mark_event_failed(event: SubscriptionEvent, error: Exception, now):
+    """Registra el fallo y programa el reintento con backoff (hasta MERCADO_PAGO_EVENT_MAX_ATTEMPTS)."""
+    event.error_message = str(error)
+    event.attempts += 1
+    if event.attempts < getattr(settings, 'MERCADO_PAGO_EVENT_MAX_ATTEMPTS', 5):
+        event.next_attempt_at = now + timedelta(minutes=2 ** (event.attempts - 1))
+    else:
+        event.next_attempt_at = None
+        logger.error(f"Giving up on event {event.id} after {event.attempts} attempts: {error}")
 
-def _handle_subscription_event(subscription: Subscription, payload: dict):
+
+def _coalesce_and_apply(events: list) -> dict:
+    """Pliega los eventos pendientes de cada suscripción en una sola transición.
+
+    Los eventos se aplican en orden sobre la suscripción en memoria y se
+    escribe una vez el estado neto. El perfil recibe solo la última acción
+    (y solo si cambia), evitando el "flapping" en tormentas de reintentos.
+    El último evento aplicado queda como efectivo; los anteriores se marcan
+    procesados con superseded_by apuntando a él.
+
+    Debe llamarse dentro de una transacción con los eventos ya bloqueados.
+    """
+    subscriptions = Subscription.objects.select_for_update().in_bulk(
+        {event.subscription_id for event in events}
+    )
+    events_by_subscription = defaultdict(list)
+    for event in events:
+        events_by_subscription[event.subscription_id].append(event)
+
+    now = timezone.now()
+    profile_actions, effective_events = {}, {}
+    touched, processed, failed = [], [], []
+    superseded = 0
+
+    for subscription_id, subscription_events in events_by_subscription.items():
+        subscription = subscriptions[subscription_id]
+        applied, action = [], None
+        for event in subscription_events:
+            snapshot = {field: getattr(subscription, field) for field in SUBSCRIPTION_EVENT_FIELDS}
+            try:
+                action = _apply_event(subscription, event.event_type, event.payload) or action
+            except Exception as e:
+                logger.exception(f"Error processing event {event.id}: {e}")
+                # Deshacer lo que el evento alcanzó a cambiar antes de fallar
+                for field, value in snapshot.items():
+                    setattr(subscription, field, value)
+                _mark_event_failed(event, e, now)
+                failed.append(event)
+                continue
+            applied.append(event)
+        if not applied:
+            continue
+
+        effective = applied[-1]
+        for event in applied:
+            event.processed = True
+            event.processed_at = now
+            if event is not effective:
+                event.superseded_by = effective
+                superseded += 1
+        processed.extend(applied)
+        subscription.last_synced_at = now
+        touched.append(subscription)
+        if action:
+            profile_actions[subscription.user_id] = action
+            effective_events[subscription.user_id] = effective.id
+
+    user_subscriptions = {subscription.user_id: subscription for subscription in touched}
+    changed_profiles, status_changed, to_revoke = [], [], []
+    for profile in UserProfile.objects.filter(user_id__in=profile_actions).select_related('user'):
+        before = (profile.is_subscription_active, profile.subscription_status, profile.membership_token)
+        if profile_actions.pop(profile.user_id) == 'enable':
+            if profile.enable_profile(save=False):
+                status_changed.append(profile)
+            # Re-firmar solo si cambia el vencimiento (activación o nuevo cobro)
+            expires_at = membership_token_expiry(user_subscriptions[profile.user_id].next_payment_date)
+            if profile.membership_token_expires_at != expires_at:
+                issue_membership_token(profile, expires_at)
+        else:
+            if profile.disable_profile(save=False):
+                status_changed.append(profile)
+            if not profile.is_subscription_active and profile.membership_token:
+                to_revoke.append(profile)
+        if (profile.is_subscription_active, profile.subscription_status, profile.membership_token) != before:
+            changed_profiles.append(profile)
+    for user_id in profile_actions:
+        logger.error(f"UserProfile not found for user {user_id}")
+
+    revoke_membership_tokens(to_revoke, reason='disabled')
+    UserProfile.objects.bulk_update(changed_profiles, UserProfile.STATUS_FIELDS + UserProfile.TOKEN_FIELDS)
+    MemberStatusChange.record(status_changed)
+    OutboundEmail.queue_many(
+        _membership_email(profile, effective_events[profile.user_id]) for profile in status_changed
+    )
+    # bulk_update no dispara post_save: invalidar validar-beneficios a mano
+    invalidate_member_status(*(profile.identity_number_normalized for profile in changed_profiles))
+    Subscription.objects.bulk_update(touched, SUBSCRIPTION_EVENT_FIELDS)
+    SubscriptionEvent.objects.bulk_update(processed, ['processed', 'processed_at', 'superseded_by'])
+    SubscriptionEvent.objects.bulk_update(failed, EVENT_RETRY_FIELDS)
+
+    return {
+        'processed': processed,
+        'failed': failed,
+        'superseded': superseded,
+        'subscriptions': len(touched),
+        'profiles': len(changed_profiles),
+    }
+
+
+def _membership_email(profile: UserProfile, event_id: int) -> tuple:
+    """(to, subject, body, dedup_key) del aviso de que el socio ganó o perdió el acceso."""
+    if profile.is_subscription_active:
+        subject = 'Tu membresía está activa'
+        body = 'Recibimos tu pago: tu membresía de la AVU está activa.'
+    else:
+        subject = 'Tu membresía quedó inactiva'
+        body = 'No pudimos confirmar el pago de tu suscripción, así que tu membresía quedó inactiva.'
+    names = (profile.full_name or '').split()
+    name = names[0] if names else profile.user.username
+    state = 'enabled' if profile.is_subscription_active else 'disabled'
+    return (
+        profile.user.email,
+        subject,
+        f'Hola {name},\n\n{body}',
+        f'membership:{profile.user_id}:{state}:{event_id}',
+    )
+
+
+def _apply_event(subscription: Subscription, event_type: str, payload: dict):
+    """Aplica un evento en memoria; devuelve la acción sobre el perfil o None."""
+    if 'subscription' in event_type:
+        return _apply_subscription_event(subscription, payload)
+    if 'payment' in event_type:
+        return _apply_payment_event(subscription, payload)
+    return None
+
+
+def _apply_subscription_event(subscription: Subscription, payload: dict):
     status = payload.get('status')
     logger.info(f"Handling subscription event: status={status}")
+    action = None
 
     if status == 'authorized':
         subscription.status = 'active'
         subscription.preapproval_id = payload.get('id')
-        _enable_user_profile(subscription.user_id)
+        action = 'enable'
     elif status == 'paused':
         subscription.status = 'paused'
     elif status == 'cancelled':
         subscription.status = 'cancelled'
         subscription.next_payment_date = None
-        _disable_user_profile(subscription.user_id)
+        action = 'disable'
     elif status == 'pending':
         subscription.status = 'pending'
 
     subscription.mercado_pago_updated_at = timezone.now()
-    subscription.save()
+    return action
 
 
-def _handle_payment_event(subscription: Subscription, payload: dict):
+def _apply_payment_event(subscription: Subscription, payload: dict):
     status = payload.get('status')
     logger.info(f"Handling payment event: status={status}")
+    action = None
 
     if status == 'approved':
         subscription.last_payment_date = timezone.now()
         subscription.failed_payment_count = 0
         days = 365 if subscription.payment_frequency == 'yearly' else 30
         subscription.next_payment_date = timezone.now() + timedelta(days=days)
-        _enable_user_profile(subscription.user_id)
+        action = 'enable'
     elif status == 'rejected':
         subscription.failed_payment_count += 1
-        if subscription.failed_payment_count >= 4:
+        if subscription.failed_payment_count >= Subscription.MAX_FAILED_PAYMENTS:
             subscription.status = 'failed'
-            _disable_user_profile(subscription.user_id)
+            action = 'disable'
         else:
             subscription.status = 'paused'
     elif status == 'authorized':
@@ -90,47 +337,193 @@ def _handle_payment_event(subscription: Subscription, payload: dict):
         subscription.next_payment_date = timezone.now() + timedelta(days=days)
 
     subscription.mercado_pago_updated_at = timezone.now()
-    subscription.save()
+    return action
 
 
-def _enable_user_profile(user_id: int):
+@shared_task
+def sync_subscriptions_reconciliation():
+    """Reparte la reconciliación en chunks por rango de IDs que corren en paralelo."""
+    logger.info("Starting subscription reconciliation")
+    cutoff = timezone.now() - timedelta(hours=6)
+    stale_ids = _stale_subscriptions(cutoff).order_by('id').values_list('id', flat=True)
+
+    chunk_size = getattr(settings, 'MERCADO_PAGO_RECONCILIATION_CHUNK_SIZE', 200)
+    chunks, current = [], []
+    for subscription_id in stale_ids.iterator():
+        current.append(subscription_id)
+        if len(current) == chunk_size:
+            chunks.append(sync_subscriptions_chunk.s(current[0], current[-1], cutoff.isoformat()))
+            current = []
+    if current:
+        chunks.append(sync_subscriptions_chunk.s(current[0], current[-1], cutoff.isoformat()))
+
+    if not chunks:
+        logger.info("No stale subscriptions to reconcile")
+        return
+    logger.info(f"Dispatching {len(chunks)} reconciliation chunks")
+    chord(chunks)(summarize_reconciliation.s(started_at=timezone.now().isoformat()))
+
+
+@shared_task
+def sync_subscriptions_chunk(first_id: int, last_id: int, cutoff: str) -> dict:
+    """Reconcilia las suscripciones vencidas con ID en [first_id, last_id].
+
+    Las consultas a MP van en paralelo con el cliente async (concurrencia
+    acotada); las escrituras a la base quedan en el thread del task.
+    """
+    stale = list(
+        _stale_subscriptions(datetime.fromisoformat(cutoff)).filter(id__range=(first_id, last_id))
+    )
+    # Sin valor propio usa la concurrencia por defecto de AsyncMercadoPagoService
+    concurrency = getattr(settings, 'MERCADO_PAGO_RECONCILIATION_CONCURRENCY', None)
+    mp_results = asyncio.run(
+        _fetch_mp_subscriptions([sub.mercado_pago_subscription_id for sub in stale], concurrency)
+    )
+    synced, changed_user_ids = [], []
+    failed = 0
+    now = timezone.now()
+
+    for sub in stale:
+        mp_data = mp_results[sub.mercado_pago_subscription_id]
+        if isinstance(mp_data, Exception):
+            failed += 1
+            logger.warning(f"Failed to sync subscription {sub.id}: {mp_data}")
+            continue
+        mp_status = mp_data.get('status')
+        if mp_status != sub.status:
+            sub.status = mp_status
+            sub.mercado_pago_updated_at = now
+            changed_user_ids.append(sub.user_id)
+        sub.last_synced_at = now
+        synced.append(sub)
+
+    with transaction.atomic():
+        Subscription.objects.bulk_update(synced, ['status', 'mercado_pago_updated_at', 'last_synced_at'])
+        # Los perfiles se recalculan en bloque en vez de uno por uno
+        if changed_user_ids:
+            recompute_profile_status(user_ids=changed_user_ids)
+
+    return {'synced': len(synced), 'changed': len(changed_user_ids), 'failed': failed}
+
+
+async def _fetch_mp_subscriptions(subscription_ids: list, concurrency: int = None) -> dict:
+    async with AsyncMercadoPagoService(max_concurrency=concurrency) as mp:
+        return await mp.get_subscriptions(subscription_ids)
+
+
+@shared_task
+def summarize_reconciliation(results: list, started_at: str = None) -> dict:
+    totals = {key: sum(result[key] for result in results) for key in ('synced', 'changed', 'failed')}
+    if started_at:
+        totals['duration_seconds'] = (timezone.now() - datetime.fromisoformat(started_at)).total_seconds()
+    logger.info(
+        f"Subscription reconciliation finished: {len(results)} chunks, "
+        f"synced={totals['synced']} changed={totals['changed']} failed={totals['failed']} "
+        f"in {totals.get('duration_seconds', 0):.1f}s"
+    )
+    return totals
+
+
+@shared_task
+def recompute_profile_status_sweep() -> dict:
+    """Barrido periódico: corrige perfiles cuyo estado no coincide con suscripción/cupón."""
+    report = recompute_profile_status()
+    logger.info(f"Profile status sweep: {report}")
+    return report
+
+
+@shared_task
+def archive_subscription_events_task() -> dict:
+    """Retención diaria: saca de la tabla los eventos procesados viejos (ver event_archive)."""
+    if not getattr(settings, 'SUBSCRIPTION_EVENT_RETENTION_DAYS', 90):
+        return {'archived': 0, 'file': None}
+    return archive_subscription_events()
+
+
+def start_campaign(campaign: Campaign) -> int:
+    """Congela los destinatarios de la campaña y despacha el envío tras el commit."""
+    with transaction.atomic():
+        total = campaigns.queue_campaign(campaign)
+        transaction.on_commit(lambda: dispatch_campaign.delay(campaign.pk))
+    return total
+
+
+@shared_task
+def dispatch_campaign(campaign_id: int) -> int:
+    """Reparte los destinatarios pendientes en chunks espaciados según CAMPAIGN_SEND_RATE.
+
+    Se puede volver a llamar sin riesgo (resume_campaigns, reintentar
+    fallidos): cada chunk solo toma destinatarios todavía pendientes.
+    """
+    campaign = Campaign.objects.get(pk=campaign_id)
+    if campaign.status not in ('queued', 'sending'):
+        return 0
+    campaigns.release_stale_claims(campaign_id)
+    chunks = campaigns.plan_chunks(campaign_id)
+    for index, (first_id, last_id) in enumerate(chunks):
+        send_campaign_chunk.apply_async((campaign_id, first_id, last_id), countdown=campaigns.chunk_delay(index))
+
+    Campaign.objects.filter(pk=campaign_id, status__in=['queued', 'sending']).update(
+        status='sending', scheduled_until=timezone.now() + timedelta(seconds=campaigns.chunk_delay(len(chunks)))
+    )
+    if not chunks:
+        campaigns.finish_campaign_if_done(campaign_id)
+    logger.info(f"Campaign {campaign_id}: dispatched {len(chunks)} chunks")
+    return len(chunks)
+
+
+# acks_late: si el worker muere a mitad del chunk, el broker lo vuelve a entregar
+@shared_task(bind=True, max_retries=3, acks_late=True, reject_on_worker_lost=True)
+def send_campaign_chunk(self, campaign_id: int, first_id: int, last_id: int) -> dict:
     try:
-        profile = UserProfile.objects.get(user_id=user_id)
-        profile.enable_profile()
-        logger.info(f"Profile enabled for user {user_id}")
-    except UserProfile.DoesNotExist:
-        logger.error(f"UserProfile not found for user {user_id}")
+        result = campaigns.send_chunk(campaign_id, first_id, last_id)
+    except OSError as e:
+        # No se pudo conectar al servidor SMTP
+        logger.warning(f"Campaign {campaign_id} chunk [{first_id}, {last_id}] failed: {e}")
+        raise self.retry(exc=e, countdown=60 * (2 ** self.request.retries))
+    logger.info(f"Campaign {campaign_id} chunk [{first_id}, {last_id}]: {result}")
+    return result
 
 
-def _disable_user_profile(user_id: int):
+def kick_outbox_dispatcher():
+    """Programa dispatch_outbox dentro de OUTBOX_KICK_DELAY (uno por ventana).
+
+    Los mails ya están guardados: si el broker no responde no se reintenta
+    hasta que pase un minuto, porque el beat los envía igual.
+    """
+    delay = getattr(settings, 'OUTBOX_KICK_DELAY', 1)
+    if not cache.add(OUTBOX_KICK_KEY, 1, timeout=delay):
+        return
     try:
-        profile = UserProfile.objects.get(user_id=user_id)
-        profile.disable_profile()
-        logger.info(f"Profile disabled for user {user_id}")
-    except UserProfile.DoesNotExist:
-        logger.error(f"UserProfile not found for user {user_id}")
+        dispatch_outbox.apply_async(countdown=delay)
+    except Exception as e:
+        cache.set(OUTBOX_KICK_KEY, 1, timeout=60)
+        logger.warning(f"Could not kick outbox dispatcher, leaving it to beat: {e}")
 
 
 @shared_task
-def sync_subscriptions_reconciliation():
-    logger.info("Starting subscription reconciliation")
-    cutoff = timezone.now() - timedelta(hours=6)
-    stale = Subscription.objects.filter(last_synced_at__lt=cutoff, status__in=['active', 'pending'])
+def dispatch_outbox() -> dict:
+    """Drena el outbox de mails transaccionales (lo despierta kick_outbox_dispatcher y el beat)."""
+    return outbox.dispatch_outbox()
 
-    for sub in stale:
-        try:
-            mp_data = mp_service.get_subscription(sub.mercado_pago_subscription_id)
-            mp_status = mp_data.get('status')
-            if mp_status != sub.status:
-                sub.status = mp_status
-                sub.mercado_pago_updated_at = timezone.now()
-                if mp_status == 'active':
-                    _enable_user_profile(sub.user_id)
-                else:
-                    _disable_user_profile(sub.user_id)
-            sub.save()
-        except Exception as e:
-            logger.warning(f"Failed to sync subscription {sub.id}: {e}")
+
+@shared_task
+def resume_campaigns() -> int:
+    """Red de seguridad: redespacha campañas con pendientes cuyos chunks ya deberían haber corrido."""
+    grace = timezone.now() - timedelta(seconds=getattr(settings, 'CAMPAIGN_CLAIM_TIMEOUT', 600))
+    stalled = Campaign.objects.filter(
+        Q(status='queued', queued_at__lt=grace) | Q(status='sending', scheduled_until__lt=grace)
+    ).values_list('id', flat=True)
+    resumed = 0
+    for campaign_id in stalled:
+        if not campaigns.finish_campaign_if_done(campaign_id):
+            dispatch_campaign.delay(campaign_id)
+            resumed += 1
+    return resumed
+
+
+def _stale_subscriptions(cutoff):
+    return Subscription.objects.filter(last_synced_at__lt=cutoff, status__in=['active', 'pending'])
 
 
 @shared_task
@@ -0,0 +1,40 @@
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from avuweb.main.management.commands.check_admin_query_counts import seed_admin_rows
+
+
+class AdminChangelistQueryCountTests(TestCase):
+    rows = 200
+
+    def setUp(self):
+        self.superuser = User.objects.create_superuser('admin-tests', 'admin-tests@example.invalid', 'pw')
+        self.client.force_login(self.superuser)
+        self.urls = [
+            reverse(f'admin:main_{model._meta.model_name}_changelist')
+            for model in admin.site._registry if model._meta.app_label == 'main'
+        ]
+
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return response
+
+    def test_changelist_query_count_does_not_grow_with_rows(self):
+        seed_admin_rows(0, 3, self.superuser)
+        for url in self.urls:
+            self.get(url)  # calienta cachés (content types, permisos, filtros)
+        expected = {}
+        for url in self.urls:
+            with CaptureQueriesContext(connection) as queries:
+                self.get(url)
+            expected[url] = len(queries)
+
+        seed_admin_rows(3, self.rows, self.superuser)
+        for url in self.urls:
+            with self.subTest(url=url), self.assertNumQueries(expected[url]):
+                self.get(url)
@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from avuweb.main import campaigns
+from avuweb.main.models import Campaign, CampaignRecipient
+
+
+class ReleaseStaleClaimsTests(TestCase):
+    def setUp(self):
+        self.campaign = Campaign.objects.create(name='Aviso', subject='Hola', body='Hola %nombre%', status='sending')
+        self.recipient = CampaignRecipient.objects.create(
+            campaign=self.campaign, user=User.objects.create_user('socio', 'socio@example.invalid', 'pw'),
+            email='socio@example.invalid', status='sending',
+        )
+
+    def claim(self, seconds_ago):
+        CampaignRecipient.objects.filter(pk=self.recipient.pk).update(
+            status='sending', claimed_at=timezone.now() - timedelta(seconds=seconds_ago)
+        )
+
+    @override_settings(CAMPAIGN_CLAIM_TIMEOUT=600, CAMPAIGN_CHUNK_SIZE=200, CAMPAIGN_SEND_RATE=10)
+    def test_uses_configured_timeout_when_chunks_are_fast(self):
+        self.claim(599)
+        self.assertEqual(campaigns.release_stale_claims(self.campaign.pk), 0)
+        self.claim(601)
+        self.assertEqual(campaigns.release_stale_claims(self.campaign.pk), 1)
+
+    @override_settings(CAMPAIGN_CLAIM_TIMEOUT=600, CAMPAIGN_CHUNK_SIZE=200, CAMPAIGN_SEND_RATE=0.1)
+    def test_never_releases_a_chunk_that_is_still_sending(self):
+        # 200 mails a 0.1/s tardan 2000s: el claim sigue vivo pasado CAMPAIGN_CLAIM_TIMEOUT
+        self.claim(2500)
+        self.assertEqual(campaigns.release_stale_claims(self.campaign.pk), 0)
+        self.claim(4001)
+        self.assertEqual(campaigns.release_stale_claims(self.campaign.pk), 1)
+        self.assertEqual(CampaignRecipient.objects.get(pk=self.recipient.pk).status, 'pending')
@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from avuweb.main import tasks
+from avuweb.main.models import CouponCode, UserProfile
+
+
+class CouponRedemptionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('coupon', 'coupon@example.invalid', 'pw')
+        UserProfile.objects.create(user=self.user, user_type='socio', full_name='Cupón')
+
+    def test_rejects_used_and_expired_coupons(self):
+        now = timezone.now()
+        CouponCode.objects.create(code='USED0001', expires_at=now + timedelta(days=1), is_used=True)
+        CouponCode.objects.create(code='OLD00001', expires_at=now - timedelta(days=1))
+        for code, message in [('USED0001', 'Cupón ya fue utilizado'), ('OLD00001', 'Cupón expiró'),
+                              ('NOPE0001', 'Cupón no existe')]:
+            with self.subTest(code=code), self.assertRaisesMessage(ValueError, message):
+                CouponCode.validate_and_use(code, self.user)
+
+    def test_redeems_and_enables_profile(self):
+        CouponCode.objects.create(code='GOOD0001', expires_at=timezone.now() + timedelta(days=1))
+        coupon = CouponCode.validate_and_use('good0001', self.user)
+        self.assertEqual((coupon.is_used, coupon.user), (True, self.user))
+        self.assertTrue(UserProfile.objects.get(user=self.user).is_subscription_active)
+
+
+class CouponBatchTests(TestCase):
+    def test_batch_replaces_colliding_codes(self):
+        expires_at = timezone.now() + timedelta(days=1)
+        CouponCode.objects.create(code='DUP00001', expires_at=expires_at)
+        codes = ['DUP00001', 'A0000001', 'B0000001', 'C0000001']
+        with mock.patch.object(CouponCode, 'generate_code', side_effect=codes):
+            batch_id = CouponCode.generate_batch(3, expires_at=expires_at)
+        self.assertEqual(
+            set(CouponCode.objects.filter(batch_id=batch_id).values_list('code', flat=True)),
+            {'A0000001', 'B0000001', 'C0000001'},
+        )
+
+    def test_failed_batch_leaves_no_coupons(self):
+        expires_at = timezone.now() + timedelta(days=1)
+        CouponCode.objects.create(code='DUP00001', expires_at=expires_at)
+        # La primera vuelta inserta dos y choca con DUP00001; la segunda falla
+        codes = ['DUP00001', 'A0000001', 'B0000001', RuntimeError('boom')]
+        with mock.patch.object(CouponCode, 'generate_code', side_effect=codes), \
+                self.assertRaisesMessage(RuntimeError, 'boom'):
+            CouponCode.generate_batch(3, expires_at=expires_at)
+        self.assertEqual(list(CouponCode.objects.values_list('code', flat=True)), ['DUP00001'])
+
+
+class ConcurrentCouponRedemptionTests(TransactionTestCase):
+    coupons = 20
+    contenders = 6
+    threads = 8
+
+    def setUp(self):
+        patcher = mock.patch.object(tasks.dispatch_outbox, 'apply_async')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def redeem(self, code, user):
+        """'redeemed' o 'rejected'; reintenta los errores de lock de SQLite."""
+        retried = False
+        while True:
+            try:
+                try:
+                    CouponCode.validate_and_use(code, user)
+                    return 'redeemed'
+                except ValueError:
+                    # Tras un error de lock el intento anterior pudo haber commiteado
+                    if retried and CouponCode.objects.filter(code=code, user=user).exists():
+                        return 'redeemed'
+                    return 'rejected'
+            except OperationalError:
+                # SQLite bloquea la tabla entera ante escrituras simultáneas
+                retried = True
+                time.sleep(0.01)
+
+    def test_exactly_one_winner_per_code(self):
+        batch_id = CouponCode.generate_batch(self.coupons, expires_at=timezone.now() + timedelta(days=1))
+        codes = list(CouponCode.objects.filter(batch_id=batch_id).values_list('code', flat=True))
+        users = [User.objects.create_user(f'contender-{i}', f'contender-{i}@example.invalid') for i in range(self.contenders)]
+        UserProfile.objects.bulk_create([UserProfile(user=user, user_type='socio') for user in users])
+
+        # Los intentos sobre un mismo cupón quedan seguidos para que los threads choquen
+        attempts = [(code, user) for code in codes for user in users]
+        winners, outcomes = Counter(), Counter()
+        lock = threading.Lock()
+
+        def worker():
+            try:
+                while True:
+                    with lock:
+                        if not attempts:
+                            return
+                        code, user = attempts.pop()
+                    outcome = self.redeem(code, user)
+                    with lock:
+                        outcomes[outcome] += 1
+                        if outcome == 'redeemed':
+                            winners[code] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(winners, Counter({code: 1 for code in codes}))
+        self.assertEqual(outcomes['rejected'], self.coupons * (self.contenders - 1))
+        self.assertEqual(CouponCode.objects.filter(batch_id=batch_id, is_used=True).count(), self.coupons)
@@ -0,0 +1,45 @@
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from avuweb.main.event_archive import archive_subscription_events, iter_archived_events, restore_archived_events
+from avuweb.main.models import Subscription, SubscriptionEvent
+
+
+class TruncatedArchiveTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.archive_dir = Path(directory.name)
+        override = override_settings(SUBSCRIPTION_EVENT_ARCHIVE_DIR=str(self.archive_dir))
+        override.enable()
+        self.addCleanup(override.disable)
+
+        user = User.objects.create_user('archive', 'archive@example.invalid', 'pw')
+        self.subscription = Subscription.objects.create(user=user, mercado_pago_subscription_id='archive')
+        SubscriptionEvent.objects.bulk_create([
+            SubscriptionEvent(subscription=self.subscription, event_type='payment.updated',
+                              mercado_pago_event_id=f'archive-{i}', payload={'i': i}, processed=True)
+            for i in range(5)
+        ])
+        SubscriptionEvent.objects.update(created_at=timezone.now() - timedelta(days=200))
+
+    def test_truncated_archive_keeps_readable_records(self):
+        result = archive_subscription_events(older_than_days=90, batch_size=2)
+        self.assertEqual(result['archived'], 5)
+
+        # Un archivo sin cierre (sin trailer gzip), como el de un archivado cortado
+        path = Path(result['file'])
+        path.write_bytes(path.read_bytes()[:-8])
+        (self.archive_dir / 'subscription-events-99999999-000000.jsonl.gz').write_bytes(b'not gzip')
+
+        with self.assertLogs('avuweb.main.event_archive', level='WARNING') as logs:
+            records = list(iter_archived_events(subscription_id=self.subscription.id))
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(sorted(r['mercado_pago_event_id'] for r in records), [f'archive-{i}' for i in range(5)])
+        self.assertEqual(restore_archived_events(records), 5)
+        self.assertEqual(SubscriptionEvent.objects.count(), 5)
@@ -0,0 +1,83 @@
+import threading
+import time
+
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase
+
+from avuweb.main.membership import (
+    assign_status_change_sequences,
+    get_status_changes,
+    latest_status_change_sequence,
+)
+from avuweb.main.models import MemberStatusChange, MemberStatusSequence
+
+
+def retry_locked(operation):
+    """Reintenta los errores de lock de tabla de SQLite en memoria (en PostgreSQL no ocurren)."""
+    while True:
+        try:
+            return operation()
+        except OperationalError:
+            time.sleep(0.01)
+
+
+class StatusChangeFeedTests(TestCase):
+    def test_late_commit_with_lower_id_is_delivered_after_the_cursor(self):
+        MemberStatusChange.objects.create(id=10, identity_number_normalized='11111111', is_active=True)
+        changes, more = get_status_changes(since=0, limit=100)
+        self.assertEqual([identity for _, identity, _ in changes], ['11111111'])
+        cursor = changes[-1][0]
+
+        # Una transacción larga que tomó el ID 5 y commitea recién ahora
+        MemberStatusChange.objects.create(id=5, identity_number_normalized='22222222', is_active=False)
+
+        changes, more = get_status_changes(since=cursor, limit=100)
+        self.assertEqual(changes, [(cursor + 1, '22222222', False)])
+        self.assertFalse(more)
+        self.assertEqual(latest_status_change_sequence(), cursor + 1)
+
+    def test_pages_follow_the_sequence(self):
+        MemberStatusChange.objects.bulk_create([
+            MemberStatusChange(identity_number_normalized=f'{i:08d}', is_active=True) for i in range(5)
+        ])
+        first, more = get_status_changes(since=0, limit=3)
+        self.assertTrue(more)
+        rest, more = get_status_changes(since=first[-1][0], limit=3)
+        self.assertFalse(more)
+        self.assertEqual([identity for _, identity, _ in first + rest], [f'{i:08d}' for i in range(5)])
+
+    def test_numbering_continues_from_the_locked_counter(self):
+        # Otro proceso numeró y commiteó hasta 7 sin que este lo viera en Max('sequence')
+        MemberStatusSequence.objects.filter(pk=1).update(last=7)
+        MemberStatusChange.objects.create(identity_number_normalized='33333333', is_active=True)
+        self.assertEqual(assign_status_change_sequences(), 1)
+        self.assertEqual(MemberStatusChange.objects.get().sequence, 8)
+        self.assertEqual(MemberStatusSequence.objects.get(pk=1).last, 8)
+
+
+class ConcurrentStatusChangeNumberingTests(TransactionTestCase):
+    def test_concurrent_numbering_never_reuses_a_sequence(self):
+        errors = []
+
+        def number():
+            try:
+                for _ in range(5):
+                    retry_locked(lambda: MemberStatusChange.objects.create(
+                        identity_number_normalized='44444444', is_active=True
+                    ))
+                    retry_locked(assign_status_change_sequences)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=number) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        assign_status_change_sequences()
+        sequences = sorted(MemberStatusChange.objects.values_list('sequence', flat=True))
+        self.assertEqual(sequences, list(range(1, 21)))
@@ -0,0 +1,98 @@
+import asyncio
+import threading
+from unittest import mock
+
+import httpx
+import requests
+from django.test import SimpleTestCase, override_settings
+
+from avuweb.main.ratelimit import RateLimiter
+from avuweb.main.services import AsyncMercadoPagoService, MercadoPagoService, MPException
+
+
+def requests_response(status: int, body: bytes = b'{"id": "sub-1"}', headers=None) -> requests.Response:
+    resp = requests.Response()
+    resp.status_code = status
+    resp._content = body
+    resp.headers.update(headers or {})
+    return resp
+
+
+async def async_service(handler) -> AsyncMercadoPagoService:
+    """Cliente async cuyas respuestas las arma handler(request)."""
+    service = AsyncMercadoPagoService()
+    service._get_client()
+    await service._client.aclose()
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return service
+
+
+@override_settings(MERCADO_PAGO_HTTP_RETRIES=2, MERCADO_PAGO_HTTP_BACKOFF=0)
+class RateLimitChargingTests(SimpleTestCase):
+    """Cada intento HTTP, reintentos incluidos, toma un token en ambos clientes."""
+
+    def setUp(self):
+        limiter = mock.Mock(acquire_async=mock.AsyncMock())
+        patcher = mock.patch('avuweb.main.services.get_rate_limiter', return_value=limiter)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.limiter = limiter
+
+    def test_sync_client_takes_a_token_per_attempt(self):
+        session = mock.Mock()
+        session.request.side_effect = [requests_response(429, headers={'Retry-After': '0'}), requests_response(200)]
+        with mock.patch('avuweb.main.services.get_http_session', return_value=session):
+            self.assertEqual(MercadoPagoService()._get_subscription('sub-1'), {'id': 'sub-1'})
+        self.assertEqual(session.request.call_count, 2)
+        self.assertEqual(self.limiter.acquire.call_count, 2)
+
+    def test_async_client_takes_a_token_per_attempt(self):
+        statuses = iter([503, 200])
+
+        async def run():
+            service = await async_service(lambda request: httpx.Response(next(statuses), json={'id': 'sub-1'}))
+            async with service:
+                return await service._get_subscription('sub-1')
+
+        self.assertEqual(asyncio.run(run()), {'id': 'sub-1'})
+        self.assertEqual(self.limiter.acquire_async.await_count, 2)
+
+    def test_post_is_not_retried(self):
+        session = mock.Mock()
+        session.request.return_value = requests_response(503)
+        with mock.patch('avuweb.main.services.get_http_session', return_value=session), \
+                self.assertRaises(MPException), self.assertLogs('avuweb.main.services', level='ERROR'):
+            MercadoPagoService().create_preference('socio@example.invalid', 'plan', 500, 'monthly')
+        self.assertEqual(self.limiter.acquire.call_count, 1)
+
+
+class AsyncErrorMappingTests(SimpleTestCase):
+    def test_invalid_json_becomes_mp_exception(self):
+        async def run():
+            service = await async_service(lambda request: httpx.Response(200, content=b'<html>gateway</html>'))
+            async with service:
+                return await service.get_subscriptions(['sub-1'])
+
+        with mock.patch('avuweb.main.services.get_rate_limiter', return_value=mock.Mock(acquire_async=mock.AsyncMock())), \
+                self.assertLogs('avuweb.main.services', level='ERROR'):
+            results = asyncio.run(run())
+        self.assertIsInstance(results['sub-1'], MPException)
+
+
+class AsyncRateLimiterTests(SimpleTestCase):
+    def test_acquire_async_keeps_blocking_work_off_the_event_loop(self):
+        limiter = RateLimiter({'subscriptions': {'rate': 100, 'burst': 10}})
+        loop_thread = []
+
+        def record(family, wait):
+            loop_thread.append(threading.get_ident())
+
+        async def run():
+            main = threading.get_ident()
+            with mock.patch.object(limiter, '_record', side_effect=record):
+                await limiter.acquire_async('subscriptions')
+            return main
+
+        main = asyncio.run(run())
+        self.assertEqual(len(loop_thread), 1)
+        self.assertNotEqual(loop_thread[0], main)
@@ -0,0 +1,78 @@
+import smtplib
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase
+from django.utils import timezone
+
+from avuweb.main import outbox, tasks
+from avuweb.main.models import OutboundEmail
+
+
+class DropConnectionBackend(EmailBackend):
+    """Envía el primer mail, corta la conexión en el segundo y no deja reconectar."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.opened = 0
+
+    def open(self):
+        self.opened += 1
+        if self.opened > 1:
+            raise ConnectionRefusedError('down')
+
+    def send_messages(self, messages):
+        if len(mail.outbox) == 1:
+            raise smtplib.SMTPServerDisconnected('gone')
+        return super().send_messages(messages)
+
+
+class DispatchOutboxTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def queue(self, count):
+        OutboundEmail.queue_many((f'user{i}@example.invalid', 'Hola', 'Cuerpo', f'test:{i}') for i in range(count))
+
+    def test_queue_dedupes_and_kicks_once_after_commit(self):
+        with mock.patch.object(tasks.dispatch_outbox, 'apply_async') as apply_async:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.queue(3)
+                self.queue(3)
+        self.assertEqual(OutboundEmail.objects.count(), 3)
+        apply_async.assert_called_once()
+
+    def test_sends_pending_and_marks_them_sent(self):
+        self.queue(3)
+        self.assertEqual(outbox.dispatch_outbox(batch_size=2), {'sent': 3, 'retried': 0, 'failed': 0})
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(OutboundEmail.objects.exclude(status='sent').exists())
+        self.assertEqual(outbox.dispatch_outbox(), {'sent': 0, 'retried': 0, 'failed': 0})
+
+    def test_failed_reconnect_keeps_delivered_and_releases_the_rest(self):
+        self.queue(4)
+        with self.settings(EMAIL_BACKEND='avuweb.main.tests.test_outbox.DropConnectionBackend'):
+            with self.assertRaises(ConnectionRefusedError):
+                outbox.dispatch_outbox()
+
+        statuses = dict(OutboundEmail.objects.values_list('dedup_key', 'status'))
+        self.assertEqual(statuses, {'test:0': 'sent', 'test:1': 'pending', 'test:2': 'pending', 'test:3': 'pending'})
+        retried = OutboundEmail.objects.get(dedup_key='test:1')
+        self.assertEqual(retried.attempts, 1)
+        self.assertGreater(retried.next_attempt_at, timezone.now())
+        self.assertFalse(OutboundEmail.objects.filter(dedup_key__in=['test:2', 'test:3'], attempts__gt=0).exists())
+
+        self.assertEqual(outbox.dispatch_outbox()['sent'], 2)
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_stale_claims_are_released(self):
+        self.queue(2)
+        OutboundEmail.objects.filter(dedup_key='test:0').update(
+            status='sending', claimed_at=timezone.now() - timedelta(hours=1)
+        )
+        OutboundEmail.objects.filter(dedup_key='test:1').update(status='sending', claimed_at=timezone.now())
+        self.assertEqual(outbox.dispatch_outbox(), {'sent': 1, 'retried': 0, 'failed': 0})
+        self.assertEqual(OutboundEmail.objects.get(dedup_key='test:1').status, 'sending')
@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from avuweb.main.models import CouponCode, Subscription, UserProfile
+from avuweb.main.profile_status import recompute_profile_status
+
+
+class RecomputeProfileStatusTests(TestCase):
+    def make_socio(self, username, active=True):
+        user = User.objects.create_user(username, f'{username}@example.invalid', 'pw')
+        UserProfile.objects.create(
+            user=user, user_type='socio', full_name=username,
+            is_subscription_active=active, subscription_status='active' if active else 'inactive',
+        )
+        return user
+
+    def assertActive(self, user, expected):
+        profile = UserProfile.objects.get(user=user)
+        self.assertEqual(profile.is_subscription_active, expected)
+        self.assertEqual(profile.subscription_status, 'active' if expected else 'inactive')
+
+    def test_paused_subscription_keeps_access_until_max_failed_payments(self):
+        grace = self.make_socio('grace')
+        Subscription.objects.create(user=grace, mercado_pago_subscription_id='grace', status='paused',
+                                    failed_payment_count=1)
+        exhausted = self.make_socio('exhausted')
+        Subscription.objects.create(user=exhausted, mercado_pago_subscription_id='exhausted', status='paused',
+                                    failed_payment_count=Subscription.MAX_FAILED_PAYMENTS)
+
+        report = recompute_profile_status()
+
+        self.assertActive(grace, True)
+        self.assertActive(exhausted, False)
+        self.assertEqual(report['deactivated'], 1)
+
+    def test_coupon_validity_counts_from_redemption(self):
+        now = timezone.now()
+        redeemed_today = self.make_socio('redeemed-today', active=False)
+        old_coupon = CouponCode.objects.create(code='OLD00001', months_of_validity=3,
+                                               expires_at=now + timedelta(days=365))
+        CouponCode.objects.filter(pk=old_coupon.pk).update(created_at=now - timedelta(days=120))
+        CouponCode.validate_and_use('OLD00001', redeemed_today)
+
+        redeemed_long_ago = self.make_socio('redeemed-long-ago')
+        CouponCode.objects.create(code='OLD00002', months_of_validity=3, expires_at=now + timedelta(days=365),
+                                  user=redeemed_long_ago, is_used=True, used_at=now - timedelta(days=100))
+
+        recompute_profile_status()
+
+        self.assertActive(redeemed_today, True)
+        self.assertActive(redeemed_long_ago, False)
@@ -0,0 +1,37 @@
+from unittest import mock
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.urls import reverse
+
+from avuweb.main import tasks
+
+
+@mock.patch.object(tasks.dispatch_outbox, 'apply_async')
+class SignupStep4Tests(TestCase):
+    def start_signup(self, email):
+        session = self.client.session
+        session['signup_data'] = {
+            'user_type': 'socio', 'full_name': 'Ana', 'email': email,
+            'password_hash': make_password('una-clave-larga'),
+            'identity_number': '1.234.567-8', 'phone_number': '099123456',
+        }
+        session.save()
+
+    def finish(self):
+        return self.client.post(f"{reverse('main:signup')}?step=4", {'address': 'Av. 18 de Julio 1234'})
+
+    def test_creates_the_account(self, apply_async):
+        self.start_signup('ana@example.invalid')
+        response = self.finish()
+        self.assertRedirects(response, reverse('main:profile'), fetch_redirect_response=False)
+        self.assertTrue(User.objects.filter(username='ana@example.invalid').exists())
+
+    def test_rejects_an_email_taken_by_an_account_with_its_own_username(self, apply_async):
+        # Cuenta de allauth: el username no es el email
+        User.objects.create_user('ana', 'Ana@Example.invalid', 'pw')
+        self.start_signup('ana@example.invalid')
+        response = self.finish()
+        self.assertRedirects(response, f"{reverse('main:signup')}?step=2", fetch_redirect_response=False)
+        self.assertEqual(User.objects.filter(email__iexact='ana@example.invalid').count(), 1)
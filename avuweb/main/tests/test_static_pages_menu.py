@@ -0,0 +1,53 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from avuweb.main.caching import warn_if_cache_is_per_process
+from avuweb.main.models import StaticPage
+
+
+class StaticPagesMenuTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = StaticPage.CATEGORY_CHOICES[0][0]
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(3):
+                StaticPage.objects.create(title=f'Página {i}', slug=f'pagina-{i}', category=self.category)
+
+    def render_menu(self):
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        return render_to_string('main/includes/menu.html', request=request)
+
+    def test_cached_menu_renders_without_queries(self):
+        self.render_menu()
+        with self.assertNumQueries(0):
+            html = self.render_menu()
+        for i in range(3):
+            self.assertIn(f'Página {i}', html)
+
+    def test_save_and_delete_invalidate_the_menu(self):
+        self.render_menu()
+        with self.captureOnCommitCallbacks(execute=True):
+            page = StaticPage.objects.create(title='Estatutos', slug='estatutos', category=self.category)
+        self.assertIn('Estatutos', self.render_menu())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            page.delete()
+        self.assertNotIn('Estatutos', self.render_menu())
+
+
+class PerProcessCacheWarningTests(SimpleTestCase):
+    LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+    REDIS = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://localhost'}}
+
+    @override_settings(DEBUG=False, CACHES=LOCMEM)
+    def test_warns_about_locmem_outside_debug(self):
+        with self.assertLogs('avuweb.main.caching', level='WARNING'):
+            self.assertTrue(warn_if_cache_is_per_process())
+
+    def test_silent_in_debug_or_with_a_shared_cache(self):
+        for debug, caches in [(True, self.LOCMEM), (False, self.REDIS)]:
+            with self.subTest(debug=debug), override_settings(DEBUG=debug, CACHES=caches):
+                self.assertFalse(warn_if_cache_is_per_process())
@@ -0,0 +1,71 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+
+from avuweb.main import tasks
+from avuweb.main.models import Subscription, SubscriptionEvent, UserProfile
+
+
+class EventBatchRetryTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('events', 'events@example.invalid', 'pw')
+        UserProfile.objects.create(user=user, user_type='socio', full_name='Eventos')
+        self.subscription = Subscription.objects.create(user=user, mercado_pago_subscription_id='events')
+        self.failing = SubscriptionEvent.objects.create(
+            subscription=self.subscription, event_type='subscription_updated', mercado_pago_event_id='events-1',
+            payload={'status': 'cancelled', 'boom': True},
+        )
+        self.authorized = SubscriptionEvent.objects.create(
+            subscription=self.subscription, event_type='subscription_updated', mercado_pago_event_id='events-2',
+            payload={'status': 'authorized', 'id': 'preapproval'},
+        )
+
+    def flaky_apply_event(self, subscription, event_type, payload):
+        if payload.get('boom'):
+            # Falla después de tocar la suscripción en memoria
+            subscription.status = 'cancelled'
+            subscription.next_payment_date = None
+            raise ValueError('boom')
+        return self.real_apply_event(subscription, event_type, payload)
+
+    def run_batch(self):
+        return tasks.process_subscription_events_batch()
+
+    def test_failed_event_does_not_leak_state_and_is_retried_with_backoff(self):
+        self.real_apply_event = tasks._apply_event
+        with mock.patch.object(tasks, '_apply_event', self.flaky_apply_event), \
+                self.assertLogs('avuweb.main.tasks', level='ERROR'):
+            self.assertEqual(self.run_batch(), 1)
+
+        self.subscription.refresh_from_db()
+        self.assertEqual(self.subscription.status, 'active')
+        self.failing.refresh_from_db()
+        self.assertFalse(self.failing.processed)
+        self.assertEqual((self.failing.error_message, self.failing.attempts), ('boom', 1))
+        self.assertGreater(self.failing.next_attempt_at, timezone.now())
+
+        # Antes del backoff no se vuelve a tomar
+        self.assertEqual(self.run_batch(), 0)
+
+        SubscriptionEvent.objects.filter(pk=self.failing.pk).update(next_attempt_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.run_batch(), 1)
+        self.failing.refresh_from_db()
+        self.assertTrue(self.failing.processed)
+
+    def test_gives_up_after_max_attempts(self):
+        self.real_apply_event = tasks._apply_event
+        with self.settings(MERCADO_PAGO_EVENT_MAX_ATTEMPTS=2), \
+                mock.patch.object(tasks, '_apply_event', self.flaky_apply_event), \
+                self.assertLogs('avuweb.main.tasks', level='ERROR') as logs:
+            self.run_batch()
+            SubscriptionEvent.objects.filter(pk=self.failing.pk).update(next_attempt_at=timezone.now())
+            self.run_batch()
+        self.assertTrue(any('Giving up on event' in line for line in logs.output))
+
+        self.failing.refresh_from_db()
+        self.assertEqual(self.failing.attempts, 2)
+        self.assertIsNone(self.failing.next_attempt_at)
+        self.assertEqual(self.run_batch(), 0)
@@ -0,0 +1,53 @@
+import hashlib
+import json
+import time
+import uuid
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError
+from django.test import TestCase
+from django.urls import reverse
+
+from avuweb.main.models import Subscription, SubscriptionEvent
+
+
+def signed_headers(body: str) -> dict:
+    request_id = uuid.uuid4().hex
+    timestamp = str(int(time.time()))
+    signature = hashlib.sha256(f'{request_id}.{timestamp}.{body}'.encode()).hexdigest()
+    return {'HTTP_X_REQUEST_ID': request_id, 'HTTP_X_SIGNATURE': f'ts={timestamp},v1={signature}'}
+
+
+@mock.patch('avuweb.main.views.webhooks.enqueue_subscription_event')
+class MercadoPagoWebhookTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user('webhook', 'webhook@example.invalid', 'pw')
+        self.subscription = Subscription.objects.create(
+            user=user, mercado_pago_subscription_id='sub-1', preapproval_id='pre-1'
+        )
+
+    def deliver(self, event_id, resource_id='sub-1'):
+        body = json.dumps({'id': event_id, 'type': 'subscription_preapproval', 'data': {'id': resource_id}})
+        return self.client.post(reverse('main:mp_webhook'), body, content_type='application/json',
+                                **signed_headers(body))
+
+    def test_new_event_is_one_lookup_and_one_insert(self, enqueue):
+        with self.assertNumQueries(4):  # lookup, SAVEPOINT, INSERT, RELEASE
+            response = self.deliver('evt-1', resource_id='pre-1')
+        self.assertEqual(response.json(), {'status': 'received'})
+        enqueue.assert_called_once()
+
+    def test_duplicate_delivery_is_acknowledged(self, enqueue):
+        self.deliver('evt-1')
+        response = self.deliver('evt-1')
+        self.assertEqual(response.json(), {'status': 'already_processed'})
+        self.assertEqual(SubscriptionEvent.objects.count(), 1)
+        enqueue.assert_called_once()
+
+    def test_other_integrity_errors_are_not_reported_as_duplicates(self, enqueue):
+        with mock.patch.object(SubscriptionEvent.objects, 'create', side_effect=IntegrityError('NOT NULL')), \
+                self.assertLogs('avuweb.main.views.webhooks', level='ERROR'):
+            response = self.deliver('evt-2')
+        self.assertEqual(response.status_code, 500)
+        enqueue.assert_not_called()
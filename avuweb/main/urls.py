@@ -1,6 +1,17 @@
 from django.urls import path
 
-from .views import benefits_partial, landing, profile, signup, static_page, mercado_pago_webhook
+from .views import (
+    active_members_bloom,
+    benefits_partial,
+    landing,
+    member_status_changes,
+    membership_revocations,
+    mercado_pago_webhook,
+    profile,
+    signup,
+    static_page,
+    validate_member,
+)
 
 app_name = "main"
 
@@ -10,6 +21,10 @@ urlpatterns = [
     path("profile/", profile, name="profile"),
     path("fragments/benefits/", benefits_partial, name="benefits"),
     path("pages/<slug:slug>/", static_page, name="static_page"),
+    path("validar-beneficios/revocaciones/", membership_revocations, name="membership_revocations"),
+    path("validar-beneficios/cambios/", member_status_changes, name="member_status_changes"),
+    path("validar-beneficios/snapshot.bloom", active_members_bloom, name="active_members_bloom"),
+    path("validar-beneficios/<str:identity_number>/", validate_member, name="validate_member"),
     # Webhooks
     path("webhooks/mercado-pago/", mercado_pago_webhook, name="mp_webhook"),
 ]
@@ -1,4 +1,5 @@
 from .home import landing, benefits_partial
+from .membership import active_members_bloom, member_status_changes, membership_revocations, validate_member
 from .profile import profile
 from .signup import signup
 from .static_page import static_page
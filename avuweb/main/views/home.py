@@ -1,4 +1,20 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
 from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.utils.cache import (
+    add_never_cache_headers,
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.safestring import mark_safe
+
+from avuweb.main.caching import get_static_pages_version
 
 
 BENEFITS = [
@@ -16,18 +32,74 @@ BENEFITS = [
     },
 ]
 
+# El contenido es estático: la clave cambia sola si se edita BENEFITS
+BENEFITS_FRAGMENT_KEY = 'home:benefits:' + hashlib.md5(
+    json.dumps(BENEFITS, sort_keys=True).encode()
+).hexdigest()
+BENEFITS_FRAGMENT_TIMEOUT = 60 * 60
+# Tiempo que navegadores/CDN pueden reutilizar el fragmento sin revalidar
+BENEFITS_MAX_AGE = 60 * 5
+
+
+def _benefits_fragment():
+    """Devuelve (html, etag) del fragmento de beneficios, renderizado una sola vez."""
+    fragment = cache.get(BENEFITS_FRAGMENT_KEY)
+    if fragment is None:
+        html = render_to_string("main/includes/benefits.html", {"benefits": BENEFITS})
+        fragment = (str(html), f'"{hashlib.md5(html.encode()).hexdigest()}"')
+        cache.set(BENEFITS_FRAGMENT_KEY, fragment, timeout=BENEFITS_FRAGMENT_TIMEOUT)
+    return fragment
+
+
+def _landing_etag(request, benefits_etag: str) -> str:
+    """ETag débil de la landing.
+
+    Depende de todo lo que cambia el HTML: beneficios, menú, sesión y la cookie
+    CSRF (el formulario de contacto lleva el token).
+    """
+    parts = (
+        benefits_etag,
+        str(get_static_pages_version()),
+        str(request.user.pk or 'anon'),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+    )
+    return f'W/"landing-{hashlib.md5("|".join(parts).encode()).hexdigest()}"'
+
 
 def landing(request):
-    context = {"benefits": BENEFITS}
+    benefits_html, benefits_etag = _benefits_fragment()
+    context = {"benefits_html": mark_safe(benefits_html)}
 
     if request.method == "POST":
         context["message"] = "Gracias por escribirnos. Te responderemos pronto."
         if request.headers.get("HX-Request"):
-            return render(request, "main/includes/contact_success.html", context, status=201)
-        return render(request, "main/home.html", context, status=201)
+            response = render(request, "main/includes/contact_success.html", context, status=201)
+        else:
+            response = render(request, "main/home.html", context, status=201)
+        add_never_cache_headers(response)
+        return response
+
+    etag = _landing_etag(request, benefits_etag)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = render(request, "main/home.html", context)
 
-    return render(request, "main/home.html", context)
+    response.headers["ETag"] = etag
+    # Privada: lleva menú según sesión y token CSRF; el navegador revalida con el ETag
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ("HX-Request", "Cookie"))
+    return response
 
 
 def benefits_partial(request):
-    return render(request, "main/includes/benefits.html", {"benefits": BENEFITS})
+    benefits_html, etag = _benefits_fragment()
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(benefits_html)
+
+    response.headers["ETag"] = etag
+    # No depende del usuario: puede cachearse en un CDN
+    patch_cache_control(response, public=True, max_age=BENEFITS_MAX_AGE)
+    patch_vary_headers(response, ("HX-Request",))
+    return response
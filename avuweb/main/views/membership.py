@@ -0,0 +1,137 @@
+import time
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import add_never_cache_headers, get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_GET
+
+from avuweb.main.membership import (
+    check_validation_throttle,
+    get_active_members_bloom,
+    get_member_status,
+    get_revocation_list,
+    get_status_changes,
+    is_member_validator,
+    latest_status_change_sequence,
+)
+
+STATUS_CHANGES_DEFAULT_LIMIT = 1000
+STATUS_CHANGES_MAX_LIMIT = 10000
+
+
+def _validator_error(request):
+    """Respuesta de error si el request no viene de un validador, o None."""
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+    if not is_member_validator(request.user):
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+    return None
+
+
+@require_GET
+def validate_member(request, identity_number):
+    """validar-beneficios: indica si el socio con esa cédula está al día.
+
+    Pensado para el checkout de los establecimientos: responde desde caché,
+    sin consultar Subscription, y limita los requests por validador.
+    """
+    error = _validator_error(request)
+    if error is not None:
+        return error
+
+    retry_after = check_validation_throttle(request.user.pk)
+    if retry_after is not None:
+        response = JsonResponse({'error': 'Too many requests'}, status=429)
+        response['Retry-After'] = str(retry_after)
+        return response
+
+    status = get_member_status(identity_number)
+    if status is None:
+        response = JsonResponse({'found': False, 'is_active': False}, status=404)
+    else:
+        response = JsonResponse({'found': True, **status})
+    # El estado puede cambiar en cualquier momento: nunca reutilizar la respuesta
+    add_never_cache_headers(response)
+    return response
+
+
+@require_GET
+def membership_revocations(request):
+    """Lista de tokens de membresía revocados para la verificación offline.
+
+    {'revocations': {user_id: epoch}}: un token es inválido si su 'i' es
+    menor o igual al valor de su usuario. Los establecimientos la descargan
+    periódicamente junto con la clave de verificación.
+    """
+    error = _validator_error(request)
+    if error is not None:
+        return error
+    response = JsonResponse({'generated_at': int(time.time()), 'revocations': get_revocation_list()})
+    add_never_cache_headers(response)
+    return response
+
+
+@require_GET
+def member_status_changes(request):
+    """Feed incremental de cambios de estado para la copia local de los establecimientos.
+
+    ?since=<secuencia>&limit=<n> devuelve {'next': última secuencia,
+    'more': bool, 'changes': [[secuencia, cédula, 1|0], ...]}. Para seguir,
+    se vuelve a pedir con since=next. Las páginas completas no cambian nunca
+    (el log es append-only), así que se pueden cachear.
+    """
+    error = _validator_error(request)
+    if error is not None:
+        return error
+    try:
+        since = max(0, int(request.GET.get('since', 0)))
+        limit = min(STATUS_CHANGES_MAX_LIMIT, max(1, int(request.GET.get('limit', STATUS_CHANGES_DEFAULT_LIMIT))))
+    except ValueError:
+        return JsonResponse({'error': 'since and limit must be integers'}, status=400)
+
+    changes, more = get_status_changes(since, limit)
+    next_sequence = changes[-1][0] if changes else since
+    etag = f'"changes-{since}-{next_sequence}-{len(changes)}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = JsonResponse({
+            'next': next_sequence,
+            'more': more,
+            'changes': [[sequence, identity, int(is_active)] for sequence, identity, is_active in changes],
+        })
+    response.headers['ETag'] = etag
+    if more:
+        patch_cache_control(response, private=True, max_age=60 * 60 * 24, immutable=True)
+    else:
+        # La última página crece con cada cambio nuevo: revalidar siempre
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@require_GET
+def active_members_bloom(request):
+    """Snapshot descargable (Bloom filter) de las cédulas de socios activos.
+
+    El cuerpo son los bits del filtro (ver avuweb.main.bloom.BloomFilter);
+    los parámetros van en headers X-Bloom-*. X-Bloom-Sequence indica desde
+    dónde seguir con el feed de cambios.
+    """
+    error = _validator_error(request)
+    if error is not None:
+        return error
+    false_positive_rate = getattr(settings, 'MEMBER_BLOOM_FALSE_POSITIVE_RATE', 0.001)
+    sequence = latest_status_change_sequence()
+    etag = f'"bloom-{sequence}-{false_positive_rate}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        bloom, count = get_active_members_bloom(sequence, false_positive_rate)
+        response = HttpResponse(bytes(bloom.bits), content_type='application/octet-stream')
+        response.headers['Content-Disposition'] = f'attachment; filename="socios-activos-{sequence}.bloom"'
+        response.headers['X-Bloom-Bits'] = str(bloom.num_bits)
+        response.headers['X-Bloom-Hashes'] = str(bloom.num_hashes)
+        response.headers['X-Bloom-Count'] = str(count)
+        response.headers['X-Bloom-False-Positive-Rate'] = str(false_positive_rate)
+    response.headers['X-Bloom-Sequence'] = str(sequence)
+    response.headers['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -1,8 +1,21 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
 
+from avuweb.main.membership import ensure_membership_token, needs_membership_token
+from avuweb.main.models import Subscription, UserProfile
+
 
 @login_required
 def profile(request):
     """Display the user's profile page."""
+    try:
+        user_profile = request.user.profile
+    except UserProfile.DoesNotExist:
+        user_profile = None
+    if user_profile is not None and needs_membership_token(user_profile):
+        # Socios con cupón o empresas no pasan por los tasks de MP
+        next_payment_date = (
+            Subscription.objects.filter(user=request.user).values_list('next_payment_date', flat=True).first()
+        )
+        ensure_membership_token(user_profile, next_payment_date)
     return render(request, "main/profile.html")
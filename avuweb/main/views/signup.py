@@ -1,10 +1,13 @@
 from django.shortcuts import render, redirect
-from django.contrib.auth import authenticate, login
+from django.contrib.auth import login
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
+from django.urls import reverse
 from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_protect
 from django.contrib import messages
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 
 from avuweb.main.forms import (
     SignupStep1Form,
@@ -13,7 +16,20 @@ from avuweb.main.forms import (
     SignupStep3EmpresaForm,
     SignupStep4Form,
 )
-from avuweb.main.models import UserProfile
+from avuweb.main.models import OutboundEmail, UserProfile
+
+
+def redirect_to_step(step):
+    return redirect(f"{reverse('main:signup')}?step={step}")
+
+
+def email_taken(email: str) -> bool:
+    """Si ya hay una cuenta con ese email, o con ese email como username (sin distinguir mayúsculas).
+
+    Las cuentas creadas por allauth tienen username propio, así que la
+    restricción única del username no alcanza para detectarlas.
+    """
+    return User.objects.filter(Q(email__iexact=email) | Q(username__iexact=email)).exists()
 
 
 @csrf_protect
@@ -25,11 +41,8 @@ def signup(request):
 
     step = request.GET.get('step', '1')
     
-    # Initialize session data if not present
-    if 'signup_data' not in request.session:
-        request.session['signup_data'] = {}
-    
-    signup_data = request.session['signup_data']
+    # Solo los POST escriben la sesión; un GET no la marca como modificada
+    signup_data = request.session.get('signup_data', {})
 
     if request.method == 'POST':
         if step == '1':
@@ -52,12 +65,12 @@ def signup(request):
         return render(request, 'main/signup/step1.html', context)
     elif step == '2':
         if not signup_data.get('user_type'):
-            return redirect('main:signup') + '?step=1'
+            return redirect_to_step(1)
         context['form'] = SignupStep2Form()
         return render(request, 'main/signup/step2.html', context)
     elif step == '3':
         if not signup_data.get('user_type'):
-            return redirect('main:signup') + '?step=1'
+            return redirect_to_step(1)
         if signup_data.get('user_type') == 'socio':
             context['form'] = SignupStep3SocioForm()
             return render(request, 'main/signup/step3_socio.html', context)
@@ -66,12 +79,12 @@ def signup(request):
             return render(request, 'main/signup/step3_empresa.html', context)
     elif step == '4':
         if not signup_data.get('user_type'):
-            return redirect('main:signup') + '?step=1'
+            return redirect_to_step(1)
         context['form'] = SignupStep4Form()
         return render(request, 'main/signup/step4.html', context)
     
     # Default to step 1
-    return redirect('main:signup') + '?step=1'
+    return redirect_to_step(1)
 
 
 def handle_step_1(request, signup_data):
@@ -94,7 +107,8 @@ def handle_step_2(request, signup_data):
     if form.is_valid():
         signup_data['full_name'] = form.cleaned_data['full_name']
         signup_data['email'] = form.cleaned_data.get('email', '')
-        signup_data['password'] = form.cleaned_data.get('password', '')
+        # Se guarda solo el hash, calculado una vez; el paso 4 lo usa tal cual
+        signup_data['password_hash'] = make_password(form.cleaned_data['password'])
         request.session['signup_data'] = signup_data
         return redirect(f'{request.path}?step=3')
     
@@ -142,51 +156,65 @@ def handle_step_4(request, signup_data):
     if form.is_valid():
         signup_data['address'] = form.cleaned_data['address']
         
+        email = signup_data.get('email')
+        password_hash = signup_data.get('password_hash')
+        if not email or not password_hash:
+            messages.error(request, 'Volvé a ingresar tu email y contraseña.')
+            return redirect_to_step(2)
+        
+        # Una cuenta pudo crearse con este email después del paso 2
+        if email_taken(email):
+            messages.error(request, 'El email ya está registrado.')
+            return redirect_to_step(2)
+
         # Create user and profile
         try:
-            email = signup_data.get('email')
-            password = signup_data.get('password')
-            
-            # Check if user already exists
-            if User.objects.filter(email=email).exists():
-                messages.error(request, 'El email ya está registrado.')
-                return redirect('main:signup') + '?step=2'
-            
-            user = User.objects.create_user(
-                username=email,
-                email=email,
-                password=password,
-            )
-            
-            profile = UserProfile.objects.create(
-                user=user,
-                user_type=signup_data.get('user_type'),
-                full_name=signup_data.get('full_name'),
-                address=signup_data.get('address'),
-                identity_number=signup_data.get('identity_number', ''),
-                phone_number=signup_data.get('phone_number', ''),
-                rut=signup_data.get('rut', ''),
-            )
+            # Usuario, perfil y mail de bienvenida (outbox) se confirman juntos.
+            # El username es el email: dos altas simultáneas con el mismo email
+            # chocan con la restricción única.
+            with transaction.atomic():
+                user = User.objects.create(
+                    username=email,
+                    email=email,
+                    password=password_hash,
+                )
+                
+                profile = UserProfile.objects.create(
+                    user=user,
+                    user_type=signup_data.get('user_type'),
+                    full_name=signup_data.get('full_name'),
+                    address=signup_data.get('address'),
+                    identity_number=signup_data.get('identity_number', ''),
+                    phone_number=signup_data.get('phone_number', ''),
+                    rut=signup_data.get('rut', ''),
+                )
+                
+                OutboundEmail.queue(
+                    email,
+                    'Bienvenido a la AVU',
+                    f"Hola {profile.full_name},\n\nTu cuenta en la AVU fue creada con el usuario {email}.",
+                    dedup_key=f'welcome:{user.pk}',
+                )
             
             # Clear session
             del request.session['signup_data']
             
-            # Login user
-            user = authenticate(
-                username=email,
-                password=password
-            )
-            login(request, user)
+            # Login directo: la contraseña ya se validó en el paso 2, authenticate
+            # solo volvería a calcular el hash
+            login(request, user, backend='django.contrib.auth.backends.ModelBackend')
             
             messages.success(request, '¡Bienvenido! Tu cuenta ha sido creada exitosamente.')
             return redirect('main:profile')
             
-        except IntegrityError as e:
-            messages.error(request, f'Error al crear la cuenta: {str(e)}')
-            return redirect('main:signup') + '?step=1'
+        except IntegrityError:
+            if email_taken(email):
+                messages.error(request, 'El email ya está registrado.')
+                return redirect_to_step(2)
+            messages.error(request, 'No pudimos crear la cuenta, intentá de nuevo.')
+            return redirect_to_step(1)
         except Exception as e:
             messages.error(request, f'Error inesperado: {str(e)}')
-            return redirect('main:signup') + '?step=1'
+            return redirect_to_step(1)
     
     return render(request, 'main/signup/step4.html', {
         'form': form,
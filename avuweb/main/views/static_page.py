@@ -1,10 +1,43 @@
-from django.shortcuts import render, get_object_or_404
-from html import unescape
-from avuweb.main.models import StaticPage
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.shortcuts import render
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from avuweb.main.caching import (
+    STATIC_PAGES_CACHE_TIMEOUT,
+    get_static_page,
+    get_static_pages_version,
+    static_page_html_key,
+)
 
 
 def static_page(request, slug):
     """Vista para renderizar páginas estáticas por slug."""
-    page = get_object_or_404(StaticPage, slug=slug)
-    page.content = unescape(page.content)
-    return render(request, 'main/static_page.html', {'page': page})
+    version = get_static_pages_version()
+    page = get_static_page(slug, version)
+    if page is None:
+        raise Http404("Página no encontrada")
+
+    if request.user.is_authenticated:
+        # El menú cambia según la sesión: no se comparte ni se valida
+        return render(request, 'main/static_page.html', {'page': page})
+
+    # La versión entra en el ETag porque el menú lista todas las páginas
+    updated_at = page['updated_at']
+    etag = f'"{slug}-{int(updated_at.timestamp())}-{version}"'
+    last_modified = int(updated_at.timestamp())
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        html_key = static_page_html_key(version, slug)
+        content = cache.get(html_key)
+        if content is None:
+            content = render(request, 'main/static_page.html', {'page': page}).content
+            cache.set(html_key, content, timeout=STATIC_PAGES_CACHE_TIMEOUT)
+        response = HttpResponse(content)
+
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, no_cache=True)
+    return response
@@ -2,13 +2,17 @@ import hashlib
 import hmac
 import json
 import logging
+import time
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.conf import settings
 
 from avuweb.main.models import Subscription, SubscriptionEvent
-from avuweb.main.tasks import process_subscription_event
+from avuweb.main.mp_cache import invalidate_mp_resource
+from avuweb.main.tasks import enqueue_subscription_event
 
 
 logger = logging.getLogger(__name__)
@@ -18,6 +22,16 @@ logger = logging.getLogger(__name__)
 @require_http_methods(["POST"])
 def mercado_pago_webhook(request):
     """Maneja webhooks de Mercado Pago: valida firma, persiste y encola evento."""
+    started = time.perf_counter()
+    response = _handle_webhook(request)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    budget_ms = getattr(settings, 'MERCADO_PAGO_WEBHOOK_LATENCY_BUDGET_MS', 200)
+    if elapsed_ms > budget_ms:
+        logger.warning(f"Webhook took {elapsed_ms:.0f}ms (budget {budget_ms}ms), status={response.status_code}")
+    return response
+
+
+def _handle_webhook(request):
     try:
         signature = request.headers.get('X-Signature', '')
         request_id = request.headers.get('X-Request-Id', '')
@@ -48,32 +62,37 @@ def mercado_pago_webhook(request):
             logger.info(f"Ignoring event type: {event_type}")
             return JsonResponse({'status': 'ignored'}, status=200)
 
-        # Buscar suscripción por ID o preapproval
-        subscription = None
+        # Buscar suscripción por ID o preapproval (una sola consulta)
+        subscription = _resolve_subscription(resource_id)
+        if subscription is None:
+            logger.warning(f"Subscription not found for resource: {resource_id}")
+            return JsonResponse({'error': 'Subscription not found'}, status=404)
+        subscription_id, mp_subscription_id = subscription
+
+        # INSERT directo: el unique de mercado_pago_event_id detecta duplicados
+        # sin lectura previa y sin carrera entre entregas concurrentes
         try:
-            subscription = Subscription.objects.get(mercado_pago_subscription_id=resource_id)
-        except Subscription.DoesNotExist:
-            try:
-                subscription = Subscription.objects.get(preapproval_id=resource_id)
-            except Subscription.DoesNotExist:
-                logger.warning(f"Subscription not found for resource: {resource_id}")
-                return JsonResponse({'error': 'Subscription not found'}, status=404)
-
-        event, created = SubscriptionEvent.objects.get_or_create(
-            mercado_pago_event_id=event_id,
-            defaults={
-                'subscription': subscription,
-                'event_type': event_type,
-                'payload': payload,
-            }
-        )
-
-        if not created:
+            with transaction.atomic():
+                event = SubscriptionEvent.objects.create(
+                    mercado_pago_event_id=event_id,
+                    subscription_id=subscription_id,
+                    event_type=event_type,
+                    payload=payload,
+                )
+        except IntegrityError:
+            # Solo el unique de mercado_pago_event_id es una reentrega; cualquier
+            # otra violación es un error real (500, MP reintenta). La lectura
+            # extra solo ocurre en este camino.
+            if not SubscriptionEvent.objects.filter(mercado_pago_event_id=event_id).exists():
+                raise
             logger.info(f"Duplicate webhook received: {event_id}")
             return JsonResponse({'status': 'already_processed'}, status=200)
 
+        # Lo cacheado de MP para este recurso ya no es válido
+        invalidate_mp_resource(resource_id, mp_subscription_id)
+
         # Encola procesamiento async
-        process_subscription_event.delay(event.id)
+        enqueue_subscription_event(event.id)
         logger.info(f"Webhook received and queued: {event_id}")
         return JsonResponse({'status': 'received'}, status=200)
 
@@ -82,6 +101,24 @@ def mercado_pago_webhook(request):
         return JsonResponse({'error': 'Internal server error'}, status=500)
 
 
+def _resolve_subscription(resource_id: str):
+    """(ID, ID de MP) de la suscripción cuyo ID de MP o preapproval coincide con el recurso.
+
+    Si hay coincidencias por ambos campos gana el ID de suscripción de MP.
+    """
+    rows = list(
+        Subscription.objects.filter(
+            Q(mercado_pago_subscription_id=resource_id) | Q(preapproval_id=resource_id)
+        ).order_by().values_list('id', 'mercado_pago_subscription_id')[:2]
+    )
+    if not rows:
+        return None
+    for row in rows:
+        if row[1] == resource_id:
+            return row
+    return rows[0]
+
+
 def _validate_webhook_signature(body: bytes, signature: str, request_id: str) -> bool:
     """Valida la firma HMAC-SHA256 de Mercado Pago."""
     try:
@@ -158,6 +158,30 @@ CKEDITOR_CONFIGS = {
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# ============================================================================
+# CACHE CONFIGURATION
+# ============================================================================
+
+# En producción apuntar CACHE_URL a Redis para compartir la caché entre
+# procesos web y workers; en desarrollo alcanza con la caché en memoria.
+# Con DEBUG apagado y sin CACHE_URL se loguea un aviso al arrancar
+# (caching.warn_if_cache_is_per_process).
+CACHE_URL = os.getenv('CACHE_URL', '')
+
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        },
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+    }
+
 # ============================================================================
 # MERCADO PAGO CONFIGURATION
 # ============================================================================
@@ -165,12 +189,41 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MERCADO_PAGO_ACCESS_TOKEN = os.getenv('MERCADO_PAGO_ACCESS_TOKEN', '')
 MERCADO_PAGO_WEBHOOK_SECRET = os.getenv('MERCADO_PAGO_WEBHOOK_SECRET', '')
 MERCADO_PAGO_SANDBOX = os.getenv('MERCADO_PAGO_SANDBOX', 'True') == 'True'
+# Pisa la URL de la API (p. ej. http://127.0.0.1:8765 con manage.py fake_mercadopago)
+MERCADO_PAGO_API_BASE_URL = os.getenv('MERCADO_PAGO_API_BASE_URL', '')
 
 MERCADO_PAGO_SUCCESS_URL = os.getenv('MERCADO_PAGO_SUCCESS_URL', 'http://localhost:8000/profile/')
 MERCADO_PAGO_FAILURE_URL = os.getenv('MERCADO_PAGO_FAILURE_URL', 'http://localhost:8000/signup/error/')
 MERCADO_PAGO_PENDING_URL = os.getenv('MERCADO_PAGO_PENDING_URL', 'http://localhost:8000/signup/pending/')
 MERCADO_PAGO_WEBHOOK_URL = os.getenv('MERCADO_PAGO_WEBHOOK_URL', 'http://localhost:8000/webhooks/mercado-pago/')
 
+# Cliente HTTP: pool de conexiones por proceso, reintentos con backoff
+# exponencial (respeta Retry-After) y timeout de conexión; los timeouts de
+# lectura por endpoint se pueden pisar con MERCADO_PAGO_TIMEOUTS
+MERCADO_PAGO_HTTP_POOL_SIZE = int(os.getenv('MERCADO_PAGO_HTTP_POOL_SIZE', '10'))
+MERCADO_PAGO_HTTP_RETRIES = int(os.getenv('MERCADO_PAGO_HTTP_RETRIES', '3'))
+MERCADO_PAGO_HTTP_BACKOFF = float(os.getenv('MERCADO_PAGO_HTTP_BACKOFF', '0.5'))
+MERCADO_PAGO_CONNECT_TIMEOUT = float(os.getenv('MERCADO_PAGO_CONNECT_TIMEOUT', '3.05'))
+MERCADO_PAGO_TIMEOUTS = {}
+# Requests en vuelo por instancia de AsyncMercadoPagoService
+MERCADO_PAGO_ASYNC_CONCURRENCY = int(os.getenv('MERCADO_PAGO_ASYNC_CONCURRENCY', '50'))
+# TTL (segundos) de la caché de lecturas por endpoint, p. ej.
+# {'get_subscription': 30}; 0 desactiva la caché de ese endpoint
+MERCADO_PAGO_CACHE_TTLS = {}
+
+# MP reintenta si el webhook tarda: loguear cuando se supera este presupuesto
+MERCADO_PAGO_WEBHOOK_LATENCY_BUDGET_MS = int(os.getenv('MERCADO_PAGO_WEBHOOK_LATENCY_BUDGET_MS', '200'))
+
+# Retención de SubscriptionEvent: los eventos procesados con más de N días
+# salen de la tabla a archivos JSONL comprimidos (0 = no archivar). Tiene que
+# superar con holgura la ventana de reintentos de webhooks de MP: un evento
+# archivado que vuelve a llegar se registraría de nuevo.
+SUBSCRIPTION_EVENT_RETENTION_DAYS = int(os.getenv('SUBSCRIPTION_EVENT_RETENTION_DAYS', '90'))
+SUBSCRIPTION_EVENT_ARCHIVE_DIR = os.getenv(
+    'SUBSCRIPTION_EVENT_ARCHIVE_DIR', str(BASE_DIR / 'archive' / 'subscription_events')
+)
+SUBSCRIPTION_EVENT_ARCHIVE_BATCH_SIZE = int(os.getenv('SUBSCRIPTION_EVENT_ARCHIVE_BATCH_SIZE', '1000'))
+
 # Planes de pago (UYU)
 PAYMENT_PLANS = {
     'monthly': {
@@ -185,6 +238,65 @@ PAYMENT_PLANS = {
     },
 }
 
+# ============================================================================
+# MEMBERSHIP CONFIGURATION
+# ============================================================================
+
+# validar-beneficios: caché del estado por cédula, caché del permiso del
+# validador y límite de consultas por validador (ventana fija)
+MEMBER_VALIDATION_CACHE_TIMEOUT = int(os.getenv('MEMBER_VALIDATION_CACHE_TIMEOUT', '300'))
+MEMBER_VALIDATOR_CACHE_TIMEOUT = int(os.getenv('MEMBER_VALIDATOR_CACHE_TIMEOUT', '300'))
+MEMBER_VALIDATION_RATE_LIMIT = int(os.getenv('MEMBER_VALIDATION_RATE_LIMIT', '120'))
+MEMBER_VALIDATION_RATE_WINDOW = int(os.getenv('MEMBER_VALIDATION_RATE_WINDOW', '60'))
+
+# Tokens de membresía (QR) verificables offline por los establecimientos.
+# La clave se comparte con ellos: no usar SECRET_KEY. Vacía = sin tokens.
+MEMBERSHIP_TOKEN_KEY = os.getenv('MEMBERSHIP_TOKEN_KEY', '')
+MEMBERSHIP_TOKEN_GRACE_DAYS = int(os.getenv('MEMBERSHIP_TOKEN_GRACE_DAYS', '3'))
+MEMBERSHIP_TOKEN_DEFAULT_DAYS = int(os.getenv('MEMBERSHIP_TOKEN_DEFAULT_DAYS', '30'))
+# Feed de cambios para establecimientos: tasa de falsos positivos del
+# snapshot Bloom de socios activos
+MEMBER_BLOOM_FALSE_POSITIVE_RATE = float(os.getenv('MEMBER_BLOOM_FALSE_POSITIVE_RATE', '0.001'))
+
+# ============================================================================
+# EMAIL CONFIGURATION
+# ============================================================================
+
+# Mail (comunicados a socios). Para probar localmente: manage.py smtp_sink
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.smtp.EmailBackend')
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', '25'))
+EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'False') == 'True'
+EMAIL_TIMEOUT = int(os.getenv('EMAIL_TIMEOUT', '10'))
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'webmaster@localhost')
+
+# ============================================================================
+# CAMPAIGN CONFIGURATION
+# ============================================================================
+
+# Campañas: destinatarios por chunk (una conexión SMTP cada uno), mails por
+# segundo en total (0 = sin límite) y tras cuántos segundos un chunk que no
+# terminó se da por perdido (como mínimo el doble de lo que tarda un chunk
+# a CAMPAIGN_SEND_RATE; ver campaigns.claim_timeout)
+CAMPAIGN_CHUNK_SIZE = int(os.getenv('CAMPAIGN_CHUNK_SIZE', '200'))
+CAMPAIGN_SEND_RATE = float(os.getenv('CAMPAIGN_SEND_RATE', '10'))
+CAMPAIGN_CLAIM_TIMEOUT = int(os.getenv('CAMPAIGN_CLAIM_TIMEOUT', '600'))
+
+# ============================================================================
+# OUTBOX CONFIGURATION
+# ============================================================================
+
+# Outbox de mails transaccionales: tamaño de lote, intentos por mail,
+# backoff base entre reintentos, demora para agrupar mails antes del dispatch
+# y tiempo tras el cual un lote tomado por un worker caído vuelve a pending
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '100'))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '5'))
+OUTBOX_RETRY_BASE_SECONDS = int(os.getenv('OUTBOX_RETRY_BASE_SECONDS', '60'))
+OUTBOX_KICK_DELAY = int(os.getenv('OUTBOX_KICK_DELAY', '1'))
+OUTBOX_CLAIM_TIMEOUT = int(os.getenv('OUTBOX_CLAIM_TIMEOUT', '600'))
+
 # ============================================================================
 # CELERY CONFIGURATION
 # ============================================================================
@@ -196,6 +308,27 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 
+# Rate limit de la API de MP compartido por web y workers (token bucket en
+# Redis, por defecto el del broker; vacío = bucket en memoria por proceso,
+# que no reparte el límite entre procesos). Límites por familia:
+# {'subscriptions': {'rate': 10, 'burst': 20}, 'payments': ..., 'preferences': ...}
+MERCADO_PAGO_RATE_LIMIT_REDIS_URL = os.getenv('MERCADO_PAGO_RATE_LIMIT_REDIS_URL', CELERY_BROKER_URL)
+MERCADO_PAGO_RATE_LIMITS = {}
+
+# Batch de eventos de webhook: segundos que se juntan eventos antes de
+# aplicarlos en un solo task (0 = un task por evento) y tamaño máximo del lote
+MERCADO_PAGO_EVENT_BATCH_WINDOW = float(os.getenv('MERCADO_PAGO_EVENT_BATCH_WINDOW', '0'))
+MERCADO_PAGO_EVENT_BATCH_SIZE = int(os.getenv('MERCADO_PAGO_EVENT_BATCH_SIZE', '200'))
+# Intentos de un evento que falla al aplicarse (backoff de 1, 2, 4... minutos)
+MERCADO_PAGO_EVENT_MAX_ATTEMPTS = int(os.getenv('MERCADO_PAGO_EVENT_MAX_ATTEMPTS', '5'))
+
+# Reconciliación: suscripciones por subtask y requests simultáneos a MP por
+# subtask (por defecto, los mismos que cualquier cliente async)
+MERCADO_PAGO_RECONCILIATION_CHUNK_SIZE = int(os.getenv('MERCADO_PAGO_RECONCILIATION_CHUNK_SIZE', '200'))
+MERCADO_PAGO_RECONCILIATION_CONCURRENCY = int(
+    os.getenv('MERCADO_PAGO_RECONCILIATION_CONCURRENCY', str(MERCADO_PAGO_ASYNC_CONCURRENCY))
+)
+
 try:
     from celery.schedules import crontab
     CELERY_BEAT_SCHEDULE = {
@@ -207,6 +340,31 @@ try:
             'task': 'avuweb.main.tasks.check_pending_payment_dates',
             'schedule': crontab(hour=9, minute=0),
         },
+        # Después de la reconciliación: corrige drift de perfiles (cupones vencidos, etc.)
+        'recompute-profile-status': {
+            'task': 'avuweb.main.tasks.recompute_profile_status_sweep',
+            'schedule': crontab(hour=3, minute=30),
+        },
+    }
+    # Red de seguridad del outbox: reintentos con backoff y despertares perdidos
+    CELERY_BEAT_SCHEDULE['dispatch-outbox'] = {
+        'task': 'avuweb.main.tasks.dispatch_outbox',
+        'schedule': crontab(minute='*'),
+    }
+    CELERY_BEAT_SCHEDULE['resume-campaigns'] = {
+        'task': 'avuweb.main.tasks.resume_campaigns',
+        'schedule': crontab(minute='*/10'),
+    }
+    if SUBSCRIPTION_EVENT_RETENTION_DAYS:
+        CELERY_BEAT_SCHEDULE['archive-subscription-events'] = {
+            'task': 'avuweb.main.tasks.archive_subscription_events_task',
+            'schedule': crontab(hour=4, minute=0),
+        }
+    # Red de seguridad: eventos cuyo batch no llegó a encolarse y reintentos
+    # de eventos fallidos (también con un task por evento)
+    CELERY_BEAT_SCHEDULE['process-subscription-events-batch'] = {
+        'task': 'avuweb.main.tasks.process_subscription_events_batch',
+        'schedule': crontab(minute='*/5'),
     }
 except Exception:
     # Celery might not be installed in some environments